@@ -0,0 +1,296 @@
+"""
+On-disk article cache with conditional GETs.
+
+Article bodies are stored content-addressed (by SHA-256 of the body) and indexed by
+the SHA-256 of the canonical URL. Entries younger than the TTL are served straight
+from disk; older entries are revalidated with If-None-Match / If-Modified-Since and
+a 304 response is served from disk. When the cache grows past its size cap the
+least recently used entries are evicted; the index is only read for that when
+``cache_budget`` says a scan is due.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from cache_budget import SizeBudget
+from clients import get_session
+from urls import canonicalize_url
+
+ARTICLE_CACHE_DIR = os.getenv('ARTICLE_CACHE_DIR', 'cache/articles')
+ARTICLE_CACHE_TTL = float(os.getenv('ARTICLE_CACHE_TTL', str(24 * 3600)))
+ARTICLE_CACHE_MAX_BYTES = int(os.getenv('ARTICLE_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ArticleCache:
+    """
+    Content-addressed article cache keyed by canonical URL.
+
+    Args:
+        cache_dir (str): Directory holding the cache.
+        ttl (float): Seconds an entry is served without revalidation.
+        max_bytes (int): Total body size above which least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = ARTICLE_CACHE_DIR, ttl: float = ARTICLE_CACHE_TTL,
+                 max_bytes: int = ARTICLE_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.index_dir = self.cache_dir / 'index'
+        self.body_dir = self.cache_dir / 'bodies'
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.body_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.budget = SizeBudget(max_bytes)
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+
+    def _index_path(self, url: str) -> Path:
+        return self.index_dir / f"{_sha256(canonicalize_url(url).encode('utf-8'))}.json"
+
+    def _load(self, url: str) -> dict | None:
+        index_path = self._index_path(url)
+        try:
+            with open(index_path) as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not (self.body_dir / meta['body']).exists():
+            return None
+        return meta
+
+    def _save_meta(self, url: str, meta: dict) -> None:
+        _write_atomic(self._index_path(url), json.dumps(meta).encode('utf-8'))
+
+    def _read_body(self, meta: dict) -> bytes:
+        with open(self.body_dir / meta['body'], 'rb') as f:
+            return f.read()
+
+    def _iter_body(self, meta: dict, chunk_size: int):
+        with open(self.body_dir / meta['body'], 'rb') as f:
+            while True:
+                part = f.read(chunk_size)
+                if not part:
+                    return
+                yield part
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def get(self, url: str) -> bytes | None:
+        """
+        Get a cached body without touching the network.
+
+        Args:
+            url (str): The article URL.
+
+        Returns:
+            bytes | None: The cached body, or None if the URL is not cached.
+        """
+        meta = self._load(url)
+        if meta is None:
+            return None
+        meta['last_used'] = time.time()
+        self._save_meta(url, meta)
+        return self._read_body(meta)
+
+    def put(self, url: str, body: bytes, etag: str | None = None, last_modified: str | None = None) -> None:
+        """
+        Store a body for a URL and evict old entries if the cache goes over its size cap.
+
+        Args:
+            url (str): The article URL.
+            body (bytes): The response body.
+            etag (str | None): ETag validator from the response.
+            last_modified (str | None): Last-Modified validator from the response.
+        """
+        body_name = _sha256(body)
+        body_path = self.body_dir / body_name
+        # Bodies are content-addressed, so a body already on disk adds nothing
+        added = 0
+        now = time.time()
+        # Held so eviction cannot take the body for an orphan before its index entry exists
+        with self._lock:
+            if not body_path.exists():
+                _write_atomic(body_path, body)
+                added = len(body)
+            self._save_meta(url, {
+                'url': canonicalize_url(url),
+                'body': body_name,
+                'size': len(body),
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': now,
+                'last_used': now,
+            })
+        if self.budget.added(added):
+            self.evict()
+
+    def iter_fetch(self, url: str, chunk_size: int = 64 * 1024, **kwargs):
+        """
+        Stream an article body, using the cache and conditional GETs where possible.
+
+        On a miss the body is streamed from the socket and written to the cache once the
+        caller is done. If the caller stops early, the prefix it read is cached as a partial
+        entry without validators, so it is only served until the TTL runs out.
+
+        Args:
+            url (str): The article URL.
+            chunk_size (int): Size of the chunks yielded.
+            **kwargs: Extra arguments passed to the session's ``get``.
+
+        Yields:
+            bytes: Chunks of the article body.
+        """
+        meta = self._load(url)
+        now = time.time()
+        if meta is not None and now - meta['fetched_at'] < self.ttl:
+            self._count('hits')
+            self._count('bytes_saved', meta['size'])
+            meta['last_used'] = now
+            self._save_meta(url, meta)
+            yield from self._iter_body(meta, chunk_size)
+            return
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = get_session().get(url, headers=headers, stream=True, **kwargs)
+        except requests.RequestException:
+            if meta is None:
+                raise
+            # Serve the stale copy rather than failing the run
+            self._count('hits')
+            yield from self._iter_body(meta, chunk_size)
+            return
+
+        with response:
+            if response.status_code == 304 and meta is not None:
+                self._count('revalidated')
+                self._count('bytes_saved', meta['size'])
+                meta['fetched_at'] = meta['last_used'] = now
+                self._save_meta(url, meta)
+                yield from self._iter_body(meta, chunk_size)
+                return
+
+            self._count('misses')
+            parts = []
+            complete = False
+            try:
+                for part in response.iter_content(chunk_size):
+                    parts.append(part)
+                    yield part
+                complete = True
+            finally:
+                body = b''.join(parts)
+                self._count('bytes_downloaded', len(body))
+                if response.ok and body:
+                    if complete:
+                        self.put(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    else:
+                        self.put(url, body)
+
+    def fetch(self, url: str, **kwargs) -> bytes:
+        """
+        Fetch a whole article body, using the cache and conditional GETs where possible.
+
+        Args:
+            url (str): The article URL.
+            **kwargs: Extra arguments passed to the session's ``get``.
+
+        Returns:
+            bytes: The article body.
+        """
+        return b''.join(self.iter_fetch(url, **kwargs))
+
+    def evict(self) -> None:
+        """
+        Delete bodies no index entry refers to, then evict least recently used entries
+        until the cache is well under its size cap.
+        """
+        with self._lock:
+            entries = []
+            for index_path in self.index_dir.glob('*.json'):
+                try:
+                    with open(index_path) as f:
+                        entries.append((index_path, json.load(f)))
+                except (OSError, json.JSONDecodeError):
+                    index_path.unlink(missing_ok=True)
+
+            referenced = {}
+            for _, meta in entries:
+                referenced[meta['body']] = referenced.get(meta['body'], 0) + 1
+            total = 0
+            for body_path in self.body_dir.iterdir():
+                if body_path.name.endswith('.tmp'):  # Still being written
+                    continue
+                if body_path.name not in referenced:
+                    # Left behind when its URL was stored again with a different body
+                    body_path.unlink(missing_ok=True)
+                    continue
+                try:
+                    total += body_path.stat().st_size
+                except FileNotFoundError:  # Evicted by another process meanwhile
+                    pass
+            if total <= self.max_bytes:
+                self.budget.scanned(total)
+                return
+
+            entries.sort(key=lambda entry: entry[1].get('last_used', 0))
+            for index_path, meta in entries:
+                if total <= self.budget.target:
+                    break
+                index_path.unlink(missing_ok=True)
+                referenced[meta['body']] -= 1
+                if referenced[meta['body']] == 0:
+                    (self.body_dir / meta['body']).unlink(missing_ok=True)
+                    total -= meta['size']
+            self.budget.scanned(total)
+
+    def print_stats(self) -> None:
+        """
+        Print cache hit, revalidation and miss counts and the bytes they saved.
+        """
+        stats = self.stats
+        print(f"Article cache: {stats['hits']} hits, {stats['revalidated']} revalidated (304), "
+              f"{stats['misses']} misses, {stats['bytes_downloaded'] / 1e6:.2f} MB downloaded, "
+              f"{stats['bytes_saved'] / 1e6:.2f} MB served from disk")
+
+
+_article_cache = None
+_article_cache_lock = threading.Lock()
+
+
+def get_article_cache() -> ArticleCache:
+    """
+    Get the process-wide article cache configured from the environment.
+
+    Returns:
+        ArticleCache: The shared cache.
+    """
+    global _article_cache
+    with _article_cache_lock:
+        if _article_cache is None:
+            _article_cache = ArticleCache()
+        return _article_cache
@@ -0,0 +1,373 @@
+"""
+NumPy audio post-processing for episode assembly.
+
+Chunks from different requests (and providers) differ in loudness and carry
+leading/trailing silence. During assembly each chunk is decoded to a float32
+``(samples, channels)`` array and, with vectorized NumPy operations:
+
+- trimmed of silence at its edges (10 ms RMS windows against
+  ``AUDIO_SILENCE_DBFS``, keeping ``SILENCE_PAD_MS`` of padding),
+- normalized to ``AUDIO_TARGET_DBFS`` using gated block loudness (400 ms blocks
+  with EBU R128-style absolute and relative gates, without K-weighting),
+  limited so peaks stay under -1 dBFS,
+- joined to the previous chunk with an equal-power crossfade of
+  ``AUDIO_CROSSFADE_MS``,
+- mixed over optional intro/outro music beds (``AUDIO_INTRO_BED``,
+  ``AUDIO_OUTRO_BED``) at ``AUDIO_BED_GAIN_DB`` below the voice.
+
+Processed audio is streamed into one encoder (see ``audio_stream``), holding back
+only the samples needed for the next crossfade and the outro bed.
+
+Post-processing re-encodes the whole episode, a lossy second generation, so it is
+opt-in (``AUDIO_POSTPROCESS=1``). By default episodes are assembled by copying MP3
+frames as they are.
+"""
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Assembly falls back to plain concatenation
+    np = None
+
+AUDIO_POSTPROCESS = os.getenv('AUDIO_POSTPROCESS', '0') == '1'
+AUDIO_TARGET_DBFS = float(os.getenv('AUDIO_TARGET_DBFS', '-18'))
+AUDIO_SILENCE_DBFS = float(os.getenv('AUDIO_SILENCE_DBFS', '-50'))
+AUDIO_CROSSFADE_MS = int(os.getenv('AUDIO_CROSSFADE_MS', '30'))
+AUDIO_BED_GAIN_DB = float(os.getenv('AUDIO_BED_GAIN_DB', '-15'))
+AUDIO_INTRO_BED = os.getenv('AUDIO_INTRO_BED')
+AUDIO_OUTRO_BED = os.getenv('AUDIO_OUTRO_BED')
+PEAK_CEILING_DBFS = -1.0
+SILENCE_PAD_MS = 80
+BED_FADE_MS = 2000
+ANALYSIS_WINDOW_MS = 10
+LOUDNESS_BLOCK_MS = 400
+ABSOLUTE_GATE_DBFS = -70.0
+RELATIVE_GATE_DB = -10.0
+
+
+def pcm_to_float(pcm: bytes, channels: int) -> 'np.ndarray':
+    """
+    Convert interleaved 16-bit PCM to a float32 array.
+
+    Args:
+        pcm (bytes): Little-endian 16-bit samples.
+        channels (int): Number of interleaved channels.
+
+    Returns:
+        np.ndarray: Samples in [-1, 1), shaped (frames, channels).
+    """
+    usable = len(pcm) - len(pcm) % (2 * channels)
+    samples = np.frombuffer(pcm[:usable], dtype='<i2').reshape(-1, channels)
+    return samples.astype(np.float32) / 32768.0
+
+
+def float_to_pcm(samples: 'np.ndarray') -> bytes:
+    """
+    Convert a float array to interleaved 16-bit PCM, clipping out-of-range samples.
+
+    Args:
+        samples (np.ndarray): Samples shaped (frames, channels).
+
+    Returns:
+        bytes: Little-endian 16-bit samples.
+    """
+    scaled = samples * np.float32(32768.0)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype('<i2').tobytes()
+
+
+def _window_power(samples: 'np.ndarray', window: int) -> 'np.ndarray':
+    # Mean square of consecutive windows, computed as row dot products without
+    # squared temporaries; a trailing partial window is ignored
+    windows = len(samples) // window
+    framed = samples[:windows * window].reshape(windows, -1)
+    return np.einsum('ij,ij->i', framed, framed, dtype=np.float64) / framed.shape[1]
+
+
+def loudness_dbfs(samples: 'np.ndarray', sample_rate: int) -> float:
+    """
+    Measure gated loudness: mean power of 400 ms blocks (75% overlap) that pass an
+    absolute gate of -70 dBFS and a relative gate 10 dB below the gated mean.
+
+    Args:
+        samples (np.ndarray): Samples shaped (frames, channels).
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        float: Loudness in dBFS, or -inf for silence.
+    """
+    if not len(samples):
+        return float('-inf')
+    # Blocks are four hops long, so block energies are sums of four hop energies
+    hop = max(min(len(samples), sample_rate * LOUDNESS_BLOCK_MS // 1000) // 4, 1)
+    hops = _window_power(samples, hop)
+    if len(hops) < 4:
+        energies = np.array([hops.mean()]) if len(hops) else _window_power(samples, len(samples))
+    else:
+        energies = (hops[:-3] + hops[1:-2] + hops[2:-1] + hops[3:]) / 4
+    energies = energies[energies > 10 ** (ABSOLUTE_GATE_DBFS / 10)]
+    if not len(energies):
+        return float('-inf')
+    energies = energies[energies > energies.mean() * 10 ** (RELATIVE_GATE_DB / 10)]
+    return float(10 * np.log10(energies.mean()))
+
+
+def normalize_loudness(samples: 'np.ndarray', sample_rate: int, target_dbfs: float = AUDIO_TARGET_DBFS,
+                       ceiling_dbfs: float = PEAK_CEILING_DBFS) -> 'np.ndarray':
+    """
+    Apply the gain that brings a chunk to the target loudness, limited by its peak.
+
+    Args:
+        samples (np.ndarray): Samples shaped (frames, channels).
+        sample_rate (int): Sample rate in Hz.
+        target_dbfs (float): Target loudness.
+        ceiling_dbfs (float): Highest allowed sample peak after the gain.
+
+    Returns:
+        np.ndarray: The scaled samples (the input unchanged if it is silent).
+    """
+    level = loudness_dbfs(samples, sample_rate)
+    if not np.isfinite(level):
+        return samples
+    gain_db = target_dbfs - level
+    peak = max(float(samples.max()), -float(samples.min()))
+    if peak > 0:
+        gain_db = min(gain_db, ceiling_dbfs - 20 * np.log10(peak))
+    return samples * np.float32(10 ** (gain_db / 20))
+
+
+def trim_silence(samples: 'np.ndarray', sample_rate: int, threshold_dbfs: float = AUDIO_SILENCE_DBFS,
+                 pad_ms: int = SILENCE_PAD_MS) -> 'np.ndarray':
+    """
+    Cut leading and trailing silence, keeping a little padding.
+
+    Args:
+        samples (np.ndarray): Samples shaped (frames, channels).
+        sample_rate (int): Sample rate in Hz.
+        threshold_dbfs (float): 10 ms windows with RMS below this count as silence.
+        pad_ms (int): Silence kept before the first and after the last loud window.
+
+    Returns:
+        np.ndarray: The trimmed samples (empty if the chunk is all silence).
+    """
+    window = max(sample_rate * ANALYSIS_WINDOW_MS // 1000, 1)
+    if len(samples) < window:
+        return samples
+    mean_square = _window_power(samples, window)
+    loud = np.flatnonzero(mean_square > 10 ** (threshold_dbfs / 10))
+    if not len(loud):
+        return samples[:0]
+    pad = sample_rate * pad_ms // 1000
+    start = max(loud[0] * window - pad, 0)
+    end = min((loud[-1] + 1) * window + pad, len(samples))
+    return samples[start:end]
+
+
+def crossfade(tail: 'np.ndarray', head: 'np.ndarray') -> 'np.ndarray':
+    """
+    Blend the end of one chunk into the start of the next with equal-power curves.
+
+    Args:
+        tail (np.ndarray): Last samples of the earlier chunk.
+        head (np.ndarray): First samples of the later chunk, the same shape as ``tail``.
+
+    Returns:
+        np.ndarray: The blended overlap.
+    """
+    phase = np.linspace(0.0, np.pi / 2, len(tail), dtype=np.float32)[:, None]
+    return tail * np.cos(phase) + head * np.sin(phase)
+
+
+def prepare_bed(bed: 'np.ndarray', sample_rate: int, fade: str, target_dbfs: float = AUDIO_TARGET_DBFS,
+                gain_db: float = AUDIO_BED_GAIN_DB, fade_ms: int = BED_FADE_MS) -> 'np.ndarray':
+    """
+    Level a music bed below the voice and fade it where it meets the voice-only part.
+
+    Args:
+        bed (np.ndarray): The bed's samples.
+        sample_rate (int): Sample rate in Hz.
+        fade (str): 'out' for an intro bed, 'in' for an outro bed.
+        target_dbfs (float): Voice loudness.
+        gain_db (float): Bed level relative to the voice.
+        fade_ms (int): Fade length.
+
+    Returns:
+        np.ndarray: The prepared bed.
+    """
+    bed = normalize_loudness(bed, sample_rate, target_dbfs + gain_db)
+    length = min(len(bed), sample_rate * fade_ms // 1000)
+    ramp = np.linspace(0.0, 1.0, length, dtype=np.float32)[:, None]
+    bed = bed.copy()
+    if fade == 'out':
+        bed[len(bed) - length:] *= ramp[::-1]
+    else:
+        bed[:length] *= ramp
+    return bed
+
+
+class EpisodePostProcessor:
+    """
+    Streaming post-processor: feed decoded chunks in order, write what it returns.
+
+    Args:
+        sample_rate (int): Sample rate of the chunks.
+        channels (int): Channel count of the chunks.
+        intro_bed (np.ndarray | None): Prepared bed mixed under the start of the episode.
+        outro_bed (np.ndarray | None): Prepared bed mixed under the end of the episode.
+        crossfade_ms (int): Crossfade length between chunks.
+    """
+
+    def __init__(self, sample_rate: int, channels: int, intro_bed: 'np.ndarray | None' = None,
+                 outro_bed: 'np.ndarray | None' = None, crossfade_ms: int = AUDIO_CROSSFADE_MS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.intro_bed = intro_bed
+        self.outro_bed = outro_bed
+        self.crossfade_samples = sample_rate * crossfade_ms // 1000
+        # Samples held back for the next crossfade and for mixing the outro bed
+        self.hold_samples = max(self.crossfade_samples, len(outro_bed) if outro_bed is not None else 0)
+        self._tail = np.zeros((0, channels), dtype=np.float32)
+        self._position = 0
+        self.processing_seconds = 0.0
+
+    def add_chunk(self, samples: 'np.ndarray') -> 'np.ndarray':
+        """
+        Process the next chunk.
+
+        Args:
+            samples (np.ndarray): The chunk, shaped (frames, channels).
+
+        Returns:
+            np.ndarray: Samples ready to be encoded (possibly empty).
+        """
+        start = time.perf_counter()
+        samples = trim_silence(samples, self.sample_rate)
+        if len(samples):
+            samples = normalize_loudness(samples, self.sample_rate)
+            overlap = self.crossfade_samples
+            if len(self._tail) >= overlap and len(samples) >= overlap and overlap:
+                joined = crossfade(self._tail[len(self._tail) - overlap:], samples[:overlap])
+                combined = np.concatenate((self._tail[:len(self._tail) - overlap], joined, samples[overlap:]))
+            else:
+                combined = np.concatenate((self._tail, samples))
+            split = max(len(combined) - self.hold_samples, 0)
+            self._tail = combined[split:]
+            output = self._mix_intro(combined[:split])
+        else:
+            output = self._tail[:0]
+        self.processing_seconds += time.perf_counter() - start
+        return output
+
+    def finish(self) -> 'np.ndarray':
+        """
+        Flush the held-back end of the episode with the outro bed mixed in.
+
+        Returns:
+            np.ndarray: The final samples.
+        """
+        start = time.perf_counter()
+        tail = self._tail.copy()
+        if self.outro_bed is not None and len(tail):
+            length = min(len(tail), len(self.outro_bed))
+            tail[len(tail) - length:] += self.outro_bed[len(self.outro_bed) - length:]
+        self._tail = tail[:0]
+        output = self._mix_intro(tail)
+        self.processing_seconds += time.perf_counter() - start
+        return output
+
+    def _mix_intro(self, samples: 'np.ndarray') -> 'np.ndarray':
+        if self.intro_bed is not None and self._position < len(self.intro_bed) and len(samples):
+            bed = self.intro_bed[self._position:self._position + len(samples)]
+            samples = samples.copy()
+            samples[:len(bed)] += bed
+        self._position += len(samples)
+        return samples
+
+
+def postprocess_available() -> bool:
+    """
+    Check whether post-processing can run (enabled, NumPy and ffmpeg installed).
+
+    Returns:
+        bool: True if ``render_episode`` can be used.
+    """
+    from audio_stream import ffmpeg_path
+
+    return AUDIO_POSTPROCESS and np is not None and ffmpeg_path() is not None
+
+
+def decode_file(path, sample_rate: int, channels: int) -> 'np.ndarray':
+    """
+    Decode a whole (short) audio file to a float array.
+
+    Args:
+        path: The audio file.
+        sample_rate (int): Output sample rate.
+        channels (int): Output channel count.
+
+    Returns:
+        np.ndarray: Samples shaped (frames, channels).
+    """
+    from audio_stream import iter_pcm
+
+    return pcm_to_float(b''.join(iter_pcm(path, sample_rate, channels)), channels)
+
+
+def render_episode(input_files: list, output_file, bitrate: str | None = None, intro_bed: str | None = AUDIO_INTRO_BED,
+                   outro_bed: str | None = AUDIO_OUTRO_BED) -> dict:
+    """
+    Decode, post-process and encode chunks into an episode, one chunk in memory at a time.
+
+    Args:
+        input_files (list): Audio chunks in playback order.
+        output_file: Destination MP3 file.
+        bitrate (str | None): Output bitrate, e.g. '192k'.
+        intro_bed (str | None): Audio file mixed under the start of the episode.
+        outro_bed (str | None): Audio file mixed under the end of the episode.
+
+    Returns:
+        dict: 'audio_seconds' encoded and 'processing_seconds' spent in NumPy processing.
+    """
+    from audio_stream import PCMEncoder, probe_format
+
+    if not input_files:
+        raise ValueError("No audio chunks to assemble into an episode")
+    formats = [probe_format(path) for path in input_files]
+    sample_rate = max(rate for rate, _ in formats)
+    channels = max(count for _, count in formats)
+    processor = EpisodePostProcessor(
+        sample_rate, channels,
+        intro_bed=prepare_bed(decode_file(intro_bed, sample_rate, channels), sample_rate, 'out') if intro_bed else None,
+        outro_bed=prepare_bed(decode_file(outro_bed, sample_rate, channels), sample_rate, 'in') if outro_bed else None)
+    with PCMEncoder(output_file, sample_rate, channels, bitrate) as encoder:
+        for path in input_files:
+            encoder.write(float_to_pcm(processor.add_chunk(decode_file(path, sample_rate, channels))))
+        encoder.write(float_to_pcm(processor.finish()))
+    return {'audio_seconds': encoder.seconds_written, 'processing_seconds': processor.processing_seconds}
+
+
+def assemble_episode(input_files: list, output_file, bitrate: str | None = None) -> str:
+    """
+    Assemble chunks into an episode, post-processing them if enabled and possible.
+
+    Args:
+        input_files (list): Audio chunks in playback order.
+        output_file: Destination MP3 file.
+        bitrate (str | None): Output bitrate, e.g. '192k'.
+
+    Returns:
+        str: 'postprocessed', or the ``concatenate_mp3`` mode when post-processing is
+        not enabled (``AUDIO_POSTPROCESS=1``) or NumPy/ffmpeg are missing.
+    """
+    from mp3_concat import concatenate_mp3
+
+    if not input_files:
+        raise ValueError("No audio chunks to assemble into an episode")
+    if not postprocess_available():
+        return concatenate_mp3(input_files, output_file)
+    stats = render_episode(input_files, output_file, bitrate)
+    audio_seconds = stats['audio_seconds']
+    print(f"Post-processed {audio_seconds / 60:.1f} min of audio in {stats['processing_seconds']:.1f}s "
+          f"({audio_seconds / max(stats['processing_seconds'], 1e-9):.0f}x real time)")
+    return 'postprocessed'
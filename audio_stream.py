@@ -0,0 +1,199 @@
+"""
+Constant-memory audio decoding and encoding with ffmpeg pipes.
+
+pydub's ``AudioSegment`` holds a whole decoded episode in memory (about 600 MB per
+hour of 44.1 kHz stereo) and copies it again on export. Here each input file is
+decoded by its own short-lived ffmpeg process into fixed-size blocks of 16-bit PCM,
+and every block is written straight into one long-running ffmpeg MP3 encoder, so
+peak memory is a few blocks regardless of episode length.
+"""
+import os
+import shutil
+import subprocess
+import wave
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from mp3_concat import Mp3Stream
+
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+PCM_BLOCK_BYTES = 256 * 1024
+PROBE_BYTES = 64 * 1024
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_CHANNELS = 2
+
+
+def ffmpeg_path() -> str | None:
+    """
+    Locate the ffmpeg binary.
+
+    Returns:
+        str | None: Path to ffmpeg (``FFMPEG_BINARY``), or None if it is not installed.
+    """
+    return shutil.which(FFMPEG_BINARY)
+
+
+def _require_ffmpeg() -> str:
+    path = ffmpeg_path()
+    if path is None:
+        raise FileNotFoundError(f"{FFMPEG_BINARY} not found; install ffmpeg or set FFMPEG_BINARY")
+    return path
+
+
+def probe_format(path) -> tuple[int, int]:
+    """
+    Read an audio file's sample rate and channel count from its header.
+
+    WAV and MP3 files are probed without ffprobe; other formats get the defaults.
+
+    Args:
+        path: The audio file.
+
+    Returns:
+        tuple[int, int]: Sample rate in Hz and number of channels.
+    """
+    try:
+        with wave.open(str(path), 'rb') as wav:
+            return wav.getframerate(), wav.getnchannels()
+    except (wave.Error, EOFError):
+        pass
+    with open(path, 'rb') as f:
+        head = f.read(PROBE_BYTES)
+    stream = Mp3Stream(head)
+    if stream.sample_rate is not None:
+        return stream.sample_rate, 1 if stream.channel_mode == 3 else 2
+    return DEFAULT_SAMPLE_RATE, DEFAULT_CHANNELS
+
+
+def iter_pcm(path, sample_rate: int, channels: int, block_bytes: int = PCM_BLOCK_BYTES) -> Iterator[bytes]:
+    """
+    Decode an audio file to 16-bit little-endian PCM, block by block.
+
+    Args:
+        path: The audio file (any format ffmpeg reads).
+        sample_rate (int): Output sample rate; ffmpeg resamples if needed.
+        channels (int): Output channel count.
+        block_bytes (int): Size of each yielded block (the last one may be shorter).
+
+    Yields:
+        bytes: Interleaved PCM samples.
+    """
+    process = subprocess.Popen(
+        [_require_ffmpeg(), '-v', 'error', '-nostdin', '-i', str(path), '-f', 's16le', '-ar', str(sample_rate),
+         '-ac', str(channels), 'pipe:1'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finished = False
+    try:
+        while True:
+            block = process.stdout.read(block_bytes)
+            if not block:
+                break
+            yield block
+        finished = True
+    finally:
+        process.stdout.close()
+        if not finished:
+            process.kill()
+        error = process.stderr.read()
+        process.stderr.close()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {path}: {error.decode('utf-8', 'replace').strip()}")
+
+
+class PCMEncoder:
+    """
+    Long-running ffmpeg process encoding PCM written to it into an MP3 file.
+
+    Use as a context manager, or call ``close`` when done.
+
+    Args:
+        output_file: Destination MP3 file.
+        sample_rate (int): Sample rate of the PCM written.
+        channels (int): Channel count of the PCM written.
+        bitrate (str | None): MP3 bitrate, e.g. '192k'; ffmpeg's default if None.
+    """
+
+    def __init__(self, output_file, sample_rate: int, channels: int, bitrate: str | None = None):
+        self.output_file = Path(output_file)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        command = [_require_ffmpeg(), '-v', 'error', '-y', '-f', 's16le', '-ar', str(sample_rate),
+                   '-ac', str(channels), '-i', 'pipe:0', '-codec:a', 'libmp3lame']
+        if bitrate:
+            command += ['-b:a', bitrate]
+        # ffmpeg picks the container from the extension; force MP3 for temporary names
+        command += ['-f', 'mp3', str(self.output_file)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.bytes_written = 0
+
+    def write(self, pcm: bytes) -> None:
+        """
+        Encode a block of interleaved 16-bit PCM.
+
+        Args:
+            pcm (bytes): The samples.
+        """
+        self.process.stdin.write(pcm)
+        self.bytes_written += len(pcm)
+
+    @property
+    def seconds_written(self) -> float:
+        return self.bytes_written / (2 * self.channels * self.sample_rate)
+
+    def close(self) -> None:
+        """
+        Finish encoding and wait for ffmpeg to exit.
+        """
+        if self.process.stdin.closed:
+            return
+        self.process.stdin.close()
+        error = self.process.stderr.read()
+        self.process.stderr.close()
+        self.process.wait()
+        if self.process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.output_file}: "
+                               f"{error.decode('utf-8', 'replace').strip()}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+            return
+        # Let the original error propagate: stop ffmpeg without checking how it exited
+        self.process.kill()
+        try:
+            self.process.stdin.close()
+        except OSError:  # A broken pipe flushing buffered PCM
+            pass
+        self.process.stderr.close()
+        self.process.wait()
+
+
+def stream_concatenate(input_files: Iterable, output_file, bitrate: str | None = None,
+                       sample_rate: int | None = None, channels: int | None = None) -> float:
+    """
+    Join audio files into one MP3 by streaming PCM through a single encoder.
+
+    Args:
+        input_files (Iterable): Audio files in playback order.
+        output_file: Destination MP3 file.
+        bitrate (str | None): Output bitrate, e.g. '192k'.
+        sample_rate (int | None): Output sample rate; the highest among the inputs if None.
+        channels (int | None): Output channel count; the most among the inputs if None.
+
+    Returns:
+        float: Duration of the episode in seconds.
+    """
+    input_files = list(input_files)
+    if sample_rate is None or channels is None:
+        formats = [probe_format(path) for path in input_files]
+        sample_rate = sample_rate or max((rate for rate, _ in formats), default=DEFAULT_SAMPLE_RATE)
+        channels = channels or max((count for _, count in formats), default=DEFAULT_CHANNELS)
+    with PCMEncoder(output_file, sample_rate, channels, bitrate) as encoder:
+        for path in input_files:
+            for block in iter_pcm(path, sample_rate, channels):
+                encoder.write(block)
+    return encoder.seconds_written
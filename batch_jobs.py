@@ -0,0 +1,164 @@
+"""
+Offline batch jobs for bulk chat completions.
+
+Requests are written to a JSONL job file in the OpenAI Batch API format, uploaded,
+and submitted as a batch. The batch is polled until it finishes, and the output is
+matched back to the requests by ``custom_id``. Requests that failed are retried in
+a new, smaller batch on their own.
+
+Any server speaking the Files and Batches endpoints works; ``batch_server.py`` is a
+local stand-in for testing (point ``OPENAI_BASE_URL`` at it).
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+BATCH_DIR = os.getenv('BATCH_DIR', 'output/batches')
+BATCH_POLL_INTERVAL = float(os.getenv('BATCH_POLL_INTERVAL', '30'))
+BATCH_MAX_ATTEMPTS = int(os.getenv('BATCH_MAX_ATTEMPTS', '3'))
+BATCH_COMPLETION_WINDOW = '24h'
+FINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+def chat_request(custom_id: str, model: str, messages: list[dict], **params) -> dict:
+    """
+    Build one line of a chat completions batch job.
+
+    Args:
+        custom_id (str): ID used to match the result back to the request.
+        model (str): The model name.
+        messages (list[dict]): Chat messages.
+        **params: Extra request parameters such as ``response_format``.
+
+    Returns:
+        dict: The batch request line.
+    """
+    return {
+        'custom_id': custom_id,
+        'method': 'POST',
+        'url': '/v1/chat/completions',
+        'body': {'model': model, 'messages': messages, **params},
+    }
+
+
+def write_job_file(requests: list[dict], path: Path) -> Path:
+    """
+    Write batch requests to a JSONL job file.
+
+    Args:
+        requests (list[dict]): Request lines built with ``chat_request``.
+        path (Path): Destination file.
+
+    Returns:
+        Path: The job file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        for request in requests:
+            f.write(json.dumps(request) + '\n')
+    return path
+
+
+def submit_batch(client, job_file: Path) -> str:
+    """
+    Upload a job file and create a batch for it.
+
+    Args:
+        client: The OpenAI client.
+        job_file (Path): JSONL job file.
+
+    Returns:
+        str: The batch ID.
+    """
+    with open(job_file, 'rb') as f:
+        uploaded = client.files.create(file=f, purpose='batch')
+    batch = client.batches.create(input_file_id=uploaded.id, endpoint='/v1/chat/completions',
+                                  completion_window=BATCH_COMPLETION_WINDOW)
+    print(f"Submitted batch {batch.id} ({job_file})")
+    return batch.id
+
+
+def wait_for_batch(client, batch_id: str, poll_interval: float = BATCH_POLL_INTERVAL):
+    """
+    Poll a batch until it reaches a final status.
+
+    Args:
+        client: The OpenAI client.
+        batch_id (str): The batch ID.
+        poll_interval (float): Seconds between polls.
+
+    Returns:
+        The final batch object.
+    """
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINAL_STATUSES:
+            return batch
+        counts = batch.request_counts
+        if counts is not None:
+            print(f"Batch {batch_id}: {batch.status}, {counts.completed}/{counts.total} done, {counts.failed} failed")
+        time.sleep(poll_interval)
+
+
+def _read_jsonl(client, file_id: str | None) -> list[dict]:
+    if not file_id:
+        return []
+    text = client.files.content(file_id).text
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def collect_results(client, batch) -> tuple[dict, dict]:
+    """
+    Download a finished batch's output and error files.
+
+    Args:
+        client: The OpenAI client.
+        batch: The final batch object.
+
+    Returns:
+        tuple[dict, dict]: Response bodies of successful requests, and error descriptions
+        of failed ones, both keyed by ``custom_id``.
+    """
+    results, errors = {}, {}
+    for line in _read_jsonl(client, batch.output_file_id) + _read_jsonl(client, batch.error_file_id):
+        response = line.get('response') or {}
+        if response.get('status_code') == 200 and not line.get('error'):
+            results[line['custom_id']] = response['body']
+        else:
+            errors[line['custom_id']] = line.get('error') or response.get('body')
+    return results, errors
+
+
+def run_batch(client, requests: list[dict], name: str, max_attempts: int = BATCH_MAX_ATTEMPTS,
+              poll_interval: float = BATCH_POLL_INTERVAL, batch_dir: str = BATCH_DIR) -> tuple[dict, dict]:
+    """
+    Run requests as a batch job, retrying failed requests in follow-up batches.
+
+    Args:
+        client: The OpenAI client.
+        requests (list[dict]): Request lines built with ``chat_request``.
+        name (str): Base name for the job files.
+        max_attempts (int): Number of batches to submit before giving up on a request.
+        poll_interval (float): Seconds between polls.
+        batch_dir (str): Directory for job files.
+
+    Returns:
+        tuple[dict, dict]: Response bodies keyed by ``custom_id``, and errors for requests
+        that still failed after the last attempt.
+    """
+    results, errors = {}, {}
+    pending = list(requests)
+    for attempt in range(1, max_attempts + 1):
+        if not pending:
+            break
+        job_file = write_job_file(pending, Path(batch_dir) / f"{name}_attempt{attempt}.jsonl")
+        batch = wait_for_batch(client, submit_batch(client, job_file), poll_interval)
+        batch_results, errors = collect_results(client, batch)
+        results.update(batch_results)
+        # Requests missing from both files (e.g. an expired batch) are retried as well
+        pending = [request for request in pending if request['custom_id'] not in results]
+        for request in pending:
+            errors.setdefault(request['custom_id'], f"batch {batch.id} ended with status {batch.status}")
+        print(f"Batch {batch.id} {batch.status}: {len(batch_results)} succeeded, {len(pending)} to retry")
+    return results, {custom_id: errors[custom_id] for custom_id in errors if custom_id not in results}
@@ -0,0 +1,198 @@
+"""
+Local stand-in for the OpenAI Files, Batches and Chat Completions endpoints.
+
+Useful for exercising batch mode without an API key or cost. Completions are faked:
+summaries are the first words of the article, and JSON responses contain
+placeholder intro/conclusion/title/description fields. A fraction of batch requests
+can be made to fail to exercise retries.
+
+Run: python batch_server.py [--port 8089] [--fail-rate 0.1] [--delay 2]
+Then: OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python generate_summaries_hn.py weekly 30 --batch
+"""
+import argparse
+import email.policy
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_SUMMARY_WORDS = 140
+
+
+def fake_completion(body: dict) -> dict:
+    """
+    Build a fake chat completion for a request body.
+
+    Args:
+        body (dict): Chat completions request body.
+
+    Returns:
+        dict: A chat completion response body.
+    """
+    prompt_text = ' '.join(str(message.get('content', '')) for message in body.get('messages', []))
+    if (body.get('response_format') or {}).get('type') == 'json_object':
+        content = json.dumps({'Introduction': 'Welcome to Hackerpulse.', 'Conclusion': 'Thanks for listening.',
+                              'Title': 'Hackerpulse (local test)', 'Description': 'Generated by batch_server.py.'})
+    else:
+        user_text = body['messages'][-1]['content']
+        article = user_text.split('Content:', 1)[-1]
+        content = ' '.join(article.split()[:FAKE_SUMMARY_WORDS])
+    prompt_tokens = len(prompt_text) // 4
+    completion_tokens = len(content) // 4
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'local'),
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                  'total_tokens': prompt_tokens + completion_tokens},
+    }
+
+
+class BatchServer(ThreadingHTTPServer):
+    """
+    HTTP server holding uploaded files and batches in memory.
+
+    Args:
+        address (tuple): Host and port to bind.
+        fail_rate (float): Probability that a batch request fails.
+        delay (float): Seconds a batch stays in progress before completing.
+    """
+
+    def __init__(self, address: tuple, fail_rate: float = 0.0, delay: float = 1.0):
+        super().__init__(address, _Handler)
+        self.fail_rate = fail_rate
+        self.delay = delay
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.RLock()
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> dict:
+        file_id = f"file-{uuid.uuid4().hex}"
+        meta = {'id': file_id, 'object': 'file', 'bytes': len(content), 'created_at': int(time.time()),
+                'filename': filename, 'purpose': purpose, 'status': 'processed'}
+        with self.lock:
+            self.files[file_id] = (meta, content)
+        return meta
+
+    def create_batch(self, params: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {'id': batch_id, 'object': 'batch', 'endpoint': params['endpoint'], 'errors': None,
+                 'input_file_id': params['input_file_id'], 'completion_window': params['completion_window'],
+                 'status': 'in_progress', 'output_file_id': None, 'error_file_id': None,
+                 'created_at': int(time.time()), 'request_counts': {'total': 0, 'completed': 0, 'failed': 0}}
+        with self.lock:
+            self.batches[batch_id] = batch
+        threading.Thread(target=self._process_batch, args=(batch_id,), daemon=True).start()
+        return batch
+
+    def _process_batch(self, batch_id: str) -> None:
+        time.sleep(self.delay)
+        batch = self.batches[batch_id]
+        _, content = self.files[batch['input_file_id']]
+        outputs, errors = [], []
+        for line in content.decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            line_id = f"batch_req_{uuid.uuid4().hex}"
+            if random.random() < self.fail_rate:
+                errors.append({'id': line_id, 'custom_id': request['custom_id'],
+                               'response': {'status_code': 500, 'request_id': line_id,
+                                            'body': {'error': {'message': 'Simulated failure'}}},
+                               'error': None})
+            else:
+                outputs.append({'id': line_id, 'custom_id': request['custom_id'],
+                                'response': {'status_code': 200, 'request_id': line_id,
+                                             'body': fake_completion(request['body'])},
+                                'error': None})
+        with self.lock:
+            if outputs:
+                batch['output_file_id'] = self.add_file(
+                    ''.join(json.dumps(line) + '\n' for line in outputs).encode('utf-8'), 'output.jsonl',
+                    'batch_output')['id']
+            if errors:
+                batch['error_file_id'] = self.add_file(
+                    ''.join(json.dumps(line) + '\n' for line in errors).encode('utf-8'), 'errors.jsonl',
+                    'batch_output')['id']
+            batch['request_counts'] = {'total': len(outputs) + len(errors), 'completed': len(outputs),
+                                       'failed': len(errors)}
+            batch['status'] = 'completed'
+            batch['completed_at'] = int(time.time())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: BatchServer
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path == '/v1/files':
+            message = BytesParser(policy=email.policy.HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('utf-8') + body)
+            fields, content, filename = {}, b'', 'upload.jsonl'
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                if name == 'file':
+                    content = part.get_payload(decode=True)
+                    filename = part.get_filename() or filename
+                else:
+                    fields[name] = part.get_payload(decode=True).decode('utf-8')
+            self._send_json(self.server.add_file(content, filename, fields.get('purpose', 'batch')))
+        elif self.path == '/v1/batches':
+            self._send_json(self.server.create_batch(json.loads(body)))
+        elif self.path == '/v1/chat/completions':
+            self._send_json(fake_completion(json.loads(body)))
+        else:
+            self._send_json({'error': {'message': f"Unknown path {self.path}"}}, 404)
+
+    def do_GET(self):
+        match = re.fullmatch(r'/v1/(files|batches)/([\w-]+)(/content)?', self.path)
+        if match is None:
+            self._send_json({'error': {'message': f"Unknown path {self.path}"}}, 404)
+            return
+        kind, object_id, content = match.groups()
+        with self.server.lock:
+            if kind == 'batches' and object_id in self.server.batches:
+                self._send_json(self.server.batches[object_id])
+            elif kind == 'files' and object_id in self.server.files:
+                meta, data = self.server.files[object_id]
+                if content:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/octet-stream')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self._send_json(meta)
+            else:
+                self._send_json({'error': {'message': f"No such object {object_id}"}}, 404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI batch endpoints.")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--delay', type=float, default=1.0)
+    args = parser.parse_args()
+    server = BatchServer(('127.0.0.1', args.port), args.fail_rate, args.delay)
+    print(f"Batch stand-in listening on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
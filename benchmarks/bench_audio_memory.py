@@ -0,0 +1,105 @@
+"""
+Measure peak memory of episode assembly across episode lengths.
+
+Each method runs in a fresh child process over one-minute synthetic MP3 chunks and
+reports wall time, peak Python allocations (tracemalloc), peak RSS of the process
+and peak RSS of its ffmpeg children. Methods:
+
+- frames: decode-free frame copy (mp3_concat.concatenate_mp3_frames)
+- stream: PCM streamed through one ffmpeg encoder (audio_stream.stream_concatenate)
+- pydub: the previous in-memory decode/encode (needs ffprobe; skipped otherwise)
+
+Run: python benchmarks/bench_audio_memory.py [minutes ...]
+"""
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from audio_stream import ffmpeg_path, stream_concatenate
+from bench_mp3_concat import FRAMES_PER_MINUTE, synthetic_chunk
+from mp3_concat import concatenate_mp3_frames
+
+DEFAULT_MINUTES = [5, 30, 60]
+
+
+def pydub_concatenate(files: list, output_file: Path) -> None:
+    from pydub import AudioSegment
+
+    segments = [AudioSegment.from_file(path) for path in files]
+    combined = AudioSegment(data=b''.join(segment.raw_data for segment in segments),
+                            sample_width=segments[0].sample_width, frame_rate=segments[0].frame_rate,
+                            channels=segments[0].channels)
+    combined.export(output_file, format="mp3")
+
+
+METHODS = {
+    'frames': concatenate_mp3_frames,
+    'stream': stream_concatenate,
+    'pydub': pydub_concatenate,
+}
+
+
+def _max_rss_bytes(who: int) -> int:
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def run_child(method: str, minutes: int, chunk_file: str, output_file: str) -> None:
+    files = [chunk_file] * minutes
+    tracemalloc.start()
+    start = time.perf_counter()
+    METHODS[method](files, output_file)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({'seconds': elapsed, 'python_peak': peak, 'rss_peak': _max_rss_bytes(resource.RUSAGE_SELF),
+                      'children_rss_peak': _max_rss_bytes(resource.RUSAGE_CHILDREN)}))
+
+
+def measure(method: str, minutes: int, chunk_file: Path, output_file: Path) -> dict | None:
+    result = subprocess.run([sys.executable, __file__, '--child', method, str(minutes), str(chunk_file),
+                             str(output_file)], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"{method} failed for {minutes} min: {result.stderr.strip().splitlines()[-1:]}")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    minutes_list = [int(arg) for arg in sys.argv[1:]] or DEFAULT_MINUTES
+    methods = ['frames']
+    if ffmpeg_path():
+        methods.append('stream')
+    else:
+        print("ffmpeg not found; skipping the streaming encoder")
+    if ffmpeg_path() and shutil.which('ffprobe'):
+        methods.append('pydub')
+    else:
+        print("ffmpeg/ffprobe not found; skipping the pydub path")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunk_file = Path(tmp) / 'chunk.mp3'
+        chunk_file.write_bytes(synthetic_chunk(FRAMES_PER_MINUTE))
+        print(f"{'minutes':>7} {'method':<8} {'seconds':>8} {'python MB':>10} {'RSS MB':>8} {'ffmpeg RSS MB':>14}")
+        for minutes in minutes_list:
+            for method in methods:
+                stats = measure(method, minutes, chunk_file, Path(tmp) / f'{method}.mp3')
+                if stats is None:
+                    continue
+                print(f"{minutes:>7} {method:<8} {stats['seconds']:>8.1f} {stats['python_peak'] / 1e6:>10.1f} "
+                      f"{stats['rss_peak'] / 1e6:>8.1f} {stats['children_rss_peak'] / 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], int(sys.argv[3]), sys.argv[4], sys.argv[5])
+    else:
+        main()
@@ -0,0 +1,97 @@
+"""
+Benchmark NumPy post-processing against the equivalent pydub operations.
+
+Builds an episode of one-minute synthetic chunks (modulated tones at varying levels
+with silence at both ends), then times silence trimming, loudness normalization,
+crossfades and intro/outro bed mixing with ``audio_post.EpisodePostProcessor`` and
+with pydub (``detect_leading_silence``, ``apply_gain``, ``append(crossfade=)``,
+``overlay``). Reported as multiples of real time on one core; no ffmpeg needed.
+
+Run: python benchmarks/bench_audio_post.py [minutes] [--stereo]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Measure one core
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('OPENBLAS_NUM_THREADS', '1')
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from audio_post import AUDIO_CROSSFADE_MS, EpisodePostProcessor, float_to_pcm, prepare_bed
+
+CHUNK_SECONDS = 60
+SILENCE_SECONDS = 0.7
+
+
+def synthetic_chunk(sample_rate: int, channels: int, level: float, rng) -> np.ndarray:
+    t = np.arange(sample_rate * CHUNK_SECONDS, dtype=np.float32) / sample_rate
+    voice = level * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    voice += 0.01 * level * rng.standard_normal(len(t)).astype(np.float32)
+    silence = np.zeros(int(sample_rate * SILENCE_SECONDS), dtype=np.float32)
+    mono = np.concatenate((silence, voice, silence))
+    return np.repeat(mono[:, None], channels, axis=1)
+
+
+def numpy_path(chunks: list, sample_rate: int, channels: int, bed: np.ndarray) -> list[bytes]:
+    processor = EpisodePostProcessor(sample_rate, channels, intro_bed=prepare_bed(bed, sample_rate, 'out'),
+                                     outro_bed=prepare_bed(bed, sample_rate, 'in'))
+    output = [float_to_pcm(processor.add_chunk(chunk)) for chunk in chunks]
+    output.append(float_to_pcm(processor.finish()))
+    return output
+
+
+def pydub_path(chunks: list, sample_rate: int, channels: int, bed: np.ndarray):
+    from pydub import AudioSegment
+    from pydub.silence import detect_leading_silence
+
+    def segment(samples):
+        return AudioSegment(data=float_to_pcm(samples), sample_width=2, frame_rate=sample_rate, channels=channels)
+
+    episode = None
+    for chunk in chunks:
+        audio = segment(chunk)
+        start = detect_leading_silence(audio, silence_threshold=-50)
+        end = len(audio) - detect_leading_silence(audio.reverse(), silence_threshold=-50)
+        audio = audio[start:end]
+        audio = audio.apply_gain(-18 - audio.dBFS)
+        episode = audio if episode is None else episode.append(audio, crossfade=AUDIO_CROSSFADE_MS)
+    bed_segment = segment(bed).apply_gain(-15)
+    episode = episode.overlay(bed_segment.fade_out(2000))
+    episode = episode.overlay(bed_segment.fade_in(2000), position=len(episode) - len(bed_segment))
+    return episode.raw_data
+
+
+def main() -> None:
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 and not sys.argv[1].startswith('--') else 10
+    channels = 2 if '--stereo' in sys.argv else 1
+    sample_rate = 44100 if channels == 2 else 24000
+    rng = np.random.default_rng(0)
+    chunks = [synthetic_chunk(sample_rate, channels, level, rng)
+              for level in rng.uniform(0.05, 0.8, size=minutes)]
+    bed = synthetic_chunk(sample_rate, channels, 0.5, rng)[:sample_rate * 10]
+    audio_seconds = minutes * CHUNK_SECONDS
+    print(f"{minutes} min episode, {sample_rate} Hz, {channels} channel(s)")
+
+    start = time.perf_counter()
+    numpy_path(chunks, sample_rate, channels, bed)
+    numpy_time = time.perf_counter() - start
+    print(f"numpy: {numpy_time:.2f}s ({audio_seconds / numpy_time:.0f}x real time)")
+
+    try:
+        import pydub  # noqa: F401
+    except ImportError:
+        print("pydub not installed; skipping the pydub path")
+        return
+    start = time.perf_counter()
+    pydub_path(chunks, sample_rate, channels, bed)
+    pydub_time = time.perf_counter() - start
+    print(f"pydub: {pydub_time:.2f}s ({audio_seconds / pydub_time:.0f}x real time, "
+          f"{pydub_time / numpy_time:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark the streaming extractor against the BeautifulSoup path.
+
+Runs both extractors over a directory of saved HTML pages and reports time, peak
+Python memory (tracemalloc) and output size per page. Without a corpus directory a
+synthetic corpus of boilerplate-heavy pages of increasing size is generated.
+
+Run: python benchmarks/bench_extract.py [corpus_dir]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from html_extract import extract_text
+
+CHUNK_SIZE = 64 * 1024
+
+
+def extract_bs4(page: bytes) -> str:
+    soup = BeautifulSoup(page, 'html.parser')
+    paragraphs = soup.find_all('p')
+    return ' '.join([para.get_text() for para in paragraphs])
+
+
+def extract_streaming(page: bytes) -> str:
+    chunks = (page[i:i + CHUNK_SIZE] for i in range(0, len(page), CHUNK_SIZE))
+    return extract_text(chunks)
+
+
+def synthetic_page(num_paragraphs: int) -> bytes:
+    nav = ''.join(f'<li><a href="/s/{i}">Section {i}</a></li>' for i in range(200))
+    body = ''.join(
+        f'<p>Paragraph {i} of the article explains the change in detail, with enough words to count '
+        f'as real content and a <a href="/ref/{i}">reference</a>.</p>'
+        f'<div class="share-buttons"><p>Share this on social media</p></div>'
+        for i in range(num_paragraphs))
+    comments = ''.join(f'<p>Comment {i}: great article, thanks for writing it up!</p>' for i in range(num_paragraphs))
+    return (f'<html><head><meta charset="utf-8"><script>{"var x = 1;" * 5000}</script></head>'
+            f'<body><nav><ul>{nav}</ul></nav><article>{body}</article>'
+            f'<section id="comments">{comments}</section><footer><p>Copyright</p></footer></body></html>'
+            ).encode('utf-8')
+
+
+def load_corpus(corpus_dir: str | None) -> list[tuple[str, bytes]]:
+    if corpus_dir is None:
+        return [(f'synthetic-{n}', synthetic_page(n)) for n in (10, 100, 1000, 10000)]
+    pages = []
+    for path in sorted(Path(corpus_dir).glob('**/*.htm*')):
+        pages.append((path.name, path.read_bytes()))
+    return pages
+
+
+def measure(extract, page: bytes) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = extract(page)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(text)
+
+
+def main() -> None:
+    corpus = load_corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"{'page':<30} {'size KB':>9} {'bs4 ms':>9} {'bs4 MB':>8} {'bs4 chars':>10} "
+          f"{'stream ms':>10} {'stream MB':>10} {'stream chars':>13} {'speedup':>8}")
+    tot_bs4 = tot_stream = 0.0
+    for name, page in corpus:
+        bs4_time, bs4_peak, bs4_chars = measure(extract_bs4, page)
+        stream_time, stream_peak, stream_chars = measure(extract_streaming, page)
+        tot_bs4 += bs4_time
+        tot_stream += stream_time
+        print(f"{name[:30]:<30} {len(page) / 1024:>9.0f} {bs4_time * 1000:>9.1f} {bs4_peak / 1e6:>8.1f} "
+              f"{bs4_chars:>10} {stream_time * 1000:>10.1f} {stream_peak / 1e6:>10.1f} {stream_chars:>13} "
+              f"{bs4_time / stream_time:>7.1f}x")
+    print(f"Total: bs4 {tot_bs4:.2f}s, streaming {tot_stream:.2f}s ({tot_bs4 / tot_stream:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark decode-free MP3 concatenation against the pydub decode path.
+
+Builds a synthetic episode of the given length out of one-minute CBR chunks (silent
+MPEG-1 Layer III frames with an ID3v2 tag and a LAME Info frame, like TTS output),
+then times frame concatenation and, if ffmpeg is available, the pydub decode paths.
+
+Run: python benchmarks/bench_mp3_concat.py [minutes] [--decode]
+"""
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from mp3_concat import FrameHeader, Mp3Stream, concatenate_mp3_frames, decode_concatenate
+
+# MPEG-1 Layer III, no CRC, 128 kbps, 44.1 kHz, joint stereo
+FRAME_HEADER = 0xFFFB9044
+FRAMES_PER_MINUTE = 44100 * 60 // 1152
+
+
+def synthetic_chunk(frames: int) -> bytes:
+    header = FrameHeader(FRAME_HEADER)
+    frame = bytearray(header.length)
+    struct.pack_into('>I', frame, 0, FRAME_HEADER)
+    info = bytearray(frame)
+    info[4 + header.side_info_size:4 + header.side_info_size + 4] = b'Info'
+    id3 = b'ID3\x04\x00\x00\x00\x00\x00\x0a' + b'\x00' * 10
+    return id3 + bytes(info) + bytes(frame) * frames
+
+
+def pydub_path(files: list, output_file: Path) -> None:
+    # The original assembly: decode, grow with +=, re-encode
+    from pydub import AudioSegment
+    combined = AudioSegment.empty()
+    for path in files:
+        combined += AudioSegment.from_mp3(path)
+    combined.export(output_file, format="mp3")
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    minutes = int(args[0]) if args else 60
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        chunk = synthetic_chunk(FRAMES_PER_MINUTE)
+        files = []
+        for i in range(minutes):
+            path = tmp / f"chunk_{i:03d}.mp3"
+            path.write_bytes(chunk)
+            files.append(path)
+
+        start = time.perf_counter()
+        assert concatenate_mp3_frames(files, tmp / 'frames.mp3')
+        frames_time = time.perf_counter() - start
+        stream = Mp3Stream((tmp / 'frames.mp3').read_bytes())
+        duration = stream.frames * stream.samples_per_frame / stream.sample_rate
+        print(f"{minutes} x 1 min chunks -> {duration / 60:.1f} min episode, "
+              f"{(tmp / 'frames.mp3').stat().st_size / 1e6:.1f} MB")
+        print(f"frame concatenation: {frames_time:.2f}s")
+
+        if shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None:
+            print("ffmpeg/ffprobe not found; skipping the decode paths")
+            return
+        start = time.perf_counter()
+        decode_concatenate(files, tmp / 'decode.mp3')
+        print(f"decode + single re-encode: {time.perf_counter() - start:.2f}s")
+        if '--decode' in sys.argv:
+            start = time.perf_counter()
+            pydub_path(files, tmp / 'pydub.mp3')
+            print(f"original pydub += path: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
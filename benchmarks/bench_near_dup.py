@@ -0,0 +1,107 @@
+"""
+Benchmark near-duplicate lookups in the MinHash/LSH index.
+
+Fills a temporary index with random signatures, then times lookups of
+near-duplicates (signatures of indexed documents with a share of their values
+replaced, i.e. a known similarity) and of unrelated signatures, reporting recall
+and false matches, and compares them with a linear scan over every signature.
+Signing a real text (a license file, when available) and a lightly edited copy
+is timed too, with the similarity estimated between them and to an unrelated text.
+
+Run: python benchmarks/bench_near_dup.py [documents]
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from near_dup_index import NUM_HASHES, NEAR_DUP_MIN_SIMILARITY, NearDupIndex, minhash, similarity
+
+LOOKUPS = 1000
+INSERT_BATCH = 10_000
+# Similarities of the near-duplicates looked up
+NEAR_SIMILARITIES = (0.9, 0.75, 0.6)
+LICENSES = Path('/usr/share/common-licenses')
+
+
+def sample_texts() -> tuple[str, str]:
+    if (LICENSES / 'GPL-3').exists() and (LICENSES / 'Apache-2.0').exists():
+        return (LICENSES / 'GPL-3').read_text()[:8000], (LICENSES / 'Apache-2.0').read_text()[:8000]
+    rng = random.Random(1)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    return tuple(' '.join(rng.choice(vocabulary) for _ in range(1200)) for _ in range(2))
+
+
+def edit(text: str, rng: random.Random) -> str:
+    # A syndicated copy: new boilerplate around the story and 1% of the words changed
+    words = text.split()
+    for _ in range(len(words) // 100):
+        words[rng.randrange(len(words))] = 'edited'
+    return 'Originally published elsewhere. ' + ' '.join(words) + ' Subscribe to our newsletter.'
+
+
+def near_duplicate(signature: tuple, target: float, rng: random.Random) -> tuple:
+    replaced = set(rng.sample(range(NUM_HASHES), round(NUM_HASHES * (1 - target))))
+    return tuple(rng.getrandbits(32) if i in replaced else value for i, value in enumerate(signature))
+
+
+def timed(func, items) -> tuple[list, list[float]]:
+    results, times = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(func(item))
+        times.append(time.perf_counter() - start)
+    return results, times
+
+
+def report(label: str, times: list[float], results: list) -> None:
+    ordered = sorted(times)
+    found = sum(result is not None for result in results) / len(results)
+    print(f"{label:<26} mean {statistics.mean(times) * 1e6:>8.1f}us  p50 {ordered[len(ordered) // 2] * 1e6:>8.1f}us  "
+          f"p99 {ordered[int(len(ordered) * 0.99)] * 1e6:>8.1f}us  matched {found:>6.1%}")
+
+
+def main() -> None:
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(0)
+
+    text, unrelated = sample_texts()
+    start = time.perf_counter()
+    signature = minhash(text)
+    sign_time = time.perf_counter() - start
+    print(f"Signing a {len(text.split())}-word text: {sign_time * 1000:.1f}ms; edited copy "
+          f"{similarity(signature, minhash(edit(text, rng))):.0%} similar, unrelated text "
+          f"{similarity(signature, minhash(unrelated)):.0%} (match threshold {NEAR_DUP_MIN_SIMILARITY:.0%})")
+
+    signatures = [tuple(rng.getrandbits(32) for _ in range(NUM_HASHES)) for _ in range(documents)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index = NearDupIndex(str(Path(temp_dir) / 'near_dup.sqlite'))
+        start = time.perf_counter()
+        for offset in range(0, documents, INSERT_BATCH):
+            index.add_many([(stored, f"https://example.com/{offset + i}", 'title', 'summary', 'bench')
+                            for i, stored in enumerate(signatures[offset:offset + INSERT_BATCH])])
+        print(f"Indexed {len(index)} documents in {time.perf_counter() - start:.1f}s")
+
+        print(f"{LOOKUPS} lookups each at {documents} documents:")
+        for target in NEAR_SIMILARITIES:
+            queries = [near_duplicate(stored, target, rng) for stored in rng.sample(signatures, LOOKUPS)]
+            results, times = timed(index.lookup, queries)
+            report(f"{target:.0%} similar (index)", times, results)
+        queries = [tuple(rng.getrandbits(32) for _ in range(NUM_HASHES)) for _ in range(LOOKUPS)]
+        results, times = timed(index.lookup, queries)
+        report('unrelated (index)', times, results)
+
+    def scan(query):
+        best = max(signatures, key=lambda stored: similarity(query, stored))
+        return best if similarity(query, best) >= NEAR_DUP_MIN_SIMILARITY else None
+
+    queries = [near_duplicate(stored, NEAR_SIMILARITIES[0], rng) for stored in rng.sample(signatures, 5)]
+    results, times = timed(scan, queries)
+    report(f"{NEAR_SIMILARITIES[0]:.0%} similar (scan)", times, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark the shared text segmentation against the chunkers it replaced.
+
+Times sentence splitting plus chunking on realistic transcripts and on pathological
+inputs (long unpunctuated text, runs of punctuation, dotted tokens, one huge word)
+at two sizes so the growth rate is visible, and reports the longest chunk each
+implementation produces against the provider limit. The shared splitter is also
+timed on input fed in small pieces, as when streaming. NLTK's ``sent_tokenize`` is
+included when NLTK and its punkt data are installed.
+
+Run: python benchmarks/bench_segmentation.py [size_chars]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from text_segmentation import iter_chunks
+
+MAX_CHARS = 1000
+STREAM_PIECE_CHARS = 64
+
+
+def old_regex_chunks(text: str) -> list[str]:
+    # split_into_sentences + chunk_sentences from generate_podcast.py
+    sentences = re.findall(r'[^.!?\s][^.!?]*(?:[.!?](?![\'\"]?\s|$)[^.!?]*)*[.!?]?[\'\"]?(?=\s|$)', text)
+    chunks, current, size = [], [], 0
+    for sentence in sentences:
+        if size + len(sentence) > MAX_CHARS and current:
+            chunks.append(' '.join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence)
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def old_split_text(text: str) -> list[str]:
+    # split_text from generate_podcast_tts.py
+    chunks, current = [], []
+    for word in text.split():
+        if len(' '.join(current)) + len(word) < MAX_CHARS:
+            current.append(word)
+        else:
+            chunks.append(' '.join(current))
+            current = [word]
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def nltk_chunks(text: str) -> list[str]:
+    # chunk_text from generate_podcast_unreal.py
+    from nltk.tokenize import sent_tokenize
+    chunks, current = [], ""
+    for sentence in sent_tokenize(text):
+        if len(current) + len(sentence) <= MAX_CHARS:
+            current += sentence + " "
+        else:
+            chunks.append(current.strip())
+            current = sentence + " "
+    if current:
+        chunks.append(current.strip())
+    return chunks
+
+
+def shared_chunks(text: str) -> list[str]:
+    return list(iter_chunks(text, MAX_CHARS))
+
+
+def shared_streamed_chunks(text: str) -> list[str]:
+    # Same splitter fed in small pieces, as when reading a file or streaming tokens
+    pieces = (text[i:i + STREAM_PIECE_CHARS] for i in range(0, len(text), STREAM_PIECE_CHARS))
+    return list(iter_chunks(pieces, MAX_CHARS))
+
+
+def nltk_available() -> bool:
+    try:
+        from nltk.tokenize import sent_tokenize
+        sent_tokenize("Probe. Sentence.")
+    except Exception:
+        return False
+    return True
+
+
+def inputs(size: int) -> dict[str, str]:
+    prose = ('Dr. Smith said "it works!" The release (v2.1.3) ships today. Is it faster? '
+             'Benchmarks show a 3.5x speedup on e.g. large inputs... Really.\n\n')
+    return {
+        'prose': (prose * (size // len(prose) + 1))[:size],
+        'unpunctuated': ('word ' * (size // 5 + 1))[:size],
+        'punctuation runs': ('wait?!?!... ' * (size // 12 + 1))[:size],
+        'dotted tokens': ('a.b.c.d.e.f.g ' * (size // 14 + 1))[:size],
+        'quotes no space': ('"x."' * (size // 4 + 1))[:size],
+        'one huge word': 'x' * size,
+    }
+
+
+def measure(chunker, text: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    chunks = chunker(text)
+    elapsed = time.perf_counter() - start
+    return elapsed, max((len(chunk) for chunk in chunks), default=0)
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    chunkers = {'shared': shared_chunks, 'shared streamed': shared_streamed_chunks,
+                'old regex': old_regex_chunks, 'old split_text': old_split_text}
+    if nltk_available():
+        chunkers['nltk'] = nltk_chunks
+    print(f"Chunk limit {MAX_CHARS} chars; times in ms at {size} and {size * 2} chars "
+          f"(ratio ~2 means linear growth)")
+    print(f"{'input':<18} {'chunker':<15} {'ms @n':>9} {'ms @2n':>9} {'ratio':>6} {'max chunk':>10}")
+    for name in inputs(size):
+        small, large = inputs(size)[name], inputs(size * 2)[name]
+        for label, chunker in chunkers.items():
+            small_time, _ = measure(chunker, small)
+            large_time, longest = measure(chunker, large)
+            flag = ' over limit' if longest > MAX_CHARS else ''
+            print(f"{name:<18} {label:<15} {small_time * 1000:>9.1f} {large_time * 1000:>9.1f} "
+                  f"{large_time / max(small_time, 1e-9):>6.1f} {longest:>10}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measure script start-up cost with ``python -X importtime``.
+
+Imports each entry-point module in a fresh interpreter (best of several runs),
+reports the cumulative import time and the heaviest top-level imports, and appends
+the results to a JSON-lines history file so start-up time can be tracked across
+commits. Modules whose optional dependencies are missing are reported as failed.
+
+Run: python benchmarks/import_profile.py [--runs 3] [--history output/import_profile.jsonl] [module ...]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULES = ['generate_summaries_hn', 'generate_summaries', 'generate_podcast', 'generate_podcast_unreal',
+                   'generate_podcast_tts', 'pipeline', 'elevenlabs/generate_podcast_elevenlabs']
+TOP_IMPORTS = 5
+
+
+def import_once(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter and parse its import-time report.
+
+    Args:
+        module (str): Module name, or a path relative to the repository root for scripts in subdirectories.
+
+    Returns:
+        dict: 'ok', 'wall_ms', 'import_ms' (cumulative for the module) and 'top' (heaviest direct imports).
+    """
+    directory, _, name = module.rpartition('/')
+    code = f"import sys; sys.path.insert(0, {str(ROOT / directory)!r}); import {name}"
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                            text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        return {'ok': False, 'wall_ms': wall_ms, 'error': error}
+
+    import_us = 0
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, imported = line[len('import time:'):].split('|')
+        depth = (len(imported) - len(imported.lstrip())) // 2
+        if imported.strip() == name and depth == 0:
+            import_us = int(cumulative)
+        elif depth == 1:
+            children.append((int(cumulative), imported.strip()))
+    children.sort(reverse=True)
+    return {'ok': True, 'wall_ms': wall_ms, 'import_ms': import_us / 1000,
+            'top': [[imported, cumulative / 1000] for cumulative, imported in children[:TOP_IMPORTS]]}
+
+
+def profile(module: str, runs: int) -> dict:
+    """
+    Import a module several times and keep the fastest run.
+
+    Args:
+        module (str): Module to profile.
+        runs (int): Number of fresh-interpreter imports.
+
+    Returns:
+        dict: The fastest run's results.
+    """
+    results = [import_once(module) for _ in range(runs)]
+    if not all(result['ok'] for result in results):
+        return next(result for result in results if not result['ok'])
+    return min(results, key=lambda result: result['import_ms'])
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_record(history: Path) -> dict | None:
+    if not history.exists():
+        return None
+    lines = [line for line in history.read_text().splitlines() if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile script start-up import time.")
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--history', default=str(ROOT / 'output' / 'import_profile.jsonl'))
+    args = parser.parse_args()
+
+    history = Path(args.history)
+    previous = previous_record(history)
+    previous_modules = previous['modules'] if previous else {}
+    record = {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'commit': git_commit(),
+              'python': sys.version.split()[0], 'modules': {}}
+
+    print(f"{'module':<42} {'import ms':>10} {'wall ms':>9} {'vs last':>9}  heaviest imports")
+    for module in args.modules:
+        result = profile(module, args.runs)
+        record['modules'][module] = result
+        if not result['ok']:
+            print(f"{module:<42} {'failed':>10} {result['wall_ms']:>9.0f} {'':>9}  {result['error']}")
+            continue
+        last = previous_modules.get(module, {})
+        change = f"{result['import_ms'] - last['import_ms']:+.0f}" if last.get('ok') else ''
+        top = ', '.join(f"{imported} {ms:.0f}" for imported, ms in result['top'])
+        print(f"{module:<42} {result['import_ms']:>10.0f} {result['wall_ms']:>9.0f} {change:>9}  {top}")
+
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"Appended results to {history}")
+
+
+if __name__ == "__main__":
+    main()
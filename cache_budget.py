@@ -0,0 +1,67 @@
+"""
+Size cap bookkeeping shared by the on-disk caches.
+
+Listing a cache directory after every write makes filling the cache quadratic, so
+each cache keeps a running total of the bytes it has written. A full scan (which
+evicts and then reports the exact size) is due only when the running total
+crosses the cap, before the first write, and every ``EVICT_SCAN_EVERY`` writes to
+pick up what other processes sharing the directory have added. Eviction goes down
+to ``EVICT_TARGET_FRACTION`` of the cap, so a full cache does not rescan on every
+write.
+"""
+import threading
+
+EVICT_SCAN_EVERY = 256
+EVICT_TARGET_FRACTION = 0.9
+
+
+class SizeBudget:
+    """
+    Running size of a cache and when it needs a full eviction scan.
+
+    Args:
+        max_bytes (int): The cache's size cap.
+        scan_every (int): Writes after which a scan is due regardless of size.
+        target_fraction (float): Share of the cap that eviction goes down to.
+    """
+
+    def __init__(self, max_bytes: int, scan_every: int = EVICT_SCAN_EVERY,
+                 target_fraction: float = EVICT_TARGET_FRACTION):
+        self.max_bytes = max_bytes
+        self.scan_every = scan_every
+        self.target = max_bytes * target_fraction
+        self._lock = threading.Lock()
+        # Bytes on disk at the last scan plus what was written since (None until the first scan)
+        self._size = None
+        self._writes = 0
+
+    @property
+    def size(self) -> int | None:
+        return self._size
+
+    def added(self, num_bytes: int) -> bool:
+        """
+        Record a write.
+
+        Args:
+            num_bytes (int): Bytes the write added to the cache (negative if it shrank it).
+
+        Returns:
+            bool: Whether the cache should now be scanned and evicted.
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += num_bytes
+            self._writes += 1
+            return self._size is None or self._size > self.max_bytes or self._writes >= self.scan_every
+
+    def scanned(self, total: int) -> None:
+        """
+        Record the exact size found (and left) by a full scan.
+
+        Args:
+            total (int): Bytes in the cache after eviction.
+        """
+        with self._lock:
+            self._size = total
+            self._writes = 0
@@ -0,0 +1,169 @@
+"""
+Process-wide HTTP and OpenAI clients.
+
+Every script should get its HTTP session and OpenAI client from here instead of
+calling ``requests.get`` or ``OpenAI(...)`` directly, so that TCP/TLS connections
+are pooled and kept alive across requests. The OpenAI SDK and httpx are imported
+on first use, since importing them costs more than half a second of start-up.
+"""
+import os
+import threading
+from typing import TYPE_CHECKING
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# Load environment variables from the .env file
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+# Number of distinct hosts to keep pools for, and connections kept alive per host
+HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '32'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+# (connect, read) timeouts in seconds applied when a caller does not pass one
+HTTP_TIMEOUT = (float(os.getenv('HTTP_CONNECT_TIMEOUT', '10')), float(os.getenv('HTTP_READ_TIMEOUT', '60')))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '16'))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '120'))
+
+_lock = threading.Lock()
+_session = None
+_openai_client = None
+_stats = {
+    'http': {'requests': 0, 'new_connections': 0},
+    'openai': {'requests': 0, 'new_connections': 0},
+}
+
+
+def _count(client: str, key: str) -> None:
+    with _lock:
+        _stats[client][key] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count('http', 'new_connections')
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count('http', 'new_connections')
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests and newly opened connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _count('http', 'requests')
+        return super().send(request, **kwargs)
+
+
+class _TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _counting_transport(limits):
+    # httpx transport that counts requests and new connections via httpcore trace events
+    import httpx
+
+    class _CountingTransport(httpx.HTTPTransport):
+        def handle_request(self, request):
+            _count('openai', 'requests')
+            request.extensions = {**request.extensions, 'trace': _trace_connections}
+            return super().handle_request(request)
+
+    return _CountingTransport(limits=limits)
+
+
+def _trace_connections(event_name: str, info: dict) -> None:
+    if event_name == 'connection.connect_tcp.complete':
+        _count('openai', 'new_connections')
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide requests session.
+
+    Returns:
+        requests.Session: Keep-alive session with per-host connection pools and default timeouts.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = _TimeoutSession(HTTP_TIMEOUT)
+            adapter = _PooledAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def get_openai_client() -> 'OpenAI':
+    """
+    Get the process-wide OpenAI client.
+
+    Returns:
+        OpenAI: Client backed by a single pooled httpx connection pool.
+    """
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            import httpx
+            from openai import OpenAI
+
+            limits = httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                  max_keepalive_connections=OPENAI_MAX_CONNECTIONS)
+            http_client = httpx.Client(transport=_counting_transport(limits), timeout=OPENAI_TIMEOUT)
+            _openai_client = OpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+        return _openai_client
+
+
+def connection_stats() -> dict:
+    """
+    Get request and connection counters for the shared clients.
+
+    Returns:
+        dict: Per client, the number of requests, new connections and reused connections.
+    """
+    with _lock:
+        stats = {}
+        for client, counts in _stats.items():
+            stats[client] = {
+                'requests': counts['requests'],
+                'new_connections': counts['new_connections'],
+                'reused_connections': max(counts['requests'] - counts['new_connections'], 0),
+            }
+        return stats
+
+
+def print_connection_stats() -> None:
+    """
+    Print how many requests reused a pooled connection versus opened a new one.
+    """
+    for client, counts in connection_stats().items():
+        if counts['requests']:
+            print(f"{client}: {counts['requests']} requests, "
+                  f"{counts['reused_connections']} reused connections, "
+                  f"{counts['new_connections']} new connections")
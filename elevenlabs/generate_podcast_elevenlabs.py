@@ -1,61 +1,33 @@
 # Great quality voices but only allows 10 min/month on free tier
 
-import requests
-from pydub import AudioSegment
-from pydub.playback import play
 from dotenv import load_dotenv
 import os
 import sys
 import json
+import tempfile
+
+# Shared client layer lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import print_connection_stats
+from text_segmentation import iter_chunks
+from tts_backends import TTS_FALLBACK, chunk_chars, get_backend, synthesize_chunks
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# ElevenLabs API key
-ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
-
-# Function to generate speech from text using ElevenLabs
-def generate_speech_from_text(text: str, voice_id: str) -> bytes:
-    """
-    Generate speech from text using ElevenLabs API.
-
-    Args:
-        text (str): The text to convert to speech.
-        voice_id (str): The voice ID to use for the speech.
-
-    Returns:
-        bytes: The audio data in bytes.
-    """
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-
-    headers = {
-        'xi-api-key': ELEVENLABS_API_KEY,
-        'Content-Type': 'application/json'
-    }
-
-    data = {
-        "text": text,
-        "voice_settings": {
-            "stability": 0.5,
-            "similarity_boost": 0.75
-        }
-    }
-
-    response = requests.post(url, json=data, headers=headers)
-
-    if response.status_code == 200:
-        return response.content
-    else:
-        raise Exception(f"Failed to generate speech: {response.status_code}, {response.text}")
-
 # Function to generate the podcast
-def create_podcast(summary_file: str, voice_id: str) -> None:
+def create_podcast(summary_file: str, voice_id: str, fallback: str | None = TTS_FALLBACK) -> None:
     """
     Generate a podcast from a list of summaries using male and female voices.
 
+    The transcript is split into chunks within the ElevenLabs request limit and
+    synthesized concurrently; slow or failed chunks are hedged on the fallback
+    provider if one is configured.
+
     Args:
         summary: text to include in the podcast.
         voice (str): Voice ID for the voice.
+        fallback (str | None): Provider raced against slow or failed requests.
 
     Returns:
         None
@@ -65,19 +37,29 @@ def create_podcast(summary_file: str, voice_id: str) -> None:
     with open(summary_file, 'r') as f:
         summary= f.read()
 
-    print("Generating podcast...")
-    audio_data = generate_speech_from_text(summary, voice_id)
-    print("Podcast generated successfully!")
+    backend = get_backend('elevenlabs', voice=voice_id)
+    fallback_backend = get_backend(fallback) if fallback else None
 
     # change extension of summary_file to mp3
     audio_file_path = summary_file.replace('.txt', '.mp3')
 
-    with open(audio_file_path, 'wb') as audio_file:
-        audio_file.write(audio_data)
+    print("Generating podcast...")
+    with tempfile.TemporaryDirectory(prefix="elevenlabs_chunks_", ignore_cleanup_errors=True) as temp_dir:
+        chunks = iter_chunks(summary, chunk_chars(backend, fallback_backend))
+        chunk_files = synthesize_chunks(chunks, temp_dir, backend, fallback_backend)
+
+        # numpy is only needed for assembly, so import it here
+        from audio_post import assemble_episode
+
+        mode = assemble_episode(chunk_files, audio_file_path)
+    print(f"Podcast generated successfully! ({mode})")
     print(f"Podcast saved to {audio_file_path}")
+    print_connection_stats()
 
-    # Optionally, play the podcast
-    # play(podcast)
+    # Optionally, play the podcast (pydub is only needed for this, so import it here)
+    # from pydub import AudioSegment
+    # from pydub.playback import play
+    # play(AudioSegment.from_mp3(audio_file_path))
 
 
 def main() -> None:
@@ -1,12 +1,16 @@
 # The purpose of this file is to get the list of voices from the elevenlabs API
 # and print the voice name and voice id
 
-import requests
 import json
+import sys
 
 from dotenv import load_dotenv
 import os
 
+# Shared client layer lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clients import get_session
+
 # Load environment variables from the .env file
 load_dotenv()
 
@@ -18,7 +22,7 @@ headers = {
 "xi-api-key": ELEVENLABS_API_KEY,
 "Content-Type": "application/json"
 }
-response = requests.get(url, headers=headers)
+response = get_session().get(url, headers=headers)
 data = response.json()
 
 for voice in data['voices']:
@@ -0,0 +1,211 @@
+"""
+Progressive episode output.
+
+``ProgressiveEpisodeWriter`` appends each chunk's MP3 frames to the final episode
+file as soon as the chunk and all chunks before it are available, so the start of
+the episode can be played (or uploaded) while later chunks are still being
+synthesized. Chunks may arrive out of order; a reorder buffer holds them until
+their turn. A placeholder Xing frame is written first and filled in with the
+final frame and byte counts on ``close``. If a chunk's format does not match the
+first chunk, progressive appending stops and the episode is re-assembled with a
+decode pass when the writer is closed.
+
+``serve_episode`` exposes the growing file over local HTTP with chunked transfer
+encoding, so a player can start listening seconds after synthesis starts.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from mp3_concat import Mp3Stream, decode_concatenate, xing_frame
+
+STREAM_READ_BYTES = 64 * 1024
+
+
+class ProgressiveEpisodeWriter:
+    """
+    Append MP3 chunks to an episode file in order as they arrive.
+
+    Args:
+        output_file: Destination MP3 file; it is created immediately and grows as chunks arrive.
+    """
+
+    def __init__(self, output_file):
+        self.output_file = Path(output_file)
+        self._file = open(self.output_file, 'wb')
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._next_index = 0
+        self._paths = []
+        self._first = None
+        self._frames = 0
+        self._audio_bytes = 0
+        self.available = 0
+        self.fallback = False
+        self.closed = False
+        self.start_time = time.perf_counter()
+        self.first_audio_seconds = None
+
+    def add(self, index: int, path) -> None:
+        """
+        Hand over a finished chunk; it is appended once every earlier chunk has been.
+
+        Args:
+            index (int): Position of the chunk in the episode, starting at 0.
+            path: The chunk's MP3 file. It must exist until ``close`` returns.
+        """
+        with self._condition:
+            self._pending[index] = Path(path)
+            while self._next_index in self._pending:
+                self._append(self._pending.pop(self._next_index))
+                self._next_index += 1
+            self._condition.notify_all()
+
+    def _append(self, path: Path) -> None:
+        self._paths.append(path)
+        if self.fallback:
+            return
+        stream = Mp3Stream(path.read_bytes())
+        first = self._first or stream
+        if not stream.copyable or (stream.version, stream.sample_rate, stream.channel_mode == 3) != \
+                (first.version, first.sample_rate, first.channel_mode == 3):
+            print(f"{path.name} does not match the episode's MP3 format; "
+                  f"the episode will be re-encoded when rendering finishes")
+            self.fallback = True
+            return
+        if self._first is None:
+            self._first = stream
+            self._file.write(xing_frame(stream))
+        self._file.write(memoryview(stream.data)[stream.start:stream.end])
+        self._file.flush()
+        self._frames += stream.frames
+        self._audio_bytes += stream.end - stream.start
+        self.available = self._file.tell()
+        if self.first_audio_seconds is None:
+            self.first_audio_seconds = time.perf_counter() - self.start_time
+
+    @property
+    def chunks_written(self) -> int:
+        return self._next_index
+
+    def wait_for_data(self, offset: int, timeout: float | None = None) -> bytes:
+        """
+        Read episode bytes past ``offset``, waiting for more to be appended.
+
+        Args:
+            offset (int): Number of bytes the reader already has.
+            timeout (float | None): Longest time to wait for new data.
+
+        Returns:
+            bytes: The next bytes of the episode; empty once the episode is complete
+            (or if the timeout expired without new data).
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.available > offset or self.closed or self.fallback, timeout)
+            available = self.available
+        if available <= offset:
+            return b''
+        with open(self.output_file, 'rb') as f:
+            f.seek(offset)
+            return f.read(min(available - offset, STREAM_READ_BYTES))
+
+    @property
+    def finished(self) -> bool:
+        return self.closed or self.fallback
+
+    def close(self) -> str:
+        """
+        Write the final Xing header, or re-assemble the episode if formats differed.
+
+        Returns:
+            str: 'frames' if the episode was written progressively, 'decode' otherwise.
+        """
+        with self._condition:
+            if self._pending:
+                missing = self._next_index
+                self._file.close()
+                raise ValueError(f"Episode is missing chunk {missing}")
+            if self._first is not None and not self.fallback:
+                self._file.seek(0)
+                self._file.write(xing_frame(self._first, self._frames, self._audio_bytes))
+            self._file.close()
+            if self.fallback:
+                decode_concatenate(self._paths, self.output_file)
+            self.closed = True
+            self._condition.notify_all()
+        return 'decode' if self.fallback else 'frames'
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: 'EpisodeStreamServer'
+
+    def do_GET(self):
+        if self.path not in ('/', '/episode.mp3'):
+            self.send_error(404)
+            return
+        writer = self.server.writer
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        offset = 0
+        try:
+            while True:
+                data = writer.wait_for_data(offset, timeout=1.0)
+                if data:
+                    self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                    self.wfile.flush()
+                    offset += len(data)
+                elif writer.finished and offset >= writer.available:
+                    break
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EpisodeStreamServer(ThreadingHTTPServer):
+    """
+    Local HTTP server streaming a progressively written episode.
+
+    Args:
+        address (tuple): Host and port to bind.
+        writer (ProgressiveEpisodeWriter): The episode being written.
+    """
+
+    # Let listeners receive the end of the episode before the process exits
+    daemon_threads = False
+
+    def __init__(self, address: tuple, writer: ProgressiveEpisodeWriter):
+        super().__init__(address, _StreamHandler)
+        self.writer = writer
+
+    def stop(self) -> None:
+        """
+        Stop accepting listeners and wait for current ones to receive the rest of the episode.
+        """
+        self.shutdown()
+        self.server_close()
+
+
+def serve_episode(writer: ProgressiveEpisodeWriter, port: int, host: str = '127.0.0.1') -> EpisodeStreamServer:
+    """
+    Serve the growing episode at ``http://host:port/episode.mp3`` from a background thread.
+
+    Args:
+        writer (ProgressiveEpisodeWriter): The episode being written.
+        port (int): Port to listen on.
+        host (str): Interface to bind.
+
+    Returns:
+        EpisodeStreamServer: The running server; call ``stop()`` after closing the writer.
+    """
+    server = EpisodeStreamServer((host, port), writer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Streaming episode at http://{host}:{server.server_address[1]}/episode.mp3")
+    return server
@@ -1,130 +1,132 @@
-import sys
+import argparse
+import shutil
 import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 import os
-import re
-from openai import OpenAI
-from pydub import AudioSegment
 from datetime import datetime
+from clients import print_connection_stats
+from text_segmentation import iter_chunks
+from tts_backends import TTS_FALLBACK, TTS_WORKERS, chunk_chars, get_backend, synthesize_chunks
+from tts_ledger import estimate_cost
+from episode_writer import ProgressiveEpisodeWriter, serve_episode
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# OpenAI API key
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-# Initialize OpenAI client
-client = OpenAI()
-
-
-def split_into_sentences(text):
-    # Simple sentence splitting - you might want to use a more sophisticated method
-    return re.findall(r'[^.!?\s][^.!?]*(?:[.!?](?![\'\"]?\s|$)[^.!?]*)*[.!?]?[\'\"]?(?=\s|$)', text)
-
-
-def chunk_sentences(sentences, target_chunk_size=1000):
-    chunks = []
-    current_chunk = []
-    current_size = 0
-
-    for sentence in sentences:
-        sentence_size = len(sentence)
-        if current_size + sentence_size > target_chunk_size and current_chunk:
-            chunks.append(' '.join(current_chunk))
-            current_chunk = []
-            current_size = 0
-        current_chunk.append(sentence)
-        current_size += sentence_size
-
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-
-    return chunks
-
-
-def generate_tts_chunks(input_file, target_chunk_size=1000):
+def generate_tts_chunks(input_file, target_chunk_size=1000, max_workers=TTS_WORKERS, writer=None,
+                        fallback=TTS_FALLBACK, route=None, target_seconds=None):
     # Read the input text file
     with open(input_file, "r") as file:
         text = file.read()
 
-    print(f"Estimated cost: {round(len(text)*15.0/1000000.0, 2)} USD")
-    # Split the text into sentences and then into chunks
-    sentences = split_into_sentences(text)
-    chunks = chunk_sentences(sentences, target_chunk_size)
-
-    # Create a temporary directory for audio chunks
+    # Create a temporary directory for audio chunks. It is only removed once the
+    # episode is saved, so after a crash a rerun reuses the chunks already finished.
     temp_dir = Path("temp_audio_chunks")
     temp_dir.mkdir(exist_ok=True)
+    on_chunk = writer.add if writer is not None else None
+
+    if route:
+        # Spread chunks over several providers by price, remaining quota and speed
+        from tts_router import TTS_TARGET_SECONDS, plan_routes, route_backends, synthesize_routed
+
+        backends = route_backends(route)
+        fallback_backend = get_backend(fallback) if fallback else None
+        chunks = list(iter_chunks(text, min(target_chunk_size, chunk_chars(*backends, fallback_backend))))
+        plan = plan_routes(chunks, backends, target_seconds if target_seconds is not None else TTS_TARGET_SECONDS,
+                           max_workers)
+        plan.print()
+        chunk_files = synthesize_routed(plan, temp_dir, fallback_backend, on_chunk=on_chunk)
+    else:
+        chunk_files = generate_openai_chunks(text, temp_dir, target_chunk_size, max_workers, fallback, on_chunk)
 
-    # select voice based on day of the week
-    # 0 = Monday, 1 = Tuesday, ..., 6 = Sunday
-    voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer", "echo"]
-    dayofweek = datetime.today().weekday()
-    voice = voices[dayofweek]
-
-    # Process each chunk
-    for i, chunk in enumerate(chunks):
-        speech_file_path = temp_dir / f"speech_chunk_{i:03d}.mp3"
-        #print(f"Generating audio for chunk {i+1}/{len(chunks)}")
-
-        with client.audio.speech.with_streaming_response.create(
-            model="tts-1",
-            voice=voice,
-            input=chunk
-        ) as response:
-            # Stream the response content to a file
-            with open(speech_file_path, 'wb') as f:
-                for chunk in response.iter_bytes():
-                    f.write(chunk)
-    
-        #response.stream_to_file(speech_file_path)
+    # Drop chunks left behind by an interrupted run of a longer transcript
+    for stale in set(temp_dir.glob("chunk_*")) - set(chunk_files):
+        stale.unlink()
 
-    #print(f"Generated {len(chunks)} audio files.")
+    if writer is not None and writer.first_audio_seconds is not None:
+        print(f"First audio written after {writer.first_audio_seconds:.1f}s")
     return temp_dir
 
+def generate_openai_chunks(text, temp_dir, target_chunk_size, max_workers, fallback, on_chunk):
+    print(f"Estimated cost: {round(estimate_cost('openai', len(text)), 2)} USD")
+
+    # OpenAI voice selected by day of the week; slow or failed chunks are hedged on
+    # the fallback provider if one is configured
+    backend = get_backend('openai')
+    fallback_backend = get_backend(fallback) if fallback else None
+
+    # Split the text into chunks of whole sentences that both providers accept;
+    # chunks are produced lazily as they are submitted
+    chunks = iter_chunks(text, min(target_chunk_size, chunk_chars(backend, fallback_backend)))
+
+    # Synthesize chunks concurrently; file names carry the chunk index so the
+    # concatenation order does not depend on completion order. With a progressive
+    # writer, each chunk is handed over as soon as it finishes and the writer appends
+    # it once all earlier chunks are in.
+    return synthesize_chunks(chunks, temp_dir, backend, fallback_backend, max_workers, on_chunk=on_chunk)
+
 def concatenate_audio_chunks(chunk_directory, output_file):
-    # Get all MP3 files in the directory
-    audio_chunks = [f for f in os.listdir(chunk_directory) if f.endswith('.mp3')]
+    # Get all chunk files in the directory (a hedged chunk may come from a provider
+    # with a different format)
+    audio_chunks = [f for f in os.listdir(chunk_directory) if f.startswith('chunk_')]
     
     # Sort the chunks
     audio_chunks.sort()
 
-    # Create an empty AudioSegment
-    combined = AudioSegment.empty()
-
-    # Iterate through the audio chunks and append them to the combined audio
-    for chunk_file in audio_chunks:
-        chunk_path = os.path.join(chunk_directory, chunk_file)
-        audio_chunk = AudioSegment.from_mp3(chunk_path)
-        combined += audio_chunk
+    # Level, trim and crossfade the chunks (numpy is imported only here); without
+    # numpy/ffmpeg, join the MP3 frames directly
+    from audio_post import assemble_episode
 
-    # Export the combined audio as a single MP3 file
-    combined.export(output_file, format="mp3")
+    chunk_paths = [os.path.join(chunk_directory, chunk_file) for chunk_file in audio_chunks]
+    mode = assemble_episode(chunk_paths, output_file)
+    print(f"Concatenated {len(chunk_paths)} chunks ({mode})")
     #print(f"Concatenated {len(audio_chunks)} chunks into {output_file}")
 
 # Main execution
 if __name__ == "__main__":
-
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    else:
-        input_file = f'output/hn_transcript_{datetime.now().strftime("%m%d%Y")}.txt'
-
+    parser = argparse.ArgumentParser(description="Generate a podcast episode from a transcript with OpenAI TTS.")
+    parser.add_argument('input_file', nargs='?',
+                        default=f'output/hn_transcript_{datetime.now().strftime("%m%d%Y")}.txt')
+    parser.add_argument('--progressive', action='store_true',
+                        help="Append audio to the episode as chunks finish instead of at the end")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="Stream the episode over local HTTP while it renders (implies --progressive)")
+    parser.add_argument('--fallback', default=TTS_FALLBACK,
+                        help="Provider raced against slow or failed OpenAI requests, e.g. unreal")
+    parser.add_argument('--route', metavar='PROVIDERS',
+                        help="Route chunks across comma-separated providers by cost, quota and speed, "
+                             "e.g. openai,unreal,elevenlabs")
+    parser.add_argument('--target-seconds', type=float,
+                        help="Render time target for --route (default: TTS_TARGET_SECONDS)")
+    args = parser.parse_args()
+
+    input_file = args.input_file
     output_file = input_file.replace('.txt', '.mp3')
     target_chunk_size = 1000  # Target characters per chunk
 
+    writer = None
+    if args.progressive or args.serve is not None:
+        writer = ProgressiveEpisodeWriter(output_file)
+        server = serve_episode(writer, args.serve) if args.serve is not None else None
+
     # Generate TTS chunks
-    temp_dir = generate_tts_chunks(input_file, target_chunk_size)
+    route = args.route.split(',') if args.route else None
+    temp_dir = generate_tts_chunks(input_file, target_chunk_size, writer=writer, fallback=args.fallback,
+                                   route=route, target_seconds=args.target_seconds)
 
     # Concatenate chunks
-    concatenate_audio_chunks(temp_dir, output_file)
+    if writer is not None:
+        mode = writer.close()
+        print(f"Wrote {writer.chunks_written} chunks progressively ({mode})")
+        if server is not None:
+            server.stop()
+    else:
+        concatenate_audio_chunks(temp_dir, output_file)
 
-    # Clean up temporary files
-    for file in temp_dir.glob("*.mp3"):
-        file.unlink()
-    temp_dir.rmdir()
+    # Clean up temporary files (including audio from hedged requests that lost)
+    shutil.rmtree(temp_dir, ignore_errors=True)
 
     print(f"Podcast saved to {output_file}")
-
-    
\ No newline at end of file
+    print_connection_stats()
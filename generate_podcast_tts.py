@@ -1,51 +1,35 @@
-from TTS.api import TTS
 import os
-
-def split_text(text, max_length=1000):
-    words = text.split()
-    chunks = []
-    current_chunk = []
-
-    for word in words:
-        if len(' '.join(current_chunk)) + len(word) < max_length:
-            current_chunk.append(word)
-        else:
-            chunks.append(' '.join(current_chunk))
-            current_chunk = [word]
-    
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    return chunks
-
-# Initialize TTS
-#tts = TTS(model_name="tts_models/en/ljspeech/tacotron2-DDC")
-tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
-
-# Read text from file
-input_file = "hn_transcript_09242024.txt"
-with open(input_file, 'r') as file:
-    text = file.read()
-
-# Split text into chunks
-chunks = split_text(text)
-
-# Generate speech for each chunk
-output_file = "output.mp3"
-for i, chunk in enumerate(chunks):
-    temp_file = f"temp_{i}.mp3"
-    tts.tts_to_file(text=chunk, file_path=temp_file, speaker_wav="samples_en_sample.wav", language="en")
-
-# Combine temporary files (requires pydub)
-from pydub import AudioSegment
-
-combined = AudioSegment.empty()
-for i in range(len(chunks)):
-    temp_file = f"temp_{i}.mp3"
-    audio = AudioSegment.from_mp3(temp_file)
-    combined += audio
-    os.remove(temp_file)
-
-combined.export(output_file, format="mp3")
-
-print(f"Audio saved to {os.path.abspath(output_file)}")
\ No newline at end of file
+import sys
+import tempfile
+from text_segmentation import iter_chunks
+from mp3_concat import decode_concatenate
+from tts_backends import TTS_FALLBACK, chunk_chars, get_backend, synthesize_chunks
+
+SPEAKER_WAV = os.getenv('TTS_SPEAKER_WAV', "samples_en_sample.wav")
+LANGUAGE = "en"
+
+def synthesize_file(input_file, output_file="output.mp3", fallback=TTS_FALLBACK):
+    # Read text from file
+    with open(input_file, 'r') as file:
+        text = file.read()
+
+    # Coqui runs on the warm worker if one is running, else loads the model in-process
+    backend = get_backend('coqui', voice=SPEAKER_WAV, language=LANGUAGE)
+    fallback_backend = get_backend(fallback) if fallback else None
+
+    # Split text into chunks
+    chunks = iter_chunks(text, chunk_chars(backend, fallback_backend))
+
+    # Generate speech for each chunk into a private temporary directory
+    with tempfile.TemporaryDirectory(prefix="tts_chunks_", ignore_cleanup_errors=True) as temp_dir:
+        chunk_files = synthesize_chunks(chunks, temp_dir, backend, fallback_backend)
+
+        # Coqui writes WAV data: decode and encode once rather than probing for MP3 frames
+        decode_concatenate(chunk_files, output_file)
+
+# Main execution
+if __name__ == "__main__":
+    input_file = sys.argv[1] if len(sys.argv) > 1 else "hn_transcript_09242024.txt"
+    output_file = sys.argv[2] if len(sys.argv) > 2 else "output.mp3"
+    synthesize_file(input_file, output_file)
+    print(f"Audio saved to {os.path.abspath(output_file)}")
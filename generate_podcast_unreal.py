@@ -1,72 +1,41 @@
-import time
-import nltk
 import os
 import sys
+import shutil
 from pathlib import Path
-from nltk.tokenize import sent_tokenize
-from unrealspeech import UnrealSpeechAPI, save
-from pydub import AudioSegment
 from dotenv import load_dotenv
 from datetime import datetime
+from text_segmentation import iter_chunks
+from tts_backends import TTS_FALLBACK, chunk_chars, get_backend, synthesize_chunks
 
-nltk.download('punkt', quiet=True)
-nltk.download('punkt_tab', quiet=True)
 # Load environment variables from the .env file
 load_dotenv()
 
-# OpenAI API key
-UNREAL_API_KEY = os.getenv('UNREAL_API_KEY')
-
-# Initialize UnrealSpeechAPI client
-speech_api = UnrealSpeechAPI(UNREAL_API_KEY)
-
 def read_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         return file.read()
 
-def chunk_text(text, max_chars=950):
-    sentences = sent_tokenize(text)
-    chunks = []
-    current_chunk = ""
-    
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) <= max_chars:
-            current_chunk += sentence + " "
-        else:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence + " "
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
-
-def process_chunks(chunks, temp_dir):
-    audio_files = []
-    
-    for i, chunk in enumerate(chunks):
-        try:
-            audio_data = speech_api.stream(
-                text=chunk,
-                voice_id="Liv",  # or Zoe 
-                bitrate="192k"
-            )
-            file_name = temp_dir / f"audio_chunk_{i+1}.mp3"
-            save(audio_data, file_name)
-            audio_files.append(file_name)
-            print(f"Processed and saved chunk {i+1}: {chunk[:30]}...")
-        except Exception as e:
-            print(f"Error processing chunk {i+1}: {str(e)}")
-        time.sleep(1)  # Respect rate limit
-    return audio_files
+def chunk_text(text, max_chars=None, fallback=TTS_FALLBACK):
+    # Chunks of whole sentences within the UnrealSpeech request limit (and the
+    # fallback provider's, if any), produced lazily
+    if max_chars is None:
+        max_chars = chunk_chars(get_backend('unreal'), get_backend(fallback) if fallback else None)
+    return iter_chunks(text, max_chars)
+
+def process_chunks(chunks, temp_dir, fallback=TTS_FALLBACK):
+    # Synthesize chunks concurrently as fast as the UnrealSpeech quota allows. Failed
+    # chunks are retried with backoff (and hedged on the fallback provider if one is
+    # configured); if one still fails the run stops rather than producing an episode
+    # with a hole in it.
+    backend = get_backend('unreal')  # Liv at 192k, or Zoe
+    return synthesize_chunks(chunks, temp_dir, backend, get_backend(fallback) if fallback else None)
 
 def concatenate_audio_files(audio_files, output_file):
-    combined = AudioSegment.empty()
-    for file in audio_files:
-        sound = AudioSegment.from_mp3(file)
-        combined += sound
-    combined.export(output_file, format="mp3")
-    print(f"All audio files concatenated into {output_file}")
+    # Level, trim and crossfade the chunks (numpy is imported only here); without
+    # numpy/ffmpeg, join the MP3 frames directly
+    from audio_post import assemble_episode
+
+    mode = assemble_episode(audio_files, output_file, bitrate="192k")
+    print(f"All audio files concatenated into {output_file} ({mode})")
 
 
 
@@ -93,9 +62,7 @@ if __name__ == "__main__":
     # Concatenate all audio files
     concatenate_audio_files(audio_files, output_file)
 
-    # Clean up temporary files
-    for file in temp_dir.glob("*.mp3"):
-        file.unlink()
-    temp_dir.rmdir()
+    # Clean up temporary files (including audio from hedged requests that lost)
+    shutil.rmtree(temp_dir, ignore_errors=True)
 
     print(f"Podcast saved to {output_file}")
\ No newline at end of file
@@ -1,25 +1,69 @@
 import sys
+import asyncio
 import requests
-from bs4 import BeautifulSoup
 import json
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from dotenv import load_dotenv
-import os
+from urllib.parse import urljoin
+from clients import get_session, get_openai_client, print_connection_stats
+from article_cache import get_article_cache
+from summary_cache import get_summary_cache
+from html_extract import extract_text
+from token_budget import summarize_with_budget, format_stats
+from run_journal import RunJournal, default_run_id
+from urls import canonicalize_url, dedup_key, is_web_url
+from near_dup_index import get_near_dup_index, summarize_once
+
+# Run IDs are '<source>-top_<interval>_<date>', apart from generate_summaries_hn.py's
+# GitHub-issue runs; the journaled wrap has no title or description
+JOURNAL_SCHEMA = 'top-stories/1'
+
+def fetch_hn_item(session: requests.Session, story_id: int) -> dict | None:
+    """
+    Fetch a single Hacker News item.
+
+    Args:
+        session (requests.Session): Session to issue the request with.
+        story_id (int): Hacker News item ID.
+
+    Returns:
+        dict | None: Story title and URL, or None if the item has no URL (e.g. Ask HN posts).
+    """
+    story_url = f'https://hacker-news.firebaseio.com/v0/item/{story_id}.json'
+    story_details = session.get(story_url).json()
+    if not story_details or 'url' not in story_details:
+        return None
+    return {'title': story_details['title'], 'url': story_details['url']}
+
+async def fetch_hn_items_async(story_ids: list[int], concurrency: int = 16) -> list[dict]:
+    """
+    Resolve Hacker News item IDs concurrently over the shared session.
 
-# Load environment variables from the .env file
-load_dotenv()
+    Args:
+        story_ids (list[int]): Item IDs in ranking order.
+        concurrency (int): Maximum number of requests in flight.
+
+    Returns:
+        list[dict]: Stories in the original ranking order, skipping items without a URL.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    session = get_session()
 
-# OpenAI API key
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    async def fetch_one(story_id: int) -> dict | None:
+        async with semaphore:
+            return await asyncio.to_thread(fetch_hn_item, session, story_id)
 
-def fetch_hn_top_stories(num_stories: int, interval: str) -> list[dict]:
+    results = await asyncio.gather(*(fetch_one(story_id) for story_id in story_ids))
+    return [story for story in results if story is not None]
+
+def fetch_hn_top_stories(num_stories: int, interval: str, concurrency: int = 16) -> list[dict]:
     """
     Fetch top stories from Hacker News based on the interval.
 
     Args:
         num_stories (int): Number of top stories to fetch.
         interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
+        concurrency (int): Number of item lookups to run in parallel; 1 fetches sequentially.
 
     Returns:
         list[dict]: List of top stories with their details.
@@ -33,15 +77,18 @@ def fetch_hn_top_stories(num_stories: int, interval: str) -> list[dict]:
     else:
         raise ValueError("Unsupported interval. Use 'daily', 'weekly', or 'monthly'.")
     
-    response = requests.get(url)
+    response = get_session().get(url)
     top_stories = response.json()[:num_stories]
-    stories = []
 
+    if concurrency > 1:
+        return asyncio.run(fetch_hn_items_async(top_stories, concurrency))
+
+    stories = []
+    session = get_session()
     for story_id in top_stories:
-        story_url = f'https://hacker-news.firebaseio.com/v0/item/{story_id}.json'
-        story_details = requests.get(story_url).json()
-        story = {'title': story_details['title'], 'url': story_details['url']}
-        stories.append(story)
+        story = fetch_hn_item(session, story_id)
+        if story is not None:
+            stories.append(story)
 
     return stories
 
@@ -65,12 +112,16 @@ def fetch_bb_top_stories(num_stories: int, interval: str) -> list[dict]:
     else:
         raise ValueError("Unsupported interval. Use 'daily', 'weekly', or 'monthly'.")
     
-    response = requests.get(url)
+    # Only this source needs an HTML parser; keep bs4 out of start-up for the others
+    from bs4 import BeautifulSoup
+
+    response = get_session().get(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     stories = []
 
     for item in soup.select('.gs-c-promo-heading__title')[:num_stories]:
-        stories.append({'title': item.get_text(), 'url': item.find_parent('a')['href']})
+        # Links on the page are relative; resolve them so they can be fetched and merged
+        stories.append({'title': item.get_text(), 'url': urljoin(url, item.find_parent('a')['href'])})
 
     return stories
 
@@ -94,7 +145,7 @@ def fetch_ph_top_stories(num_stories: int, interval: str) -> list[dict]:
     else:
         raise ValueError("Unsupported interval. Use 'daily', 'weekly', or 'monthly'.'")
     
-    response = requests.get(url)
+    response = get_session().get(url)
     posts = response.json()['posts'][:num_stories]
     stories = [{'title': post['name'], 'url': post['discussion_url']} for post in posts]
     return stories
@@ -119,7 +170,7 @@ def fetch_gh_top_stories(num_stories: int, interval: str) -> list[dict]:
     else:
         raise ValueError("Unsupported interval. Use 'daily', 'weekly', or 'monthly'.'")
     
-    response = requests.get(url)
+    response = get_session().get(url)
     repos = response.json()['items'][:num_stories]
     stories = [{'title': repo['name'], 'url': repo['html_url']} for repo in repos]
     return stories
@@ -144,9 +195,10 @@ def fetch_lb_top_stories(num_stories: int, interval: str) -> list[dict]:
     else:
         raise ValueError("Unsupported interval. Use 'daily', 'weekly', or 'monthly'.")
     
-    response = requests.get(url)
+    response = get_session().get(url)
     posts = response.json()[:num_stories]
-    stories = [{'title': post['title'], 'url': post['url']} for post in posts]
+    # Text posts have no link; their discussion page holds the text
+    stories = [{'title': post['title'], 'url': post.get('url') or post.get('comments_url')} for post in posts]
     return stories
 
 
@@ -161,22 +213,27 @@ def summarize_content(title: str, url: str, content: str) -> str:
         str: The summarized content.
     """
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = get_openai_client()
 
     prompt = "Summarize the following content in less than 140 words in a style suitable for a hackernews podcast."
-    content = f"Title:{title}\nURL:{url}\nContent:{content}"
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # Replace with the specific model you want to use
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": content}
-        ]
-    )
-    summary = response.choices[0].message.content
+    header = f"Title:{title}\nURL:{url}\n"
+    model = "gpt-4o-mini"  # Replace with the specific model you want to use
+
+    # Reuse a previous summary of the same content, prompt and model at zero cost
+    summary_cache = get_summary_cache()
+    cache_key = f"{header}Content:{content}"
+    cached_summary = summary_cache.get(cache_key, prompt, model)
+    if cached_summary is not None:
+        return {'Title': title, 'URL': url, 'Summary': cached_summary}, 0.0
+
+    # Truncate or map-reduce articles that do not fit the token budget
+    summary, stats = summarize_with_budget(client, model, prompt, header, content)
+    print(format_stats(title, stats))
     # Calculate tokens and estimate cost
-    tokens_used = response.usage.total_tokens
+    tokens_used = stats['total_tokens']
     cost_per_1M_tokens = 0.15
     estimated_cost = (tokens_used / 1000000) * cost_per_1M_tokens
+    summary_cache.put(cache_key, prompt, model, summary, estimated_cost)
     summary = {'Title': title, 'URL': url, 'Summary': summary}
     print(summary, estimated_cost)
     return summary, estimated_cost
@@ -191,24 +248,23 @@ def extract_summary(title: str, url: str) -> str:
     Returns:
         str: The extracted summary.
     """
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    paragraphs = soup.find_all('p')
-    content = ' '.join([para.get_text() for para in paragraphs])
+    content = extract_text(get_article_cache().iter_fetch(url))
     summary, cost = summarize_content(title, url, content)
     return summary, cost
 
-def add_intro_and_conclusion(summaries: list[str]) -> str:
+def add_intro_and_conclusion(summaries: list[str], journal: RunJournal | None = None) -> str:
     """
     Add an introduction and conclusion to the list of summaries using an LLM.
 
     Args:
         summaries (list[str]): List of summaries.
+        journal (RunJournal | None): Run journal; the introduction and conclusion are read from
+            it if present and added to it otherwise.
 
     Returns:
         str: The combined text with introduction and conclusion.
     """
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = get_openai_client()
     intro_prompt = """Create a brief introduction for the following summaries in a style suitable for a podcast. 
     The name of the podcast is Hackerpulse. The name of the narrator is Data.\n\n"""
     conclu_prompt = """Create a brief conclusion for the following summaries in a style suitable for a podcast. 
@@ -220,48 +276,46 @@ def add_intro_and_conclusion(summaries: list[str]) -> str:
     for summary in summaries:
         content += f"{summary['Summary']}\n\n"
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # Replace with the specific model you want to use
-        messages=[
-            {"role": "system", "content": intro_prompt},
-            {"role": "user", "content": content}
-        ]
-    )
-    intro_text = response.choices[0].message.content
-    # Calculate tokens and estimate cost
-    tokens_used = response.usage.total_tokens
-    estimated_cost_intro = (tokens_used / 1000000) * cost_per_1M_tokens
-
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # Replace with the specific model you want to use
-        messages=[
-            {"role": "system", "content": conclu_prompt},
-            {"role": "user", "content": content}
-        ]
-    )
-    conclu_text = response.choices[0].message.content
-    # Calculate tokens and estimate cost
-    tokens_used = response.usage.total_tokens
-    estimated_cost_conclu = (tokens_used / 1000000) * cost_per_1M_tokens
-
-    estimated_cost = estimated_cost_intro + estimated_cost_conclu
+    def complete(prompt):
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",  # Replace with the specific model you want to use
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": content}
+            ]
+        )
+        # Calculate tokens and estimate cost
+        tokens_used = response.usage.total_tokens
+        return response.choices[0].message.content, (tokens_used / 1000000) * cost_per_1M_tokens
+
+    def generate():
+        # The introduction and conclusion do not depend on each other; request both at once
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            intro = executor.submit(complete, intro_prompt)
+            conclu = executor.submit(complete, conclu_prompt)
+            intro_text, estimated_cost_intro = intro.result()
+            conclu_text, estimated_cost_conclu = conclu.result()
+        return {'intro': intro_text, 'conclusion': conclu_text, 'cost': estimated_cost_intro + estimated_cost_conclu}
+
+    wrap = journal.step('wrap', generate) if journal is not None else generate()
+    intro_text, conclu_text, estimated_cost = wrap['intro'], wrap['conclusion'], wrap['cost']
 
     combined_text = f"{intro_text}\n\n{content}\n\n{conclu_text}"
     print(combined_text, estimated_cost)
     return combined_text, estimated_cost
     
     
-def create_summaries(source: str, interval: str, num_stories: int) -> str:
+def fetch_top_stories(source: str, num_stories: int, interval: str) -> list[dict]:
     """
-    Create summaries for a given source and interval.
+    Fetch the top stories of one source.
 
     Args:
         source (str): The source to fetch stories from ('hn', 'bb', 'ph', 'gh', 'lb').
-        interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
         num_stories (int): Number of top stories to fetch.
+        interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
 
     Returns:
-        None
+        list[dict]: Stories with 'title' and 'url'.
     """
     if source == 'hn':
         stories = fetch_hn_top_stories(num_stories, interval)
@@ -275,16 +329,161 @@ def create_summaries(source: str, interval: str, num_stories: int) -> str:
         stories = fetch_lb_top_stories(num_stories, interval)
     else:
         raise ValueError("Unsupported source. Use 'hn' for Hacker News, 'bb' for BBC, 'ph' for Product Hunt, 'gh' for GitHub, or 'lb' for Lobsters.")
+    return stories
+
+
+def fetch_sources(sources: list[str], num_stories: int, interval: str) -> dict[str, list[dict]]:
+    """
+    Fetch the top stories of several sources concurrently.
+
+    A source that fails is reported and left out, unless every source fails.
+
+    Args:
+        sources (list[str]): Sources to fetch ('hn', 'bb', 'ph', 'gh', 'lb').
+        num_stories (int): Number of top stories to fetch per source.
+        interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
+
+    Returns:
+        dict[str, list[dict]]: Stories per source, in the order the sources were given.
+    """
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        futures = {source: executor.submit(fetch_top_stories, source, num_stories, interval) for source in sources}
+    stories_by_source = {}
+    for source, future in futures.items():
+        try:
+            stories_by_source[source] = future.result()
+        except Exception as e:
+            print(f"Fetching top stories from '{source}' failed: {e}")
+    if not stories_by_source:
+        raise RuntimeError(f"Fetching top stories failed for every source: {', '.join(sources)}")
+    return stories_by_source
+
+
+def merge_stories(stories_by_source: dict[str, list[dict]]) -> list[dict]:
+    """
+    Merge the stories of several sources, keeping one story per article.
+
+    Stories are interleaved by rank (every source's first story, then every
+    source's second, ...) so no source crowds out the others, and links to the same
+    article (by ``dedup_key``) are merged into the first occurrence. Each merged
+    story lists every source that linked to it under 'sources'. Stories without an
+    absolute http(s) URL are left out.
+
+    Args:
+        stories_by_source (dict[str, list[dict]]): Stories per source in ranking order.
+
+    Returns:
+        list[dict]: Unique stories with 'title', 'url' (canonicalized) and 'sources'.
+    """
+    merged = {}
+    depth = max((len(stories) for stories in stories_by_source.values()), default=0)
+    for rank in range(depth):
+        for source, stories in stories_by_source.items():
+            if rank >= len(stories):
+                continue
+            story = stories[rank]
+            if not is_web_url(story.get('url')):
+                # Empty or relative links would all collide on one key
+                print(f"Skipping '{story['title']}' from '{source}': no absolute URL ({story.get('url')!r})")
+                continue
+            key = dedup_key(story['url'])
+            if key in merged:
+                merged[key]['sources'].append(source)
+            else:
+                merged[key] = {'title': story['title'], 'url': canonicalize_url(story['url']), 'sources': [source]}
+    return list(merged.values())
+
+
+def print_dedup_stats(stories: list[dict], summary_cost: float) -> None:
+    """
+    Print how much work merging duplicate links across sources saved.
+
+    Args:
+        stories (list[dict]): Merged stories from ``merge_stories``.
+        summary_cost (float): Total cost of summarizing the unique stories.
+    """
+    links = sum(len(story['sources']) for story in stories)
+    duplicates = links - len(stories)
+    per_source = {}
+    for story in stories:
+        for source in story['sources']:
+            per_source[source] = per_source.get(source, 0) + 1
+    counts = ', '.join(f"{source}: {count}" for source, count in per_source.items())
+    saved = duplicates * summary_cost / len(stories) if stories else 0.0
+    print(f"Dedup: {links} links ({counts}) -> {len(stories)} unique articles; "
+          f"skipped {duplicates} article fetches and {duplicates} summaries (~${saved:.4f})")
+    for story in stories:
+        if len(story['sources']) > 1:
+            print(f"  {story['title']}: {', '.join(story['sources'])}")
+
+
+def create_summaries(source: str, interval: str, num_stories: int, run_id: str | None = None,
+                     fresh: bool = False) -> str:
+    """
+    Create summaries for a given source and interval.
+
+    Every completed step is saved in a run journal, so after a failure a rerun with
+    the same run ID continues where the previous one stopped. Several comma-separated
+    sources (e.g. 'hn,lb,gh') are fetched concurrently and merged, so an article
+    linked from more than one source is fetched and summarized once.
+
+    Args:
+        source (str): The source to fetch stories from ('hn', 'bb', 'ph', 'gh', 'lb'), or several
+            separated by commas.
+        interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
+        num_stories (int): Number of top stories to fetch per source.
+        run_id (str | None): Run to resume; defaults to today's run for this source and interval.
+        fresh (bool): Ignore anything journaled under the run ID.
+
+    Returns:
+        None
+    """
+    sources = [name.strip() for name in source.split(',') if name.strip()]
+    multi_source = len(sources) > 1
+    # Output files and run IDs use e.g. 'hn+lb' for a merged run
+    source = '+'.join(sources)
+    journal = RunJournal(run_id or default_run_id(f"{source}-top", interval), fresh=fresh,
+                         schema=JOURNAL_SCHEMA)
+    if multi_source:
+        stories = journal.step('stories', lambda: merge_stories(fetch_sources(sources, num_stories, interval)))
+    else:
+        stories = journal.step('stories', lambda: fetch_top_stories(source, num_stories, interval))
 
     #print(stories)
     summaries = []
     tot_cost = 0
-    for story in stories:
-        summary, cost = extract_summary(story['title'], story['url'])
-        summaries.append(summary)
-        tot_cost += cost
-
-    combined_text, cost = add_intro_and_conclusion(summaries)
+    failed = []
+    for i, story in enumerate(stories):
+        def summarize():
+            article = journal.step(f"articles/{i:03d}",
+                                   lambda: {'content': extract_text(get_article_cache().iter_fetch(story['url']))})
+            # Stories covered in a recent episode under another URL or title are reused or skipped
+            summary, cost = summarize_once(story['title'], story['url'], article['content'], summarize_content,
+                                           journal.run_id)
+            return {'summary': summary, 'cost': cost}
+
+        # Keep going after a failure so the rerun has as little left to do as possible
+        try:
+            result = journal.step(f"summaries/{i:03d}", summarize)
+        except Exception as e:
+            print(f"Summarizing '{story['title']}' failed: {e}")
+            failed.append(i + 1)
+            continue
+        if result['summary'] is not None:
+            summaries.append(result['summary'])
+        tot_cost += result['cost']
+    if failed:
+        journal.print_summary()
+        raise RuntimeError(f"Summarizing stories {failed} failed; rerun with --run-id {journal.run_id} to resume")
+    if multi_source:
+        print_dedup_stats(stories, tot_cost)
+
+    if not summaries:
+        print("Every story was already covered in a recent episode; nothing to publish")
+        journal.print_summary()
+        get_near_dup_index().print_stats()
+        return
+    combined_text, cost = add_intro_and_conclusion(summaries, journal)
     tot_cost += cost
 
     transcript_file = f'{source}_transcript_{datetime.now().strftime("%m%d%Y")}.txt'
@@ -299,6 +498,11 @@ def create_summaries(source: str, interval: str, num_stories: int) -> str:
 
     print(f"JSON summaries written to {summary_file}")        
     print(f"Total estimated cost: ${tot_cost:.4f}")
+    journal.print_summary()
+    get_summary_cache().print_stats()
+    get_near_dup_index().print_stats()
+    get_article_cache().print_stats()
+    print_connection_stats()
 
 if __name__ == "__main__":
     """
@@ -310,7 +514,10 @@ if __name__ == "__main__":
     Returns:
         None
     """
+    # One source, or several separated by commas (e.g. hn,lb,gh) to fetch concurrently and merge
     source = sys.argv[1]
     interval = sys.argv[2]
     num_stories = int(sys.argv[3])
-    create_summaries(source, interval, num_stories)
+    # Optional: --run-id ID to resume another run, --fresh to start over
+    run_id = sys.argv[sys.argv.index('--run-id') + 1] if '--run-id' in sys.argv else None
+    create_summaries(source, interval, num_stories, run_id, fresh='--fresh' in sys.argv)
@@ -1,20 +1,40 @@
-import sys
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
-from openai import OpenAI
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+from clients import get_session, get_openai_client, print_connection_stats
+from article_cache import get_article_cache
+from summary_cache import get_summary_cache
+from html_extract import extract_text
+from token_budget import summarize_with_budget, format_stats, truncate_to_tokens, stream_completion, SUMMARY_INPUT_TOKENS
+from batch_jobs import chat_request, run_batch
+from run_journal import RunJournal, default_run_id
+from near_dup_index import check_covered, first_similar, get_near_dup_index, record_summary, summarize_once
+from urls import dedup_key, is_web_url
 
 # Load environment variables from the .env file
 load_dotenv()
 
-# OpenAI API key
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 GITHUB_API_KEY = os.getenv('GITHUB_API_KEY')
 
+SUMMARY_PROMPT = "Summarize the following content in less than 140 words in a style suitable for a hackernews podcast. Do not start with 'in this episode' or 'in todays episode'."
+SUMMARY_MODEL = "gpt-4o-mini"  # Replace with the specific model you want to use
+# Attempts at getting valid JSON for the introduction and conclusion
+WRAP_ATTEMPTS = 3
+WRAP_KEYS = ('intro', 'conclusion', 'title', 'description', 'cost')
+# Stories come from the hackernews-daily GitHub issues; generate_summaries.py journals
+# Firebase top stories (and a shorter wrap) under its own names
+RUN_SOURCE = 'hn-issues'
+JOURNAL_SCHEMA = 'hn-issues/1'
+# Days of daily summaries a weekly rollup draws from
+ROLLUP_DAYS = int(os.getenv('ROLLUP_DAYS', '7'))
+
 
 def fetch_hn_top_stories(num_stories: int, interval: str) -> list[dict]:
      
@@ -31,7 +51,7 @@ def fetch_hn_top_stories(num_stories: int, interval: str) -> list[dict]:
         "X-GitHub-Api-Version": "2022-11-28"
     }
     
-    response = requests.get(url, headers=headers)
+    response = get_session().get(url, headers=headers)
     issue = response.json()
     issue_text = issue[0]["body"]
 
@@ -53,33 +73,42 @@ def fetch_hn_top_stories(num_stories: int, interval: str) -> list[dict]:
     return issues[:num_stories]
 
 
-def summarize_content(title: str, url: str, content: str) -> str:
+def summarize_content(title: str, url: str, content: str, on_text: Callable[[str], None] | None = None) -> str:
     """
     Summarize the given content using an LLM.
 
     Args:
         content (str): The content to summarize.
+        on_text (callable | None): If given, the summary is streamed and this is called with
+            each piece of it as it arrives (a cached summary is passed in one piece).
 
     Returns:
         str: The summarized content.
     """
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = get_openai_client()
 
-    prompt = "Summarize the following content in less than 140 words in a style suitable for a hackernews podcast. Do not start with 'in this episode' or 'in todays episode'."
-    content = f"Title:{title}\nURL:{url}\nContent:{content}"
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # Replace with the specific model you want to use
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": content}
-        ]
-    )
-    summary = response.choices[0].message.content
+    prompt = SUMMARY_PROMPT
+    header = f"Title:{title}\nURL:{url}\n"
+    model = SUMMARY_MODEL
+
+    # Reuse a previous summary of the same content, prompt and model at zero cost
+    summary_cache = get_summary_cache()
+    cache_key = f"{header}Content:{content}"
+    cached_summary = summary_cache.get(cache_key, prompt, model)
+    if cached_summary is not None:
+        if on_text is not None:
+            on_text(cached_summary)
+        return {'Title': title, 'URL': url, 'Summary': cached_summary}, 0.0
+
+    # Truncate or map-reduce articles that do not fit the token budget
+    summary, stats = summarize_with_budget(client, model, prompt, header, content, on_text=on_text)
+    print(format_stats(title, stats))
     # Calculate tokens and estimate cost
-    tokens_used = response.usage.total_tokens
+    tokens_used = stats['total_tokens']
     cost_per_1M_tokens = 0.15
     estimated_cost = (tokens_used / 1000000) * cost_per_1M_tokens
+    summary_cache.put(cache_key, prompt, model, summary, estimated_cost)
     summary = {'Title': title, 'URL': url, 'Summary': summary}
     #print(summary, estimated_cost)
     return summary, estimated_cost
@@ -95,25 +124,162 @@ def extract_summary(title: str, url: str) -> str:
     Returns:
         str: The extracted summary.
     """
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    paragraphs = soup.find_all('p')
-    content = ' '.join([para.get_text() for para in paragraphs])
+    content = extract_text(get_article_cache().iter_fetch(url))
     summary, cost = summarize_content(title, url, content)
     return summary, cost
 
 
-def add_intro_and_conclusion(summaries: list[str], interval: int) -> str:
+def journaled_article(journal: RunJournal, rank: int, story: dict) -> str:
     """
-    Add an introduction and conclusion to the list of summaries using an LLM.
+    Extract a story's article text, or read it from the run journal.
 
     Args:
-        summaries (list[str]): List of summaries.
+        journal (RunJournal): The run's journal.
+        rank (int): Position of the story, starting at 0.
+        story (dict): Story with 'title' and 'url'.
+
+    Returns:
+        str: The article text.
+    """
+    article = journal.step(f"articles/{rank:03d}",
+                           lambda: {'content': extract_text(get_article_cache().iter_fetch(story['url']))})
+    return article['content']
+
+
+def journaled_summary(journal: RunJournal, rank: int, story: dict) -> tuple[dict, float]:
+    """
+    Summarize a story, or read its summary from the run journal.
+
+    The article text and the summary are journaled separately, so a failed
+    summary call does not download the article again on the rerun. A story
+    already covered in a recent episode is reused or skipped (see ``near_dup_index``).
+
+    Args:
+        journal (RunJournal): The run's journal.
+        rank (int): Position of the story, starting at 0.
+        story (dict): Story with 'title' and 'url'.
+
+    Returns:
+        tuple[dict | None, float]: The summary (None if the story is skipped) and its estimated cost.
+    """
+    def summarize():
+        content = journaled_article(journal, rank, story)
+        summary, cost = summarize_once(story['title'], story['url'], content, summarize_content, journal.run_id)
+        return {'summary': summary, 'cost': cost}
+
+    result = journal.step(f"summaries/{rank:03d}", summarize)
+    return result['summary'], result['cost']
+
+
+def summarize_stories_batch(stories: list[dict], journal: RunJournal | None = None) -> tuple[list[dict], float]:
+    """
+    Summarize stories through an offline batch job instead of one call per story.
+
+    Cached summaries are reused and stories covered in a recent episode are reused or
+    skipped (see ``near_dup_index``); the rest are submitted as one batch, in which a
+    second copy of a story already queued is left out. Requests that still fail after the batch retries are summarized directly.
+
+    Args:
+        stories (list[dict]): Stories with 'title' and 'url'.
+        journal (RunJournal | None): Run journal; stories it already has summaries for are skipped,
+            and new summaries are added to it.
 
     Returns:
-        str: The combined text with introduction and conclusion.
+        tuple[list[dict], float]: Summaries in story order (without skipped stories) and the estimated cost.
     """
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = get_openai_client()
+    summary_cache = get_summary_cache()
+    cost_per_1M_tokens = 0.075  # Batch requests are billed at half price
+    run_id = journal.run_id if journal is not None else None
+    summaries = [None] * len(stories)
+    tot_cost = 0
+    requests = []
+    pending = {}
+
+    for i, story in enumerate(stories):
+        journaled = journal.get(f"summaries/{i:03d}") if journal is not None else None
+        if journaled is not None:
+            summaries[i] = journaled['summary']
+            tot_cost += journaled['cost']
+            continue
+        if journal is not None:
+            content = journaled_article(journal, i, story)
+        else:
+            content = extract_text(get_article_cache().iter_fetch(story['url']))
+        signature, covered, summary = check_covered(story['title'], story['url'], content, run_id)
+        if covered:
+            summaries[i] = summary
+            if journal is not None:
+                journal.put(f"summaries/{i:03d}", {'summary': summary, 'cost': 0.0})
+            continue
+        header = f"Title:{story['title']}\nURL:{story['url']}\n"
+        cache_key = f"{header}Content:{content}"
+        cached_summary = summary_cache.get(cache_key, SUMMARY_PROMPT, SUMMARY_MODEL)
+        if cached_summary is not None:
+            summaries[i] = {'Title': story['title'], 'URL': story['url'], 'Summary': cached_summary}
+            record_summary(signature, story['title'], story['url'], cached_summary, run_id)
+            if journal is not None:
+                journal.put(f"summaries/{i:03d}", {'summary': summaries[i], 'cost': 0.0})
+            continue
+        # Queued stories are indexed only once the batch returns, so compare against them directly
+        queued = list(pending.values())
+        duplicate = first_similar(signature, [item[4] for item in queued])
+        if duplicate is not None:
+            print(f"'{story['title']}' is the same story as '{queued[duplicate][1]['title']}' in this batch; "
+                  f"skipping it")
+            if journal is not None:
+                journal.put(f"summaries/{i:03d}", {'summary': None, 'cost': 0.0})
+            continue
+
+        # A batch request is a single call, so long articles are truncated rather than map-reduced
+        content_in_budget = truncate_to_tokens(content, SUMMARY_INPUT_TOKENS, SUMMARY_MODEL)
+        custom_id = f"story-{i:03d}"
+        requests.append(chat_request(custom_id, SUMMARY_MODEL, [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"{header}Content:{content_in_budget}"}
+        ]))
+        pending[custom_id] = (i, story, content, cache_key, signature)
+
+    if requests:
+        results, errors = run_batch(client, requests, f"hn_{datetime.now().strftime('%m%d%Y_%H%M%S')}")
+        for custom_id, (i, story, content, cache_key, signature) in pending.items():
+            if custom_id not in results:
+                print(f"Batch request for '{story['title']}' failed ({errors.get(custom_id)}); summarizing directly")
+                summaries[i], cost = summarize_content(story['title'], story['url'], content)
+                record_summary(signature, story['title'], story['url'], summaries[i]['Summary'], run_id)
+                tot_cost += cost
+                if journal is not None:
+                    journal.put(f"summaries/{i:03d}", {'summary': summaries[i], 'cost': cost})
+                continue
+            body = results[custom_id]
+            summary = body['choices'][0]['message']['content']
+            estimated_cost = (body['usage']['total_tokens'] / 1000000) * cost_per_1M_tokens
+            summary_cache.put(cache_key, SUMMARY_PROMPT, SUMMARY_MODEL, summary, estimated_cost)
+            summaries[i] = {'Title': story['title'], 'URL': story['url'], 'Summary': summary}
+            record_summary(signature, story['title'], story['url'], summary, run_id)
+            tot_cost += estimated_cost
+            if journal is not None:
+                journal.put(f"summaries/{i:03d}", {'summary': summaries[i], 'cost': estimated_cost})
+
+    # Stories skipped as already covered leave no summary
+    return [summary for summary in summaries if summary is not None], tot_cost
+
+
+def generate_intro_and_conclusion(summaries: list[dict], interval: str) -> tuple:
+    """
+    Generate an introduction, conclusion, title and description for the summaries using an LLM.
+
+    Args:
+        summaries (list[dict]): List of summaries.
+        interval (str): Interval of the episode ('daily' or 'weekly').
+
+    Returns:
+        tuple: Introduction, conclusion, title, description and estimated cost.
+
+    Raises:
+        ValueError: If the model does not return valid JSON after ``WRAP_ATTEMPTS`` attempts.
+    """
+    client = get_openai_client()
     today = datetime.now().strftime("%B %d, %Y")
     cost_per_1M_tokens = 0.15
 
@@ -142,66 +308,165 @@ def add_intro_and_conclusion(summaries: list[str], interval: int) -> str:
     for summary in summaries:
         content += f"{summary['Summary']}\n\n"
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",  # Replace with the specific model you want to use
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": content},
-            {"role": "user", "content": "Please format your entire response as a JSON object with keys 'Introduction, 'Conclusion', 'Title' and 'Description'."}
-        ]
-    )
+    # The model occasionally returns malformed JSON; ask again rather than producing
+    # an episode without an introduction
+    estimated_cost = 0
+    for attempt in range(1, WRAP_ATTEMPTS + 1):
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",  # Replace with the specific model you want to use
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": content},
+                {"role": "user", "content": "Please format your entire response as a JSON object with keys 'Introduction, 'Conclusion', 'Title' and 'Description'."}
+            ]
+        )
+
+        # Calculate tokens and estimate cost
+        tokens_used = response.usage.total_tokens
+        estimated_cost += (tokens_used / 1000000) * cost_per_1M_tokens
+        ictd_text = response.choices[0].message.content
+
+        try:
+            parsed_response = json.loads(ictd_text)
+            break
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON (attempt {attempt}/{WRAP_ATTEMPTS}): {e}")
+    else:
+        raise ValueError(f"No valid JSON introduction and conclusion after {WRAP_ATTEMPTS} attempts")
 
-    # Calculate tokens and estimate cost
-    tokens_used = response.usage.total_tokens
-    estimated_cost = (tokens_used / 1000000) * cost_per_1M_tokens
-    ictd_text = response.choices[0].message.content
-
-    try:
-        parsed_response = json.loads(ictd_text)
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        #print(f"Response content: {ictd_text}")
-        return None, None, None, 0  # or handle this error as appropriate
-    
     intro_text = parsed_response.get('Introduction', '')
     conclu_text = parsed_response.get('Conclusion', '')
     title = parsed_response.get('Title', '')
     description = parsed_response.get('Description', '')
-    combined_text = f"{intro_text}\n\n{content}\n\n{conclu_text}"
+    return intro_text, conclu_text, title, description, estimated_cost
 
-    #print(combined_text, title, description, estimated_cost)
-    return combined_text, title, description, estimated_cost
 
-    
-def create_summaries(interval: str, num_stories: int) -> str:
+def stream_intro_and_conclusion(summaries: list[dict], interval: str, on_intro: Callable[[str], None],
+                                on_conclusion: Callable[[str], None]) -> tuple:
     """
-    Create summaries for a given source and interval.
+    Generate the introduction and conclusion as streamed plain text, and the title and description.
+
+    The three requests run concurrently. Unlike ``generate_intro_and_conclusion``, which
+    needs the whole JSON response before anything can be spoken, the introduction and
+    conclusion are passed on piece by piece as they are written.
 
     Args:
-        interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
-        num_stories (int): Number of top stories to fetch.
+        summaries (list[dict]): List of summaries.
+        interval (str): Interval of the episode ('daily' or 'weekly').
+        on_intro (callable): Called with each piece of the introduction.
+        on_conclusion (callable): Called with each piece of the conclusion.
 
     Returns:
-        None
+        tuple: Introduction, conclusion, title, description and estimated cost.
+
+    Raises:
+        ValueError: If the model does not return a valid JSON title and description after
+            ``WRAP_ATTEMPTS`` attempts.
     """
+    client = get_openai_client()
+    today = datetime.now().strftime("%B %d, %Y")
+    cost_per_1M_tokens = 0.15
+    period = "today's top stories" if interval == 'daily' else "the past week's top stories"
+    context = (f"The name of the podcast is Hackerpulse. The content is summaries of {period} from HackerNews. "
+               f"Today's date is {today}. The name of the narrator is Data.")
+    content = ''.join(f"{summary['Summary']}\n\n" for summary in summaries)
+
+    def spoken(part, on_text):
+        prompt = (f"{context} Write a very brief {part} for the summaries in a style suitable for a podcast. "
+                  "Output only the text to be spoken.")
+        text, usage = stream_completion(client, SUMMARY_MODEL, [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": content}
+        ], on_text)
+        return text, (usage.total_tokens / 1000000) * cost_per_1M_tokens if usage is not None else 0.0
+
+    def title_and_description():
+        prompt = (f"{context} Generate a Title and a Description for the HackerPulse podcast episode based on the "
+                  "summaries and the date. Output a JSON object with keys 'Title' and 'Description'.")
+        estimated_cost = 0
+        for attempt in range(1, WRAP_ATTEMPTS + 1):
+            response = client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": content}
+                ]
+            )
+            estimated_cost += (response.usage.total_tokens / 1000000) * cost_per_1M_tokens
+            try:
+                parsed_response = json.loads(response.choices[0].message.content)
+                return parsed_response.get('Title', ''), parsed_response.get('Description', ''), estimated_cost
+            except json.JSONDecodeError as e:
+                print(f"Error decoding JSON (attempt {attempt}/{WRAP_ATTEMPTS}): {e}")
+        raise ValueError(f"No valid JSON title and description after {WRAP_ATTEMPTS} attempts")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        intro = executor.submit(spoken, 'introduction', on_intro)
+        conclusion = executor.submit(spoken, 'conclusion', on_conclusion)
+        metadata = executor.submit(title_and_description)
+        intro_text, intro_cost = intro.result()
+        conclu_text, conclu_cost = conclusion.result()
+        title, description, metadata_cost = metadata.result()
+    return intro_text, conclu_text, title, description, intro_cost + conclu_cost + metadata_cost
+
+
+def add_intro_and_conclusion(summaries: list[str], interval: int, journal: RunJournal | None = None) -> str:
+    """
+    Add an introduction and conclusion to the list of summaries using an LLM.
 
-    stories = fetch_hn_top_stories(num_stories, interval)
-    summaries = []
-    tot_cost = 0
-    for story in stories:
-        summary, cost = extract_summary(story['title'], story['url'])
-        summaries.append(summary)
-        tot_cost += cost
+    Args:
+        summaries (list[str]): List of summaries.
+        interval (str): Interval of the episode ('daily' or 'weekly').
+        journal (RunJournal | None): Run journal; the introduction and conclusion are read from
+            it if present and added to it otherwise.
 
-    combined_text, title, description, cost = add_intro_and_conclusion(summaries, interval)
-    tot_cost += cost
+    Returns:
+        tuple: The combined text with introduction and conclusion, title, description and estimated cost.
+    """
+    def generate():
+        return dict(zip(WRAP_KEYS, generate_intro_and_conclusion(summaries, interval)))
+
+    wrap = journal.step('wrap', generate) if journal is not None else generate()
+
+    # Concatenate the dictionaries into a single string
+    content = ""
+    for summary in summaries:
+        content += f"{summary['Summary']}\n\n"
+    combined_text = f"{wrap['intro']}\n\n{content}\n\n{wrap['conclusion']}"
+
+    #print(combined_text, title, description, estimated_cost)
+    return combined_text, wrap['title'], wrap['description'], wrap['cost']
+
+
+def write_outputs(summaries: list[dict], combined_text: str, title: str, description: str,
+                  interval: str = 'daily') -> tuple[str, str]:
+    """
+    Write the episode transcript and the JSON lines summary file.
+
+    Daily files are named by date alone; other intervals add the interval to the name
+    (e.g. ``hn_jsonl_weekly_<date>.txt``) so a rollup does not overwrite the day's
+    daily files.
+
+    Args:
+        summaries (list[dict]): List of summaries.
+        combined_text (str): The transcript with introduction and conclusion.
+        title (str): The episode title.
+        description (str): The episode description.
+        interval (str): The episode's interval.
 
-    transcript_file = f'output/hn_transcript_{datetime.now().strftime("%m%d%Y")}.txt'
+    Returns:
+        tuple[str, str]: Paths of the transcript and summary files.
+    """
+    stem = datetime.now().strftime("%m%d%Y")
+    if interval != 'daily':
+        stem = f'{interval}_{stem}'
+    transcript_file = f'output/hn_transcript_{stem}.txt'
     with open(transcript_file, 'w') as f:
         f.write(combined_text)
        
-    summary_file = f'output/hn_jsonl_{datetime.now().strftime("%m%d%Y")}.txt'
+    summary_file = f'output/hn_jsonl_{stem}.txt'
     with open(summary_file, 'w') as f:
         for summary in summaries:
             json_line = json.dumps(summary) + '\n'
@@ -210,7 +475,138 @@ def create_summaries(interval: str, num_stories: int) -> str:
         print(f"\n\nTitle: {title}\nDescription: {description}")
 
     print(f"JSON summaries written to {summary_file}")        
+    return transcript_file, summary_file
+
+    
+def load_daily_summaries(days: int = ROLLUP_DAYS, output_dir: str = 'output') -> tuple[dict[str, dict], list[str]]:
+    """
+    Read the summaries of the last days' daily runs from their ``hn_jsonl_<date>`` files.
+
+    Args:
+        days (int): Number of days to read, ending today.
+        output_dir (str): Directory holding the summary files.
+
+    Returns:
+        tuple[dict[str, dict], list[str]]: Summaries keyed by the ``dedup_key`` of their URL (the
+            most recent one wins) and the files that were read.
+    """
+    summaries = {}
+    files = []
+    today = datetime.now()
+    for offset in range(days):
+        path = Path(output_dir) / f"hn_jsonl_{(today - timedelta(days=offset)).strftime('%m%d%Y')}.txt"
+        if not path.exists():
+            continue
+        files.append(str(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # Skip the Title/Description trailer and anything else that is not a summary
+                try:
+                    summary = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(summary, dict) and is_web_url(summary.get('URL')) and summary.get('Summary'):
+                    summaries.setdefault(dedup_key(summary['URL']), summary)
+    return summaries, files
+
+
+def reuse_daily_summaries(stories: list[dict], journal: RunJournal, days: int = ROLLUP_DAYS) -> int:
+    """
+    Journal the daily summaries of stories that already ran this week.
+
+    The stories found are then skipped by the summarization step, so only stories
+    that are new this week are fetched and summarized.
+
+    Args:
+        stories (list[dict]): This week's stories with 'title' and 'url'.
+        journal (RunJournal): The run's journal.
+        days (int): Number of days of daily summaries to draw from.
+
+    Returns:
+        int: Number of stories taken from the daily summaries.
+    """
+    daily, files = load_daily_summaries(days)
+    reused = 0
+    for i, story in enumerate(stories):
+        summary = daily.get(dedup_key(story['url'])) if is_web_url(story.get('url')) else None
+        if summary is None or journal.get(f"summaries/{i:03d}") is not None:
+            continue
+        journal.put(f"summaries/{i:03d}", {
+            'summary': {'Title': story['title'], 'URL': story['url'], 'Summary': summary['Summary']},
+            'cost': 0.0})
+        reused += 1
+    print(f"Rollup: {reused} of {len(stories)} stories found in {len(files)} daily summary files; "
+          f"{len(stories) - reused} left to summarize")
+    return reused
+
+
+def create_summaries(interval: str, num_stories: int, batch: bool = False, run_id: str | None = None,
+                     fresh: bool = False, rollup: bool = False) -> str:
+    """
+    Create summaries for a given source and interval.
+
+    Every completed step is saved in a run journal, so after a failure a rerun with
+    the same run ID continues where the previous one stopped. A rollup takes the
+    summaries of stories that already ran in the week's daily episodes from their
+    output files, so only new stories are fetched and summarized.
+
+    Args:
+        interval (str): Interval for fetching stories ('daily', 'weekly', 'monthly').
+        num_stories (int): Number of top stories to fetch.
+        batch (bool): Summarize through an offline batch job (cheaper, slower).
+        run_id (str | None): Run to resume; defaults to today's run for this interval.
+        fresh (bool): Ignore anything journaled under the run ID.
+        rollup (bool): Reuse the summaries of the last ``ROLLUP_DAYS`` daily runs.
+
+    Returns:
+        None
+    """
+    start = time.perf_counter()
+    journal = RunJournal(run_id or default_run_id(RUN_SOURCE, interval), fresh=fresh, schema=JOURNAL_SCHEMA)
+    stories = journal.step('stories', lambda: fetch_hn_top_stories(num_stories, interval))
+    reused = reuse_daily_summaries(stories, journal) if rollup else 0
+    if batch:
+        summaries, tot_cost = summarize_stories_batch(stories, journal)
+    else:
+        summaries = []
+        tot_cost = 0
+        failed = []
+        for i, story in enumerate(stories):
+            # Keep going after a failure so the rerun has as little left to do as possible
+            try:
+                summary, cost = journaled_summary(journal, i, story)
+            except Exception as e:
+                print(f"Summarizing '{story['title']}' failed: {e}")
+                failed.append(i + 1)
+                continue
+            if summary is not None:
+                summaries.append(summary)
+            tot_cost += cost
+        if failed:
+            journal.print_summary()
+            raise RuntimeError(f"Summarizing stories {failed} failed; rerun with --run-id {journal.run_id} to resume")
+
+    if not summaries:
+        print("Every story was already covered in a recent episode; nothing to publish")
+        journal.print_summary()
+        get_near_dup_index().print_stats()
+        return
+    summary_cost = tot_cost
+    combined_text, title, description, cost = add_intro_and_conclusion(summaries, interval, journal)
+    tot_cost += cost
+
+    write_outputs(summaries, combined_text, title, description, interval)
     print(f"Total estimated cost: ${tot_cost:.4f}")
+    if rollup:
+        summarized = len(stories) - reused
+        saved = f" (~${reused * summary_cost / summarized:.4f})" if summarized else ""
+        print(f"Rollup: skipped {reused} article fetches and summaries{saved}; "
+              f"built in {time.perf_counter() - start:.1f}s")
+    journal.print_summary()
+    get_summary_cache().print_stats()
+    get_near_dup_index().print_stats()
+    get_article_cache().print_stats()
+    print_connection_stats()
 
 
 if __name__ == "__main__":
@@ -223,7 +619,15 @@ if __name__ == "__main__":
     Returns:
         None
     """
-
-    interval = sys.argv[1]
-    num_stories = int(sys.argv[2])
-    create_summaries(interval, num_stories)
+    parser = argparse.ArgumentParser(description="Summarize the top Hacker News stories into an episode transcript.")
+    parser.add_argument('interval', choices=['daily', 'weekly'])
+    parser.add_argument('num_stories', type=int)
+    parser.add_argument('--batch', action='store_true', help="Summarize through an offline batch job")
+    parser.add_argument('--run-id', help="Resume this run (default: today's run for the interval)")
+    parser.add_argument('--fresh', action='store_true', help="Start the run over instead of resuming")
+    parser.add_argument('--rollup', action='store_true',
+                        help="Build a weekly episode from the week's daily summaries, summarizing only new stories")
+    args = parser.parse_args()
+    if args.rollup and args.interval != 'weekly':
+        parser.error("--rollup builds weekly episodes")
+    create_summaries(args.interval, args.num_stories, args.batch, args.run_id, args.fresh, args.rollup)
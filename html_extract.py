@@ -0,0 +1,189 @@
+"""
+Streaming, size-capped extraction of article text from HTML.
+
+Instead of building a full BeautifulSoup tree and joining every ``<p>``, the page is
+fed to an incremental ``html.parser.HTMLParser`` chunk by chunk as it arrives from
+the socket (or the article cache). Parsing stops as soon as the byte or character
+budget is spent. Only main-content paragraphs are kept: paragraphs inside
+navigation, headers, footers, sidebars, comments and similar boilerplate are
+dropped, as are very short or link-heavy paragraphs.
+"""
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+from typing import Iterable
+
+EXTRACT_MAX_BYTES = int(os.getenv('EXTRACT_MAX_BYTES', str(2 * 1024 * 1024)))
+EXTRACT_MAX_CHARS = int(os.getenv('EXTRACT_MAX_CHARS', '60000'))
+MIN_PARAGRAPH_CHARS = 40
+MAX_LINK_DENSITY = 0.5
+
+BOILERPLATE_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'nav', 'header', 'footer',
+    'aside', 'form', 'button', 'select', 'figure', 'iframe',
+}
+BOILERPLATE_PATTERN = re.compile(
+    r'(^|[\s_-])(nav|navbar|menu|header|footer|sidebar|comment|comments|share|social|related|'
+    r'promo|advert|ad|ads|banner|cookie|newsletter|subscribe|breadcrumb|popup|modal)([\s_-]|$)',
+    re.IGNORECASE)
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+    'source', 'track', 'wbr',
+}
+# Block-level tags that implicitly close an open <p>
+P_CLOSERS = {
+    'p', 'div', 'ul', 'ol', 'table', 'section', 'article', 'blockquote', 'pre', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6',
+}
+CHARSET_PATTERN = re.compile(rb'charset=["\']?([\w-]+)', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class BudgetExhausted(Exception):
+    """Raised inside the parser once enough text has been collected."""
+
+
+class ParagraphExtractor(HTMLParser):
+    """
+    Incremental parser collecting main-content paragraphs.
+
+    Args:
+        max_chars (int): Stop once this many characters of paragraph text are collected.
+        min_paragraph_chars (int): Drop paragraphs shorter than this.
+        max_link_density (float): Drop paragraphs where more than this share of the text is link text.
+    """
+
+    def __init__(self, max_chars: int = EXTRACT_MAX_CHARS, min_paragraph_chars: int = MIN_PARAGRAPH_CHARS,
+                 max_link_density: float = MAX_LINK_DENSITY):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.min_paragraph_chars = min_paragraph_chars
+        self.max_link_density = max_link_density
+        self.paragraphs = []
+        self.num_chars = 0
+        # Stack of (tag, is_boilerplate) for open non-void elements
+        self._stack = []
+        self._skip_depth = 0
+        self._in_paragraph = False
+        self._in_link = 0
+        self._parts = []
+        self._link_chars = 0
+
+    def _is_boilerplate(self, tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        if tag in BOILERPLATE_TAGS:
+            return True
+        for name, value in attrs:
+            if name in ('class', 'id', 'role') and value and BOILERPLATE_PATTERN.search(value):
+                return True
+            if name == 'aria-hidden' and value == 'true':
+                return True
+        return False
+
+    def _close_paragraph(self) -> None:
+        if not self._in_paragraph:
+            return
+        self._in_paragraph = False
+        text = WHITESPACE_PATTERN.sub(' ', ''.join(self._parts)).strip()
+        link_chars = self._link_chars
+        self._parts = []
+        self._link_chars = 0
+        if len(text) < self.min_paragraph_chars or link_chars > self.max_link_density * len(text):
+            return
+        self.paragraphs.append(text)
+        self.num_chars += len(text) + 1
+        if self.num_chars >= self.max_chars:
+            raise BudgetExhausted
+
+    def handle_starttag(self, tag, attrs):
+        if tag in P_CLOSERS:
+            self._close_paragraph()
+        if tag in VOID_TAGS:
+            return
+        boilerplate = self._is_boilerplate(tag, attrs)
+        self._stack.append((tag, boilerplate))
+        if boilerplate:
+            self._skip_depth += 1
+        if tag == 'p' and not self._skip_depth:
+            self._in_paragraph = True
+        elif tag == 'a':
+            self._in_link += 1
+
+    def handle_endtag(self, tag):
+        if tag in P_CLOSERS:
+            self._close_paragraph()
+        # Pop up to the matching open tag, tolerating unclosed elements
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, boilerplate = self._stack.pop()
+            if boilerplate:
+                self._skip_depth -= 1
+            if open_tag == 'a':
+                self._in_link = max(self._in_link - 1, 0)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._in_paragraph and not self._skip_depth:
+            self._parts.append(data)
+            if self._in_link:
+                self._link_chars += len(data.strip())
+
+    def close(self):
+        try:
+            super().close()
+            self._close_paragraph()
+        except BudgetExhausted:
+            pass
+
+
+def _sniff_encoding(head: bytes, default: str = 'utf-8') -> str:
+    match = CHARSET_PATTERN.search(head)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+    return default
+
+
+def extract_text(chunks: Iterable[bytes], max_bytes: int = EXTRACT_MAX_BYTES, max_chars: int = EXTRACT_MAX_CHARS,
+                 encoding: str | None = None) -> str:
+    """
+    Extract main-content paragraph text from a stream of HTML bytes.
+
+    Reading stops once ``max_bytes`` have been consumed or ``max_chars`` characters of
+    text have been collected, whichever comes first. If ``chunks`` is a generator it is
+    closed at that point, so the underlying download is abandoned.
+
+    Args:
+        chunks (Iterable[bytes]): The page body, chunk by chunk.
+        max_bytes (int): Maximum number of bytes to read.
+        max_chars (int): Maximum number of characters of text to return.
+        encoding (str | None): Page encoding; sniffed from the first chunk if None.
+
+    Returns:
+        str: The paragraphs joined with spaces.
+    """
+    parser = ParagraphExtractor(max_chars=max_chars)
+    decoder = None
+    num_bytes = 0
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding or _sniff_encoding(chunk[:4096]))(errors='replace')
+            chunk = chunk[:max_bytes - num_bytes]
+            num_bytes += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if num_bytes >= max_bytes:
+                break
+        parser.close()
+    except BudgetExhausted:
+        pass
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+    return ' '.join(parser.paragraphs)[:max_chars]
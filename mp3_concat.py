@@ -0,0 +1,330 @@
+"""
+Decode-free MP3 concatenation.
+
+MP3 chunks produced by one TTS provider share the same MPEG version, sample rate,
+channel mode and (for CBR) bitrate, so an episode can be assembled by copying their
+audio frames back to back, without decoding to PCM and re-encoding. ID3v2/ID3v1/APE
+tags are stripped and each chunk's Xing/Info/VBRI header frame is dropped (its frame
+and byte counts would describe only that chunk); for VBR output a fresh Xing header
+describing the whole episode is written. When the chunks do not match, callers fall
+back to decoding (streamed through ffmpeg, or with pydub).
+"""
+import struct
+from pathlib import Path
+
+# Layer III bitrates in kbps, indexed by the 4-bit bitrate index
+BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],  # MPEG-2 and 2.5
+}
+SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+# Version bits of the frame header: 0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1
+VERSIONS = {0: 25, 2: 2, 3: 1}
+COPY_BLOCK_BYTES = 1024 * 1024
+# Consecutive frame headers needed to lock on to audio that does not start where expected
+SYNC_FRAMES = 4
+# Files whose frames cover less of the audio region than this are decoded instead
+MIN_COVERAGE = 0.9
+
+
+class FrameHeader:
+    """
+    Parsed MPEG audio Layer III frame header.
+
+    Args:
+        header (int): The 32-bit frame header.
+    """
+
+    __slots__ = ('version', 'bitrate_index', 'bitrate', 'sample_rate', 'padding', 'channel_mode', 'protected',
+                 'length')
+
+    def __init__(self, header: int):
+        self.version = VERSIONS[(header >> 19) & 0x3]
+        self.protected = not (header >> 16) & 0x1
+        self.bitrate_index = (header >> 12) & 0xF
+        self.bitrate = BITRATES[1 if self.version == 1 else 2][self.bitrate_index] * 1000
+        self.sample_rate = SAMPLE_RATES[self.version][(header >> 10) & 0x3]
+        self.padding = (header >> 9) & 0x1
+        self.channel_mode = (header >> 6) & 0x3
+        coefficient = 144 if self.version == 1 else 72
+        self.length = coefficient * self.bitrate // self.sample_rate + self.padding
+
+    @property
+    def side_info_size(self) -> int:
+        mono = self.channel_mode == 3
+        if self.version == 1:
+            return 17 if mono else 32
+        return 9 if mono else 17
+
+
+def parse_header(data: bytes, pos: int) -> FrameHeader | None:
+    """
+    Parse a Layer III frame header at ``pos``.
+
+    Args:
+        data (bytes): The file contents.
+        pos (int): Offset of the candidate header.
+
+    Returns:
+        FrameHeader | None: The header, or None if there is no valid Layer III header there.
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    header = struct.unpack_from('>I', data, pos)[0]
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    sample_rate_index = (header >> 10) & 0x3
+    if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    return FrameHeader(header)
+
+
+def _skip_id3v2(data: bytes) -> int:
+    pos = 0
+    # Some encoders write more than one tag
+    while data[pos:pos + 3] == b'ID3' and pos + 10 <= len(data):
+        size = 0
+        for byte in data[pos + 6:pos + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[pos + 5] & 0x10 else 0
+        pos += 10 + size + footer
+    return pos
+
+
+def _audio_end(data: bytes) -> int:
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+    if end >= 32 and data[end - 32:end - 24] == b'APETAGEX':
+        size = struct.unpack_from('<I', data, end - 20)[0]
+        end -= size + (32 if struct.unpack_from('<I', data, end - 12)[0] & 0x80000000 else 0)
+    return max(end, 0)
+
+
+def _is_vbr_header(data: bytes, pos: int, header: FrameHeader) -> bool:
+    offset = pos + 4 + (2 if header.protected else 0) + header.side_info_size
+    if data[offset:offset + 4] in (b'Xing', b'Info'):
+        return True
+    return data[pos + 36:pos + 40] == b'VBRI'
+
+
+def _frames_start_at(data: bytes, pos: int, limit: int, at_start: bool) -> bool:
+    # Where the audio should begin, one frame (followed by another or by the end of the
+    # audio) is enough, as is a Xing/Info/VBRI frame anywhere; elsewhere a run is needed
+    header = parse_header(data, pos)
+    if header is None or pos + header.length > limit:
+        return False
+    if at_start or _is_vbr_header(data, pos, header):
+        return pos + header.length + 4 > limit or parse_header(data, pos + header.length) is not None
+    for _ in range(SYNC_FRAMES - 1):
+        pos += header.length
+        following = parse_header(data, pos)
+        if following is None or pos + following.length > limit \
+                or (following.version, following.sample_rate) != (header.version, header.sample_rate):
+            return False
+        header = following
+    return True
+
+
+class Mp3Stream:
+    """
+    Audio frames of one MP3 file.
+
+    The scan locks on to the frame sequence at the start of the audio (right after
+    any ID3v2 tag), right after a Xing/Info/VBRI frame, or, past leading junk, only
+    where ``SYNC_FRAMES`` consecutive frame headers line up, since random bytes (WAV
+    samples, HTML) are full of single valid-looking headers.
+
+    Attributes:
+        start (int): Offset of the first audio frame (after tags and any Xing/Info/VBRI frame).
+        end (int): Offset just past the last complete audio frame.
+        version, sample_rate, channel_mode: Stream format taken from the first audio frame.
+        bitrates (set[int]): Bitrates seen across frames.
+        frames (int): Number of audio frames.
+        coverage (float): Share of the bytes between the tags taken up by the frames.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.bitrates = set()
+        self.frames = 0
+        self.coverage = 0.0
+        self.version = self.sample_rate = self.channel_mode = None
+        self.start = self.end = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        data = self.data
+        audio_start = pos = _skip_id3v2(data)
+        limit = _audio_end(data)
+        while pos + 4 <= limit and not _frames_start_at(data, pos, limit, pos == audio_start):
+            pos += 1
+        if pos + 4 > limit:
+            return
+        sync = pos
+        header = parse_header(data, pos)
+        self.version, self.sample_rate, self.channel_mode = header.version, header.sample_rate, header.channel_mode
+        if _is_vbr_header(data, pos, header):
+            pos += header.length
+        self.start = self.end = pos
+        while pos + 4 <= limit:
+            header = parse_header(data, pos)
+            if header is None or pos + header.length > limit \
+                    or (header.version, header.sample_rate) != (self.version, self.sample_rate):
+                break
+            self.bitrates.add(header.bitrate)
+            self.frames += 1
+            pos += header.length
+            self.end = pos
+        self.coverage = (self.end - sync) / (limit - audio_start)
+
+    @property
+    def copyable(self) -> bool:
+        """
+        Whether the frames can be copied as the file's audio: they cover (nearly) all of it.
+        """
+        return self.frames > 0 and self.coverage >= MIN_COVERAGE
+
+    @property
+    def samples_per_frame(self) -> int:
+        return 1152 if self.version == 1 else 576
+
+
+def xing_frame(stream: Mp3Stream, frames: int | None = None, num_bytes: int | None = None) -> bytes:
+    """
+    Build a Xing header frame in the same format as ``stream``.
+
+    Args:
+        stream (Mp3Stream): Stream whose MPEG version, sample rate and channel mode to use.
+        frames (int | None): Number of audio frames that follow; None writes a placeholder
+            without frame or byte counts, for files whose length is not known yet.
+        num_bytes (int | None): Size of the audio frames that follow.
+
+    Returns:
+        bytes: The frame, the same length whether or not the counts are filled in.
+    """
+    version_bits = {1: 3, 2: 2, 25: 0}[stream.version]
+    sample_rate_index = SAMPLE_RATES[stream.version].index(stream.sample_rate)
+    bitrate_index = 9 if stream.version == 1 else 8  # 128 kbps / 64 kbps
+    header_int = (0x7FF << 21) | (version_bits << 19) | (1 << 17) | (1 << 16) | (bitrate_index << 12) \
+        | (sample_rate_index << 10) | (stream.channel_mode << 6)
+    header = FrameHeader(header_int)
+    frame = bytearray(header.length)
+    struct.pack_into('>I', frame, 0, header_int)
+    offset = 4 + header.side_info_size
+    frame[offset:offset + 4] = b'Xing'
+    if frames is None:
+        struct.pack_into('>I', frame, offset + 4, 0)
+    else:
+        struct.pack_into('>III', frame, offset + 4, 0x3, frames, num_bytes + header.length)
+    return bytes(frame)
+
+
+def concatenate_mp3_frames(input_files: list, output_file) -> bool:
+    """
+    Join MP3 files frame by frame without decoding.
+
+    Files are scanned one at a time and their audio frames copied in fixed-size blocks,
+    so memory use does not grow with the length of the episode.
+
+    Args:
+        input_files (list): MP3 files in playback order.
+        output_file: Destination MP3 file.
+
+    Returns:
+        bool: True if the files were joined; False if their formats differ (or a file is
+        not, or not entirely, MPEG audio frames) and nothing was written.
+    """
+    streams = []
+    for path in input_files:
+        stream = Mp3Stream(Path(path).read_bytes())
+        if not stream.copyable:
+            return False
+        # Keep only the frame offsets; the data is read again while writing
+        stream.data = None
+        streams.append(stream)
+    if not streams:
+        return False
+
+    first = streams[0]
+    formats = {(stream.version, stream.sample_rate, stream.channel_mode == 3) for stream in streams}
+    if len(formats) != 1:
+        return False
+    bitrates = set().union(*(stream.bitrates for stream in streams))
+    vbr = any(len(stream.bitrates) > 1 for stream in streams)
+    if len(bitrates) > 1 and not vbr:
+        # CBR chunks at different bitrates: decode and re-encode instead
+        return False
+
+    with open(output_file, 'wb') as f:
+        if vbr:
+            frames = sum(stream.frames for stream in streams)
+            num_bytes = sum(stream.end - stream.start for stream in streams)
+            f.write(xing_frame(first, frames, num_bytes))
+        for path, stream in zip(input_files, streams):
+            with open(path, 'rb') as source:
+                source.seek(stream.start)
+                remaining = stream.end - stream.start
+                while remaining:
+                    block = source.read(min(COPY_BLOCK_BYTES, remaining))
+                    if not block:
+                        raise ValueError(f"{path} changed while it was being concatenated")
+                    f.write(block)
+                    remaining -= len(block)
+    return True
+
+
+def decode_concatenate(input_files: list, output_file, bitrate: str | None = None) -> None:
+    """
+    Join audio files by decoding them and encoding the result once.
+
+    With ffmpeg installed the PCM is streamed through one encoder in constant memory
+    (see ``audio_stream``). Otherwise pydub decodes every file into memory and the
+    PCM is joined in one step rather than with repeated ``+=``, which copies the
+    whole buffer on every append.
+
+    Args:
+        input_files (list): Audio files in playback order.
+        output_file: Destination MP3 file.
+        bitrate (str | None): Output bitrate, e.g. '192k'.
+    """
+    from audio_stream import ffmpeg_path, stream_concatenate
+
+    if not input_files:
+        raise ValueError("No audio files to concatenate")
+    if ffmpeg_path() is not None:
+        stream_concatenate(input_files, output_file, bitrate)
+        return
+
+    from pydub import AudioSegment
+
+    segments = [AudioSegment.from_file(path) for path in input_files]
+    frame_rate = max(segment.frame_rate for segment in segments)
+    channels = max(segment.channels for segment in segments)
+    segments = [segment.set_frame_rate(frame_rate).set_channels(channels).set_sample_width(2)
+                for segment in segments]
+    combined = AudioSegment(data=b''.join(segment.raw_data for segment in segments),
+                            sample_width=2, frame_rate=frame_rate, channels=channels)
+    combined.export(output_file, format="mp3", bitrate=bitrate)
+
+
+def concatenate_mp3(input_files: list, output_file) -> str:
+    """
+    Join MP3 files, copying frames when possible and decoding only when formats differ.
+
+    Args:
+        input_files (list): MP3 files in playback order.
+        output_file: Destination MP3 file.
+
+    Returns:
+        str: 'frames' if the files were joined without decoding, 'decode' otherwise.
+    """
+    if concatenate_mp3_frames(input_files, output_file):
+        return 'frames'
+    decode_concatenate(input_files, output_file)
+    return 'decode'
@@ -0,0 +1,343 @@
+"""
+Persistent near-duplicate index over extracted article text.
+
+Each summarized article gets a 128-value MinHash signature over its word
+3-shingles, so copies of the same story under different URLs and titles (mirrors,
+syndication, a lightly edited repost) are recognized by their estimated Jaccard
+similarity. Signatures are stored in SQLite (``NEAR_DUP_INDEX_PATH``) together
+with the summary. For lookups the signature is cut into 32 bands of 4 values
+(locality-sensitive hashing): each band is hashed to one key, documents sharing
+any key with the query are fetched through an index, and only those candidates
+are compared in full. With these bands a document at 0.6 similarity is a
+candidate with 99% probability and one at 0.2 with 5%, so a lookup touches a
+handful of rows however large the index grows. Entries older than
+``NEAR_DUP_KEEP_DAYS`` are pruned when the index is opened.
+
+``summarize_once`` wraps a summarization call: with ``NEAR_DUP_MODE=reuse`` (the
+default) a story already covered in a recent episode gets the stored summary at no
+cost, with ``skip`` it is left out of the episode, and ``off`` disables the index.
+A second copy of a story within the same episode is always left out.
+
+Benchmark: python benchmarks/bench_near_dup.py [documents]
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+NEAR_DUP_INDEX_PATH = os.getenv('NEAR_DUP_INDEX_PATH', 'cache/near_dup.sqlite')
+NEAR_DUP_KEEP_DAYS = float(os.getenv('NEAR_DUP_KEEP_DAYS', '14'))
+# Estimated Jaccard similarity of 3-shingles from which two articles count as the same story
+NEAR_DUP_MIN_SIMILARITY = float(os.getenv('NEAR_DUP_MIN_SIMILARITY', '0.6'))
+# What to do with a story covered in a recent episode: 'reuse', 'skip' or 'off'
+NEAR_DUP_MODE = os.getenv('NEAR_DUP_MODE', 'reuse')
+# Shorter texts (paywalls, "enable JavaScript" pages) look alike regardless of the story
+NEAR_DUP_MIN_WORDS = int(os.getenv('NEAR_DUP_MIN_WORDS', '100'))
+
+NUM_HASHES = 128
+NUM_BANDS = 32
+ROWS_PER_BAND = NUM_HASHES // NUM_BANDS
+SHINGLE_WORDS = 3
+
+_WORD_RE = re.compile(r'\w+')
+_SIGNATURE = struct.Struct(f'<{NUM_HASHES}I')
+
+
+def minhash(text: str, min_words: int = NEAR_DUP_MIN_WORDS) -> tuple[int, ...] | None:
+    """
+    Compute the MinHash signature of a text over its word 3-shingles.
+
+    Args:
+        text (str): Extracted article text.
+        min_words (int): Texts with fewer words are not fingerprinted.
+
+    Returns:
+        tuple[int, ...] | None: 128 32-bit values, or None if the text is too short.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < max(min_words, 1):
+        return None
+    shingles = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(max(len(words) - SHINGLE_WORDS + 1, 1))}
+    # One extendable-output hash per shingle yields all 128 hash functions at once;
+    # the column minimums over zip(*) run in C
+    rows = [_SIGNATURE.unpack(hashlib.shake_128(shingle.encode('utf-8')).digest(_SIGNATURE.size))
+            for shingle in shingles]
+    return tuple(min(column) for column in zip(*rows))
+
+
+def similarity(signature: tuple[int, ...], other: tuple[int, ...]) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their signatures.
+
+    Args:
+        signature (tuple[int, ...]): Signature from ``minhash``.
+        other (tuple[int, ...]): Another signature.
+
+    Returns:
+        float: The fraction of equal values, between 0 and 1.
+    """
+    return sum(a == b for a, b in zip(signature, other)) / NUM_HASHES
+
+
+def _band_keys(signature: tuple[int, ...]) -> list[int]:
+    # One signed 64-bit key per band (SQLite integers are signed), salted with the band number
+    keys = []
+    for band in range(NUM_BANDS):
+        values = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f'<B{ROWS_PER_BAND}I', band, *values), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+class NearDupIndex:
+    """
+    MinHash/LSH index of recently summarized articles.
+
+    Args:
+        path (str): SQLite database file.
+        keep_days (float): Entries older than this are pruned.
+        min_similarity (float): Lowest estimated similarity reported as a match.
+    """
+
+    def __init__(self, path: str = NEAR_DUP_INDEX_PATH, keep_days: float = NEAR_DUP_KEEP_DAYS,
+                 min_similarity: float = NEAR_DUP_MIN_SIMILARITY):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.keep_days = keep_days
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                run_id TEXT,
+                created_at REAL NOT NULL
+            )""")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS bands (
+                key INTEGER NOT NULL,
+                document_id INTEGER NOT NULL,
+                PRIMARY KEY (key, document_id)
+            ) WITHOUT ROWID""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at)")
+        self._conn.commit()
+        self.stats = {'lookups': 0, 'matches': 0, 'lookup_seconds': 0.0, 'added': 0, 'pruned': 0}
+        self.prune()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def lookup(self, signature: tuple[int, ...], url: str | None = None, run_id: str | None = None) -> dict | None:
+        """
+        Find the most similar recent article.
+
+        Args:
+            signature (tuple[int, ...]): Signature of the article from ``minhash``.
+            url (str | None): URL of the article being looked up.
+            run_id (str | None): Run doing the lookup; together with ``url`` it identifies the
+                article's own entry from an earlier attempt of the same run, which is ignored.
+
+        Returns:
+            dict | None: 'url', 'title', 'summary', 'run_id', 'created_at' and 'similarity' of the
+                most similar article at or above ``min_similarity`` (preferring articles from the same
+                run), or None.
+        """
+        start = time.perf_counter()
+        keys = _band_keys(signature)
+        cutoff = time.time() - self.keep_days * 86400
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT signature, url, title, summary, run_id, created_at FROM documents "
+                f"WHERE id IN (SELECT document_id FROM bands WHERE key IN ({', '.join('?' * len(keys))})) "
+                "AND created_at >= ?", (*keys, cutoff)).fetchall()
+        best = None
+        for stored, match_url, title, summary, match_run_id, created_at in rows:
+            if run_id is not None and match_run_id == run_id and match_url == url:
+                continue
+            score = similarity(signature, _SIGNATURE.unpack(stored))
+            if score < self.min_similarity:
+                continue
+            # A copy already in this run's episode wins over closer matches from earlier runs
+            rank = (run_id is not None and match_run_id == run_id, score)
+            if best is None or rank > best_rank:
+                best, best_rank = {'url': match_url, 'title': title, 'summary': summary, 'run_id': match_run_id,
+                                   'created_at': created_at, 'similarity': score}, rank
+        with self._lock:
+            self.stats['lookups'] += 1
+            self.stats['matches'] += best is not None
+            self.stats['lookup_seconds'] += time.perf_counter() - start
+        return best
+
+    def add(self, signature: tuple[int, ...], url: str, title: str, summary: str, run_id: str | None = None) -> None:
+        """
+        Index a summarized article.
+
+        Args:
+            signature (tuple[int, ...]): Signature of the article from ``minhash``.
+            url (str): Article URL.
+            title (str): Story title.
+            summary (str): The article's summary.
+            run_id (str | None): Run that summarized it.
+        """
+        self.add_many([(signature, url, title, summary, run_id)])
+
+    def add_many(self, entries: list[tuple]) -> None:
+        """
+        Index several summarized articles in one transaction.
+
+        Args:
+            entries (list[tuple]): (signature, url, title, summary, run_id) tuples.
+        """
+        now = time.time()
+        with self._lock:
+            for signature, url, title, summary, run_id in entries:
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (signature, url, title, summary, run_id, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", (_SIGNATURE.pack(*signature), url, title, summary, run_id, now))
+                self._conn.executemany("INSERT OR IGNORE INTO bands VALUES (?, ?)",
+                                       [(key, cursor.lastrowid) for key in _band_keys(signature)])
+            self._conn.commit()
+            self.stats['added'] += len(entries)
+
+    def prune(self) -> None:
+        """
+        Delete entries older than ``keep_days``.
+        """
+        cutoff = time.time() - self.keep_days * 86400
+        with self._lock:
+            self._conn.execute("DELETE FROM bands WHERE document_id IN "
+                               "(SELECT id FROM documents WHERE created_at < ?)", (cutoff,))
+            pruned = self._conn.execute("DELETE FROM documents WHERE created_at < ?", (cutoff,)).rowcount
+            self._conn.commit()
+            self.stats['pruned'] += pruned
+
+    def print_stats(self) -> None:
+        """
+        Print lookups, matches and the average lookup time.
+        """
+        stats = self.stats
+        average = stats['lookup_seconds'] / stats['lookups'] * 1e6 if stats['lookups'] else 0.0
+        print(f"Near-duplicate index: {stats['matches']} of {stats['lookups']} articles already covered "
+              f"({average:.0f}us per lookup), {stats['added']} added, {stats['pruned']} pruned")
+
+
+_near_dup_index = None
+_near_dup_index_lock = threading.Lock()
+
+
+def get_near_dup_index() -> NearDupIndex:
+    """
+    Get the process-wide near-duplicate index configured from the environment.
+
+    Returns:
+        NearDupIndex: The shared index.
+    """
+    global _near_dup_index
+    with _near_dup_index_lock:
+        if _near_dup_index is None:
+            _near_dup_index = NearDupIndex()
+        return _near_dup_index
+
+
+def check_covered(title: str, url: str, content: str, run_id: str | None = None,
+                  mode: str = NEAR_DUP_MODE) -> tuple[tuple[int, ...] | None, bool, dict | None]:
+    """
+    Check whether a recent episode (or this one) already covered an article's story.
+
+    Args:
+        title (str): Story title.
+        url (str): Article URL.
+        content (str): Extracted article text.
+        run_id (str | None): Run doing the summarizing.
+        mode (str): 'reuse' to return the stored summary, 'skip' to return None, 'off' to never match.
+            A story already in this run's episode is skipped in either mode.
+
+    Returns:
+        tuple: The article's signature (None if it is not fingerprinted), whether the story is covered,
+            and if so the summary to reuse (None to leave the story out). A story that is not covered
+            should be summarized and passed to ``record_summary`` with the signature.
+    """
+    signature = minhash(content) if mode != 'off' else None
+    if signature is None:
+        return None, False, None
+    index = get_near_dup_index()
+    match = index.lookup(signature, url, run_id)
+    if match is None:
+        return signature, False, None
+    # A story that is already in this episode is never repeated
+    skip = mode == 'skip' or (run_id is not None and match['run_id'] == run_id)
+    print(f"'{title}' was already covered as '{match['title']}' ({match['url']}, "
+          f"{match['similarity']:.0%} similar); {'skipping it' if skip else 'reusing its summary'}")
+    if skip:
+        return signature, True, None
+    # Index the story under this run too, so another copy later in the episode is skipped
+    index.add(signature, url, title, match['summary'], run_id)
+    return signature, True, {'Title': title, 'URL': url, 'Summary': match['summary']}
+
+
+def record_summary(signature: tuple[int, ...] | None, title: str, url: str, summary: str,
+                   run_id: str | None = None) -> None:
+    """
+    Index a newly summarized article so later copies of its story are recognized.
+
+    Args:
+        signature (tuple[int, ...] | None): Signature from ``check_covered``; None does nothing.
+        title (str): Story title.
+        url (str): Article URL.
+        summary (str): The summary text.
+        run_id (str | None): Run that summarized it.
+    """
+    if signature is not None:
+        get_near_dup_index().add(signature, url, title, summary, run_id)
+
+
+def first_similar(signature: tuple[int, ...] | None, others: list[tuple[int, ...] | None]) -> int | None:
+    """
+    Find an article among ones not indexed yet (e.g. queued in a batch) with the same story.
+
+    Args:
+        signature (tuple[int, ...] | None): Signature of the article.
+        others (list): Signatures of the queued articles (None for ones not fingerprinted).
+
+    Returns:
+        int | None: Position of the first queued article at or above the index's ``min_similarity``, or None.
+    """
+    if signature is None:
+        return None
+    threshold = get_near_dup_index().min_similarity
+    return next((i for i, other in enumerate(others)
+                 if other is not None and similarity(signature, other) >= threshold), None)
+
+
+def summarize_once(title: str, url: str, content: str, summarize: Callable[[str, str, str], tuple[dict, float]],
+                   run_id: str | None = None, mode: str = NEAR_DUP_MODE) -> tuple[dict | None, float]:
+    """
+    Summarize an article unless a recent episode already covered the same story.
+
+    Args:
+        title (str): Story title.
+        url (str): Article URL.
+        content (str): Extracted article text.
+        summarize (callable): ``summarize(title, url, content) -> (summary, cost)``.
+        run_id (str | None): Run doing the summarizing.
+        mode (str): 'reuse' to return the stored summary, 'skip' to return None, 'off' to always summarize.
+            A story already in this run's episode is skipped in either mode.
+
+    Returns:
+        tuple[dict | None, float]: The summary (None if skipped) and its estimated cost.
+    """
+    signature, covered, summary = check_covered(title, url, content, run_id, mode)
+    if covered:
+        return summary, 0.0
+    summary, cost = summarize(title, url, content)
+    record_summary(signature, title, url, summary['Summary'], run_id)
+    return summary, cost
@@ -0,0 +1,272 @@
+"""
+Pipelined episode build.
+
+Runs the whole daily/weekly episode in one process with bounded queues between the
+fetch, extract, summarize and TTS stages, so that synthesis of story 1 overlaps with
+fetching story 5. Each stage has its own worker count. Once all stories are
+summarized, the intro and conclusion are generated and synthesized and the episode
+is assembled in ranking order. A timing breakdown at the end shows how much the
+stages overlapped. Every stage writes its results to the run journal, so rerunning
+after a crash resumes instead of starting over.
+
+Run: python pipeline.py <interval> <num_stories> [--extract-workers N] [--summarize-workers N] [--tts-workers N]
+     [--run-id ID] [--fresh]
+"""
+import argparse
+import queue
+import threading
+import time
+from pathlib import Path
+
+from article_cache import get_article_cache
+from clients import print_connection_stats
+from generate_summaries_hn import (JOURNAL_SCHEMA, RUN_SOURCE, WRAP_KEYS, fetch_hn_top_stories,
+                                   generate_intro_and_conclusion, journaled_article, journaled_summary, write_outputs)
+from near_dup_index import get_near_dup_index
+from run_journal import RunJournal, default_run_id
+from summary_cache import get_summary_cache
+
+_DONE = object()
+
+
+class Stage:
+    """
+    A pool of worker threads reading from one bounded queue and writing to the next.
+
+    Items are ``(rank, payload)`` pairs. When ``func`` raises, the error is recorded and
+    the item is dropped. When the input is exhausted the last worker to exit passes the
+    end-of-stream marker downstream.
+
+    Args:
+        name (str): Stage name used in the timing report.
+        func (callable): Function applied to each payload.
+        workers (int): Number of worker threads.
+        inbox (queue.Queue): Input queue.
+        outbox (queue.Queue | None): Output queue, or None for the last stage.
+    """
+
+    def __init__(self, name: str, func, workers: int, inbox: queue.Queue, outbox: queue.Queue | None):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.results = {}
+        self.errors = {}
+        self.busy = 0.0
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+        self._remaining = workers
+        self._threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                # Let sibling workers see the marker too
+                self.inbox.put(_DONE)
+                break
+            rank, payload = item
+            start = time.perf_counter()
+            try:
+                result = self.func(rank, payload)
+            except Exception as e:
+                print(f"[{self.name}] story {rank + 1} failed: {e}")
+                with self._lock:
+                    self.errors[rank] = e
+                result = None
+            end = time.perf_counter()
+            with self._lock:
+                self.busy += end - start
+                self.first_start = start if self.first_start is None else min(self.first_start, start)
+                self.last_end = end if self.last_end is None else max(self.last_end, end)
+                if result is not None:
+                    self.results[rank] = result
+            if result is not None and self.outbox is not None:
+                self.outbox.put((rank, result))
+
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last and self.outbox is not None:
+            self.outbox.put(_DONE)
+
+
+def synthesize_unreal(text: str, out_dir: Path) -> list[Path]:
+    """
+    Synthesize text with UnrealSpeech into numbered MP3 chunks.
+
+    Args:
+        text (str): The text to synthesize.
+        out_dir (Path): Directory for the chunk files.
+
+    Returns:
+        list[Path]: The chunk files in order.
+    """
+    from generate_podcast_unreal import chunk_text, process_chunks
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return process_chunks(chunk_text(text), out_dir)
+
+
+def print_timing(stages: list[Stage], pipeline_start: float, wall_time: float) -> None:
+    """
+    Print per-stage busy time and active window, and the overlap achieved.
+
+    Args:
+        stages (list[Stage]): The pipeline stages.
+        pipeline_start (float): ``time.perf_counter()`` at the start of the run.
+        wall_time (float): Total wall time of the run.
+    """
+    print(f"{'stage':<12} {'items':>6} {'busy s':>8} {'active from':>12} {'to':>8}")
+    total_busy = 0.0
+    for stage in stages:
+        total_busy += stage.busy
+        if stage.first_start is None:
+            print(f"{stage.name:<12} {0:>6} {0.0:>8.1f} {'-':>12} {'-':>8}")
+            continue
+        print(f"{stage.name:<12} {len(stage.results):>6} {stage.busy:>8.1f} "
+              f"{stage.first_start - pipeline_start:>12.1f} {stage.last_end - pipeline_start:>8.1f}")
+    print(f"Wall time {wall_time:.1f}s vs {total_busy:.1f}s of stage work "
+          f"({max(total_busy - wall_time, 0):.1f}s saved by overlap and parallelism)")
+
+
+def run_pipeline(interval: str, num_stories: int, extract_workers: int = 8, summarize_workers: int = 4,
+                 tts_workers: int = 2, queue_size: int = 4, synthesize=synthesize_unreal, run_id: str | None = None,
+                 fresh: bool = False) -> str:
+    """
+    Build an episode with overlapping fetch, extract, summarize and TTS stages.
+
+    Args:
+        interval (str): Interval for fetching stories ('daily' or 'weekly').
+        num_stories (int): Number of top stories to fetch.
+        extract_workers (int): Concurrent article downloads.
+        summarize_workers (int): Concurrent summarization calls.
+        tts_workers (int): Concurrent stories being synthesized.
+        queue_size (int): Capacity of each queue between stages.
+        synthesize (callable): ``synthesize(text, out_dir) -> list[Path]`` TTS function.
+        run_id (str | None): Run to resume; defaults to today's run for this interval.
+        fresh (bool): Ignore anything journaled under the run ID.
+
+    Returns:
+        str | None: Path of the episode MP3, or None if every story was already covered.
+    """
+    from generate_podcast_unreal import concatenate_audio_files
+
+    pipeline_start = time.perf_counter()
+    journal = RunJournal(run_id or default_run_id(RUN_SOURCE, interval), fresh=fresh,
+                         schema=JOURNAL_SCHEMA)
+    extract_queue = queue.Queue(maxsize=queue_size)
+    summarize_queue = queue.Queue(maxsize=queue_size)
+    tts_queue = queue.Queue(maxsize=queue_size)
+
+    # Each stage reads finished work from the journal, so a rerun only does what is missing
+    def extract(rank: int, story: dict) -> dict:
+        journaled_article(journal, rank, story)
+        return story
+
+    def summarize(rank: int, story: dict) -> tuple[dict, float]:
+        return journaled_summary(journal, rank, story)
+
+    def tts(rank: int, summarized: tuple[dict, float]) -> list[Path]:
+        summary, _ = summarized
+        if summary is None:
+            # Skipped as already covered in a recent episode
+            return []
+        return journal.audio(f"story_{rank:03d}", lambda out_dir: synthesize(summary['Summary'], out_dir))
+
+    def fetch(rank: int, args: tuple) -> list[dict]:
+        return journal.step('stories', lambda: fetch_hn_top_stories(*args))
+
+    fetch_stage = Stage('fetch', fetch, 1, queue.Queue(), None)
+    extract_stage = Stage('extract', extract, extract_workers, extract_queue, summarize_queue)
+    summarize_stage = Stage('summarize', summarize, summarize_workers, summarize_queue, tts_queue)
+    tts_stage = Stage('tts', tts, tts_workers, tts_queue, None)
+    stages = [fetch_stage, extract_stage, summarize_stage, tts_stage]
+    for stage in stages[1:]:
+        stage.start()
+
+    # The story list is a single request; run it inline and feed the extract queue
+    fetch_stage.inbox.put((0, (num_stories, interval)))
+    fetch_stage.inbox.put(_DONE)
+    fetch_stage.start()
+    fetch_stage.join()
+    stories = fetch_stage.results.get(0, [])
+    for rank, story in enumerate(stories):
+        extract_queue.put((rank, story))
+    extract_queue.put(_DONE)
+    for stage in stages[1:]:
+        stage.join()
+
+    if fetch_stage.errors:
+        journal.print_summary()
+        raise RuntimeError(f"Fetching the story list failed; rerun with --run-id {journal.run_id} to resume")
+    failed = sorted({rank + 1 for rank in extract_stage.errors} | {rank + 1 for rank in summarize_stage.errors}
+                    | {rank + 1 for rank in range(len(stories)) if rank not in summarize_stage.results})
+    if failed:
+        journal.print_summary()
+        raise RuntimeError(f"Stories {failed} failed; rerun with --run-id {journal.run_id} to resume")
+
+    ranks = sorted(summarize_stage.results)
+    summaries = [summarize_stage.results[rank][0] for rank in ranks if summarize_stage.results[rank][0] is not None]
+    tot_cost = sum(summarize_stage.results[rank][1] for rank in ranks)
+    missing_audio = [rank + 1 for rank in ranks if rank not in tts_stage.results]
+    if missing_audio:
+        raise RuntimeError(f"TTS failed for stories {missing_audio}; not assembling an episode with gaps")
+
+    if not summaries:
+        print("Every story was already covered in a recent episode; nothing to publish")
+        journal.print_summary()
+        get_near_dup_index().print_stats()
+        return None
+
+    wrap_start = time.perf_counter()
+    wrap = journal.step('wrap', lambda: dict(zip(WRAP_KEYS, generate_intro_and_conclusion(summaries, interval))))
+    intro_text, conclu_text, title, description = wrap['intro'], wrap['conclusion'], wrap['title'], wrap['description']
+    tot_cost += wrap['cost']
+    intro_files = journal.audio("intro", lambda out_dir: synthesize(intro_text, out_dir))
+    conclu_files = journal.audio("conclusion", lambda out_dir: synthesize(conclu_text, out_dir))
+    wrap_time = time.perf_counter() - wrap_start
+
+    content = ''.join(f"{summary['Summary']}\n\n" for summary in summaries)
+    combined_text = f"{intro_text}\n\n{content}\n\n{conclu_text}"
+    transcript_file, _ = write_outputs(summaries, combined_text, title, description, interval)
+
+    output_file = transcript_file.replace('.txt', '.mp3')
+    audio_files = intro_files + [path for rank in ranks for path in tts_stage.results[rank]] + conclu_files
+    concatenate_audio_files(audio_files, output_file)
+
+    wall_time = time.perf_counter() - pipeline_start
+    print_timing(stages, pipeline_start, wall_time)
+    print(f"Intro/conclusion and assembly: {wrap_time:.1f}s")
+    print(f"Total estimated cost: ${tot_cost:.4f}")
+    journal.print_summary()
+    get_summary_cache().print_stats()
+    get_near_dup_index().print_stats()
+    get_article_cache().print_stats()
+    print_connection_stats()
+    print(f"Podcast saved to {output_file}")
+    return output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a Hackerpulse episode with a pipelined run.")
+    parser.add_argument('interval', choices=['daily', 'weekly'])
+    parser.add_argument('num_stories', type=int)
+    parser.add_argument('--extract-workers', type=int, default=8)
+    parser.add_argument('--summarize-workers', type=int, default=4)
+    parser.add_argument('--tts-workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=4)
+    parser.add_argument('--run-id', help="Resume this run (default: today's run for the interval)")
+    parser.add_argument('--fresh', action='store_true', help="Start the run over instead of resuming")
+    args = parser.parse_args()
+    run_pipeline(args.interval, args.num_stories, args.extract_workers, args.summarize_workers,
+                 args.tts_workers, args.queue_size, run_id=args.run_id, fresh=args.fresh)
@@ -0,0 +1,227 @@
+"""
+Adaptive rate limiting for TTS providers.
+
+Each provider gets a token bucket sized from its published limits (overridable with
+``<PROVIDER>_REQUESTS_PER_SECOND`` and ``<PROVIDER>_BURST``). When a provider
+answers 429, the bucket halves its rate and pauses for the Retry-After period, then
+creeps back up towards the configured rate on each success. ``call_with_retry``
+retries transient failures (429, 5xx, timeouts, connection errors) with jittered
+exponential backoff instead of dropping them; anything else, such as a bad API key
+or a missing file, is raised at once.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Requests per second and burst size per provider
+PROVIDER_LIMITS = {
+    'openai': {'requests_per_second': 50 / 60, 'burst': 5},  # tts-1, tier 1: 50 RPM
+    'unreal': {'requests_per_second': 1.0, 'burst': 2},
+    'elevenlabs': {'requests_per_second': 2.0, 'burst': 2},
+    'coqui': {'requests_per_second': 1000.0, 'burst': 1000},  # local model, no quota
+    'fake': {'requests_per_second': 1000.0, 'burst': 1000},  # tts_backends test providers
+    'fake_flaky': {'requests_per_second': 1000.0, 'burst': 1000},
+}
+DEFAULT_LIMITS = {'requests_per_second': 1.0, 'burst': 1}
+MIN_RATE_FRACTION = 0.05
+RECOVERY_STEP = 0.1
+
+
+def provider_limits(provider: str) -> dict:
+    """
+    Get a provider's rate limits, applying environment overrides.
+
+    Args:
+        provider (str): Provider name, e.g. 'openai' or 'unreal'.
+
+    Returns:
+        dict: 'requests_per_second' and 'burst'.
+    """
+    limits = dict(PROVIDER_LIMITS.get(provider, DEFAULT_LIMITS))
+    prefix = provider.upper()
+    if os.getenv(f'{prefix}_REQUESTS_PER_SECOND'):
+        limits['requests_per_second'] = float(os.getenv(f'{prefix}_REQUESTS_PER_SECOND'))
+    if os.getenv(f'{prefix}_BURST'):
+        limits['burst'] = int(os.getenv(f'{prefix}_BURST'))
+    return limits
+
+
+class RateLimiter:
+    """
+    Token bucket that slows down on 429 responses and recovers on success.
+
+    Args:
+        requests_per_second (float): Sustained request rate.
+        burst (int): Bucket capacity.
+    """
+
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        self.max_rate = requests_per_second
+        self.rate = requests_per_second
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """
+        Block until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        """
+        Recover a step towards the configured rate after a successful call.
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        """
+        Halve the rate and pause all callers after a 429 response.
+
+        Args:
+            retry_after (float | None): Seconds the provider asked us to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _status_code(error: Exception) -> int | None:
+    response = getattr(error, 'response', None)
+    # The message is not parsed: a local error mentioning "500" or "rate limit" is not a response
+    return getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+
+
+def rate_limit_info(error: Exception) -> tuple[bool, float | None]:
+    """
+    Work out whether an exception is a rate-limit response and how long to wait.
+
+    Understands exceptions carrying a ``status_code`` (the ``openai`` SDK) or a
+    ``response`` (``requests``).
+
+    Args:
+        error (Exception): The exception raised by the provider call.
+
+    Returns:
+        tuple[bool, float | None]: Whether it was a 429, and the Retry-After delay if given.
+    """
+    response = getattr(error, 'response', None)
+    retry_after = None
+    if response is not None and getattr(response, 'headers', None) is not None:
+        retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+    return _status_code(error) == 429, retry_after
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Work out whether a failed call is worth retrying.
+
+    Args:
+        error (Exception): The exception raised by the provider call.
+
+    Returns:
+        bool: True for 429 and 5xx responses, timeouts and connection errors; False for
+        other HTTP errors (400, 401, 403, 404, ...) and local errors.
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # requests, httpx and the openai SDK have their own timeout and connection error classes
+    return any('Timeout' in cls.__name__ or 'Connect' in cls.__name__ for cls in type(error).__mro__)
+
+
+def call_with_retry(func, limiter: RateLimiter, max_attempts: int = 6, base_delay: float = 1.0,
+                    max_delay: float = 60.0, description: str = 'request'):
+    """
+    Call ``func`` under a rate limiter, retrying transient failures with jittered exponential backoff.
+
+    Errors that ``is_transient`` rejects are re-raised on the first attempt.
+
+    Args:
+        func (callable): Zero-argument function making the provider call.
+        limiter (RateLimiter): The provider's rate limiter.
+        max_attempts (int): Attempts before the last error is re-raised.
+        base_delay (float): Backoff delay after the first failure.
+        max_delay (float): Cap on the backoff delay and on the provider's Retry-After.
+        description (str): Used in retry messages.
+
+    Returns:
+        The return value of ``func``.
+    """
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire()
+        try:
+            result = func()
+        except Exception as e:
+            if attempt == max_attempts or not is_transient(e):
+                raise
+            rate_limited, retry_after = rate_limit_info(e)
+            if retry_after is not None:
+                # A provider asking for minutes (or a far-off date) must not stall the run
+                retry_after = min(retry_after, max_delay)
+            if rate_limited:
+                limiter.on_rate_limited(retry_after)
+            # Full jitter: sleep a random time up to the exponential backoff
+            delay = retry_after if retry_after is not None else random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            print(f"Retrying {description} in {delay:.1f}s (attempt {attempt}/{max_attempts}): {e}")
+            time.sleep(delay)
+        else:
+            limiter.on_success()
+            return result
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Get the process-wide rate limiter for a provider.
+
+    Args:
+        provider (str): Provider name.
+
+    Returns:
+        RateLimiter: The shared limiter.
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            limits = provider_limits(provider)
+            _limiters[provider] = RateLimiter(limits['requests_per_second'], limits['burst'])
+        return _limiters[provider]
@@ -0,0 +1,199 @@
+"""
+Per-run journal for resumable episode builds.
+
+Each run has a directory ``RUN_JOURNAL_DIR/<run_id>/`` holding one JSON file per
+completed step, written atomically as soon as the step finishes:
+
+    schema.json               which script's step format the journal holds
+    stories.json              the story list
+    articles/003.json         extracted text of story 3
+    summaries/003.json        summary and cost of story 3
+    wrap.json                 introduction, conclusion, title and description
+    audio/story_003/          audio chunks of a segment (the TTS driver marks each
+                              finished chunk, so a half-rendered segment resumes too)
+    audio/story_003.json      list of the segment's chunk files once it is complete
+
+Running again with the same run ID skips every step already in the journal, so a
+crash at story 9 costs only story 9 and what comes after it. Run IDs default to
+``<source>_<interval>_<MMDDYYYY>``, so rerunning the same command on the same day
+resumes; pass ``--run-id`` to resume another run or ``--fresh`` to start over.
+Scripts whose steps differ (a different story source, or a different shape of
+``wrap``) use their own source names and schema tags, and a journal written under
+another schema is refused rather than resumed.
+Runs older than ``RUN_JOURNAL_KEEP_DAYS`` are deleted when a new journal is opened.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+RUN_JOURNAL_DIR = os.getenv('RUN_JOURNAL_DIR', 'output/runs')
+RUN_JOURNAL_KEEP_DAYS = float(os.getenv('RUN_JOURNAL_KEEP_DAYS', '7'))
+
+
+def default_run_id(source: str, interval: str) -> str:
+    """
+    Run ID shared by every run of the same episode on the same day.
+
+    Args:
+        source (str): Story source, e.g. 'hn-issues'.
+        interval (str): Episode interval, e.g. 'daily'.
+
+    Returns:
+        str: The run ID, e.g. 'hn-issues_daily_09242024'.
+    """
+    return f"{source}_{interval}_{datetime.now().strftime('%m%d%Y')}"
+
+
+class RunJournal:
+    """
+    Completed steps of one episode run, persisted so a rerun can resume.
+
+    Args:
+        run_id (str): Identifies the run; reuse it to resume.
+        root (str): Directory holding all runs.
+        fresh (bool): Discard anything journaled under this run ID first.
+        schema (str | None): Format of the steps, e.g. 'hn-issues/1'; a journal written under
+            another schema raises ValueError.
+    """
+
+    def __init__(self, run_id: str, root: str = RUN_JOURNAL_DIR, fresh: bool = False, schema: str | None = None):
+        self.run_id = run_id
+        self.root = Path(root)
+        self.path = self.root / run_id
+        if fresh:
+            shutil.rmtree(self.path, ignore_errors=True)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.resumed = 0
+        self.completed = 0
+        if schema is not None:
+            self._check_schema(schema)
+        self.prune()
+
+    def _check_schema(self, schema: str) -> None:
+        journaled = self.get('schema')
+        if journaled is None and any(self.path.iterdir()):
+            journaled = 'untagged'
+        if journaled is None:
+            self._write('schema', schema)
+        elif journaled != schema:
+            raise ValueError(f"Run {self.run_id} was journaled in format {journaled!r}, not {schema!r}; "
+                             f"pass --fresh to start it over or --run-id to pick another run")
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def get(self, key: str) -> Any | None:
+        """
+        Read a journaled step.
+
+        Args:
+            key (str): Step name, e.g. 'stories' or 'summaries/003'.
+
+        Returns:
+            The step's value, or None if it has not completed.
+        """
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: Any) -> Any:
+        """
+        Journal a completed step.
+
+        Args:
+            key (str): Step name.
+            value: JSON-serializable result of the step.
+
+        Returns:
+            The value.
+        """
+        self._write(key, value)
+        with self._lock:
+            self.completed += 1
+        return value
+
+    def _write(self, key: str, value: Any) -> None:
+        path = self._file(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def step(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Return a step's journaled value, or run it and journal the result.
+
+        Args:
+            key (str): Step name.
+            func (callable): Zero-argument function computing a JSON-serializable value.
+
+        Returns:
+            The step's value.
+        """
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                self.resumed += 1
+            return value
+        return self.put(key, func())
+
+    def audio_dir(self, segment: str) -> Path:
+        """
+        Directory for a segment's audio chunks; it survives a crash so rendering can resume.
+
+        Args:
+            segment (str): Segment name, e.g. 'story_003' or 'intro'.
+
+        Returns:
+            Path: The directory (created if needed).
+        """
+        path = self.path / 'audio' / segment
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def audio(self, segment: str, render: Callable[[Path], list]) -> list[Path]:
+        """
+        Return a completed segment's chunk files, or render the segment into its audio directory.
+
+        Args:
+            segment (str): Segment name.
+            render (callable): ``render(out_dir) -> list[Path]`` synthesizing the segment.
+
+        Returns:
+            list[Path]: The segment's chunk files in order.
+        """
+        names = self.get(f"audio/{segment}")
+        if names is not None:
+            paths = [self.path / 'audio' / segment / name for name in names]
+            if all(path.exists() for path in paths):
+                with self._lock:
+                    self.resumed += 1
+                return paths
+        paths = [Path(path) for path in render(self.audio_dir(segment))]
+        self.put(f"audio/{segment}", [path.name for path in paths])
+        return paths
+
+    def prune(self) -> None:
+        """
+        Delete runs not touched for ``RUN_JOURNAL_KEEP_DAYS`` days.
+        """
+        cutoff = time.time() - RUN_JOURNAL_KEEP_DAYS * 86400
+        for run in self.root.iterdir():
+            if run.is_dir() and run != self.path and run.stat().st_mtime < cutoff:
+                shutil.rmtree(run, ignore_errors=True)
+
+    def print_summary(self) -> None:
+        """
+        Print how many steps were resumed from the journal and how many ran.
+        """
+        print(f"Run {self.run_id}: {self.resumed} steps resumed from the journal, {self.completed} completed "
+              f"(journal: {self.path})")
@@ -1,3 +1,7 @@
 #!/bin/bash
-python generate_summaries_hn.py daily 10
-python generate_podcast_unreal.py
\ No newline at end of file
+# Fetch, summarize and synthesize in one pipelined run
+python pipeline.py daily 10
+
+# Sequential equivalent:
+# python generate_summaries_hn.py daily 10
+# python generate_podcast_unreal.py
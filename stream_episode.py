@@ -0,0 +1,254 @@
+"""
+Streaming episode build: LLM tokens go straight to TTS.
+
+Each story's summary is streamed from the LLM into the sentence chunker, and every
+chunk the chunker releases is sent to TTS right away (``iter_stream_chunks`` keeps
+the first chunk short), so the first audio exists a few seconds after the first
+summary starts instead of after every summary, the introduction and the
+conclusion have been written. Once the stories are summarized, the introduction
+and conclusion are streamed to TTS the same way, concurrently, while the title and
+description are generated alongside. Stories, articles and summaries go through
+the run journal, and each segment renders into its journal audio directory, so a
+rerun resumes like ``pipeline.py`` (already rendered chunks are recognized by
+their markers).
+
+The run reports the time to first audio (the first chunk of any segment on disk),
+when the episode's opening became available, and the total wall time.
+
+Run: python stream_episode.py <interval> <num_stories> [--provider unreal] [--fallback openai]
+     [--summarize-workers N] [--tts-workers N] [--run-id ID] [--fresh]
+"""
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from article_cache import get_article_cache
+from clients import print_connection_stats
+from generate_summaries_hn import (JOURNAL_SCHEMA, RUN_SOURCE, WRAP_KEYS, fetch_hn_top_stories, journaled_article,
+                                   stream_intro_and_conclusion, summarize_content, write_outputs)
+from near_dup_index import get_near_dup_index, summarize_once
+from run_journal import RunJournal, default_run_id
+from summary_cache import get_summary_cache
+from text_segmentation import iter_stream_chunks
+from tts_backends import TTS_FALLBACK, HedgedSynthesizer, TTSBackend, backend_names, chunk_chars, get_backend
+from tts_cache import get_tts_cache
+
+
+class AudioClock:
+    """
+    Time to first audio of a run, overall and per segment.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.first_audio = None
+        self.segments = {}
+
+    def audio(self, segment: str) -> None:
+        """
+        Record that a chunk of a segment has been written.
+
+        Args:
+            segment (str): Segment name, e.g. 'story_000' or 'intro'.
+        """
+        elapsed = time.perf_counter() - self.start
+        with self._lock:
+            self.first_audio = elapsed if self.first_audio is None else self.first_audio
+            self.segments.setdefault(segment, elapsed)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+class SpokenStream:
+    """
+    Text written piece by piece and spoken chunk by chunk as its sentences complete.
+
+    Args:
+        segment (str): Segment name, for timing.
+        out_dir: Directory for the segment's chunk files.
+        synthesizer (HedgedSynthesizer): TTS driver shared by the run's segments.
+        max_chars (int): Largest chunk the providers accept.
+        clock (AudioClock): Records when the segment's first audio is written.
+    """
+
+    def __init__(self, segment: str, out_dir, synthesizer: HedgedSynthesizer, max_chars: int, clock: AudioClock):
+        self.segment = segment
+        self.written = False
+        self._pieces = queue.Queue()
+        self._paths = []
+        self._error = None
+        chunks = iter_stream_chunks(self._read(), max_chars)
+        self._thread = threading.Thread(target=self._render, args=(synthesizer, chunks, out_dir, clock),
+                                        name=f"speak-{segment}", daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        while True:
+            piece = self._pieces.get()
+            if piece is None:
+                return
+            yield piece
+
+    def _render(self, synthesizer: HedgedSynthesizer, chunks, out_dir, clock: AudioClock) -> None:
+        try:
+            self._paths = synthesizer.run(chunks, out_dir, lambda index, path: clock.audio(self.segment))
+        except BaseException as e:
+            self._error = e
+
+    def write(self, text: str) -> None:
+        """
+        Add text to the segment; complete chunks are sent to TTS as they form.
+
+        Args:
+            text (str): The next piece of text.
+        """
+        if text:
+            self.written = True
+            self._pieces.put(text)
+
+    def close(self) -> list[Path]:
+        """
+        End the segment and wait for its audio.
+
+        Returns:
+            list[Path]: The segment's chunk files in order.
+        """
+        self._pieces.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._paths
+
+
+def run_streaming(interval: str, num_stories: int, backend: TTSBackend, fallback: TTSBackend | None = None,
+                  summarize_workers: int = 4, tts_workers: int = 2, run_id: str | None = None,
+                  fresh: bool = False) -> str | None:
+    """
+    Build an episode with summaries, introduction and conclusion streamed into TTS.
+
+    Args:
+        interval (str): 'daily' or 'weekly'.
+        num_stories (int): Number of stories in the episode.
+        backend (TTSBackend): TTS provider.
+        fallback (TTSBackend | None): Provider for hedged TTS requests.
+        summarize_workers (int): Stories summarized (and spoken) concurrently.
+        tts_workers (int): TTS requests in flight per segment.
+        run_id (str | None): Run to resume; defaults to today's run for the interval.
+        fresh (bool): Ignore anything journaled under the run ID.
+
+    Returns:
+        str | None: Path of the episode MP3, or None if every story was already covered.
+    """
+    from audio_post import assemble_episode
+
+    clock = AudioClock()
+    journal = RunJournal(run_id or default_run_id(RUN_SOURCE, interval), fresh=fresh,
+                         schema=JOURNAL_SCHEMA)
+    synthesizer = HedgedSynthesizer(backend, fallback, tts_workers)
+    max_chars = chunk_chars(backend, fallback)
+
+    def speaker(segment: str) -> SpokenStream:
+        return SpokenStream(segment, journal.audio_dir(segment), synthesizer, max_chars, clock)
+
+    def speak(rank: int, story: dict) -> tuple[dict | None, float, list[Path]]:
+        content = journaled_article(journal, rank, story)
+        stream = speaker(f"story_{rank:03d}")
+        try:
+            def summarize():
+                summary, cost = summarize_once(story['title'], story['url'], content,
+                                               lambda title, url, text: summarize_content(title, url, text,
+                                                                                          on_text=stream.write),
+                                               journal.run_id)
+                return {'summary': summary, 'cost': cost}
+
+            result = journal.step(f"summaries/{rank:03d}", summarize)
+            # Journaled and reused summaries were not streamed; speak them whole
+            if result['summary'] is not None and not stream.written:
+                stream.write(result['summary']['Summary'])
+        finally:
+            paths = stream.close()
+        return result['summary'], result['cost'], paths
+
+    stories = journal.step('stories', lambda: fetch_hn_top_stories(num_stories, interval))
+    results, failed = {}, []
+    with ThreadPoolExecutor(max_workers=summarize_workers) as executor:
+        futures = {rank: executor.submit(speak, rank, story) for rank, story in enumerate(stories)}
+        for rank, future in futures.items():
+            try:
+                results[rank] = future.result()
+            except Exception as e:
+                print(f"Story {rank + 1} ('{stories[rank]['title']}') failed: {e}")
+                failed.append(rank + 1)
+    if failed:
+        journal.print_summary()
+        raise RuntimeError(f"Stories {failed} failed; rerun with --run-id {journal.run_id} to resume")
+    summaries_done = clock.elapsed()
+
+    ranks = [rank for rank in sorted(results) if results[rank][0] is not None]
+    summaries = [results[rank][0] for rank in ranks]
+    tot_cost = sum(cost for _, cost, _ in results.values())
+    if not summaries:
+        print("Every story was already covered in a recent episode; nothing to publish")
+        journal.print_summary()
+        return None
+
+    intro_stream, conclu_stream = speaker('intro'), speaker('conclusion')
+    try:
+        wrap = journal.step('wrap', lambda: dict(zip(WRAP_KEYS, stream_intro_and_conclusion(
+            summaries, interval, intro_stream.write, conclu_stream.write))))
+        if not intro_stream.written:
+            intro_stream.write(wrap['intro'])
+        if not conclu_stream.written:
+            conclu_stream.write(wrap['conclusion'])
+    finally:
+        intro_files = intro_stream.close()
+        conclu_files = conclu_stream.close()
+    tot_cost += wrap['cost']
+    wrap_done = clock.elapsed()
+
+    content = ''.join(f"{summary['Summary']}\n\n" for summary in summaries)
+    combined_text = f"{wrap['intro']}\n\n{content}\n\n{wrap['conclusion']}"
+    transcript_file, _ = write_outputs(summaries, combined_text, wrap['title'], wrap['description'],
+                                       interval)
+    output_file = transcript_file.replace('.txt', '.mp3')
+    audio_files = intro_files + [path for rank in ranks for path in results[rank][2]] + conclu_files
+    mode = assemble_episode(audio_files, output_file)
+
+    wall_time = clock.elapsed()
+    synthesizer.print_stats()
+    get_tts_cache().print_stats()
+    first_audio = f"{clock.first_audio:.1f}s" if clock.first_audio is not None else "n/a"
+    opening = f"{clock.segments['intro']:.1f}s" if 'intro' in clock.segments else "n/a"
+    print(f"Time to first audio: {first_audio}; episode opening (intro) ready at {opening}")
+    print(f"Summaries spoken by {summaries_done:.1f}s, intro and conclusion by {wrap_done:.1f}s, "
+          f"episode assembled ({mode}) in {wall_time:.1f}s wall time")
+    print(f"Total estimated cost: ${tot_cost:.4f}")
+    journal.print_summary()
+    get_summary_cache().print_stats()
+    get_near_dup_index().print_stats()
+    get_article_cache().print_stats()
+    print_connection_stats()
+    print(f"Podcast saved to {output_file}")
+    return output_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a Hackerpulse episode with LLM output streamed into TTS.")
+    parser.add_argument('interval', choices=['daily', 'weekly'])
+    parser.add_argument('num_stories', type=int)
+    parser.add_argument('--provider', default='unreal', choices=backend_names())
+    parser.add_argument('--fallback', default=TTS_FALLBACK, choices=backend_names(),
+                        help="Provider raced against slow or failed requests")
+    parser.add_argument('--summarize-workers', type=int, default=4)
+    parser.add_argument('--tts-workers', type=int, default=2)
+    parser.add_argument('--run-id', help="Resume this run (default: today's run for the interval)")
+    parser.add_argument('--fresh', action='store_true', help="Start the run over instead of resuming")
+    args = parser.parse_args()
+    fallback = get_backend(args.fallback) if args.fallback else None
+    run_streaming(args.interval, args.num_stories, get_backend(args.provider), fallback, args.summarize_workers,
+                  args.tts_workers, args.run_id, args.fresh)
@@ -0,0 +1,133 @@
+"""
+SQLite-backed memoization of LLM summaries.
+
+Summaries are keyed by (content hash, prompt hash, model), so re-rendering an
+episode over unchanged articles costs nothing. Entries expire after a TTL and the
+least recently used entries are evicted once the table grows past its cap.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SUMMARY_CACHE_PATH = os.getenv('SUMMARY_CACHE_PATH', 'cache/summaries.sqlite')
+SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', str(30 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '20000'))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent summary cache.
+
+    Args:
+        path (str): SQLite database file.
+        ttl (float): Seconds after which an entry is considered stale.
+        max_entries (int): Number of entries kept before least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str = SUMMARY_CACHE_PATH, ttl: float = SUMMARY_CACHE_TTL,
+                 max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                content_hash TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                cost REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, prompt_hash, model)
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+        self.stats = {'hits': 0, 'misses': 0, 'saved_cost': 0.0, 'miss_cost': 0.0}
+
+    def get(self, content: str, prompt: str, model: str) -> str | None:
+        """
+        Look up a cached summary.
+
+        Args:
+            content (str): The content sent to the model.
+            prompt (str): The system prompt.
+            model (str): The model name.
+
+        Returns:
+            str | None: The cached summary, or None on a miss.
+        """
+        key = (_sha256(content), _sha256(prompt), model)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, cost, created_at FROM summaries "
+                "WHERE content_hash = ? AND prompt_hash = ? AND model = ?", key).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                self.stats['misses'] += 1
+                return None
+            self._conn.execute(
+                "UPDATE summaries SET last_used = ? "
+                "WHERE content_hash = ? AND prompt_hash = ? AND model = ?", (now, *key))
+            self._conn.commit()
+            self.stats['hits'] += 1
+            self.stats['saved_cost'] += row[1]
+            return row[0]
+
+    def put(self, content: str, prompt: str, model: str, summary: str, cost: float) -> None:
+        """
+        Store a summary and evict expired or least recently used entries.
+
+        Args:
+            content (str): The content sent to the model.
+            prompt (str): The system prompt.
+            model (str): The model name.
+            summary (str): The model's summary.
+            cost (float): Estimated cost of the call that produced the summary.
+        """
+        now = time.time()
+        with self._lock:
+            self.stats['miss_cost'] += cost
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_sha256(content), _sha256(prompt), model, summary, cost, now, now))
+            self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM summaries WHERE rowid IN ("
+                "SELECT rowid FROM summaries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+            self._conn.commit()
+
+    def print_stats(self) -> None:
+        """
+        Print cache hits and misses with the cost of each.
+        """
+        stats = self.stats
+        print(f"Summary cache: {stats['hits']} hits (saved ${stats['saved_cost']:.4f}), "
+              f"{stats['misses']} misses (cost ${stats['miss_cost']:.4f})")
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """
+    Get the process-wide summary cache configured from the environment.
+
+    Returns:
+        SummaryCache: The shared cache.
+    """
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache()
+        return _summary_cache
@@ -0,0 +1,283 @@
+"""
+Shared sentence splitting and TTS chunking.
+
+Everything here runs in time linear in the input: text is scanned once as
+alternating runs of whitespace and non-whitespace, a sentence ends at a token
+ending in ``.``, ``!`` or ``?`` (optionally followed by closing quotes or
+brackets), and chunks are packed greedily up to a per-provider character limit.
+Sentences longer than the limit are split at word boundaries, and single words
+longer than the limit are cut. Input may be a string or any iterable of string
+pieces (file blocks, streamed LLM tokens), and output is produced lazily, so large
+transcripts are never held as intermediate lists. For text that is still being
+generated, ``iter_stream_chunks`` releases a short first chunk and lets later
+chunks grow, so speech can start before the text is complete.
+"""
+import re
+from typing import Iterable, Iterator
+
+# Target characters per TTS request for each provider
+PROVIDER_CHUNK_CHARS = {
+    'openai': 1000,
+    'unreal': 950,
+    'elevenlabs': 2500,
+    'coqui': 1000,
+}
+DEFAULT_CHUNK_CHARS = 1000
+# First chunk of streamed text; later chunks double in size up to the provider limit
+STREAM_FIRST_CHUNK_CHARS = 200
+
+SENTENCE_END = '.!?'
+CLOSING = '"\')]}”’'
+# Sentence-final punctuation plus closing quotes/brackets, followed by whitespace.
+# The punctuation and closing classes are disjoint, so every character is examined a
+# bounded number of times and the scan is linear.
+BOUNDARY_PATTERN = re.compile(f"[{re.escape(SENTENCE_END)}][{re.escape(CLOSING)}]*(?=\\s)")
+# Continuation of a boundary started in the previous piece
+LEADING_BOUNDARY_PATTERN = re.compile(f"[{re.escape(CLOSING)}]*(?=\\s)")
+
+
+def chunk_limit(provider: str) -> int:
+    """
+    Get the chunk size for a TTS provider.
+
+    Args:
+        provider (str): Provider name.
+
+    Returns:
+        int: Maximum characters per chunk.
+    """
+    return PROVIDER_CHUNK_CHARS.get(provider, DEFAULT_CHUNK_CHARS)
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence splitter.
+
+    Feed it text in pieces of any size; it returns sentences as soon as they are
+    complete. A sentence is only known to be complete once whitespace follows its
+    final punctuation, so the last sentence is returned by ``flush``. Whitespace
+    inside a sentence is collapsed to single spaces.
+
+    Args:
+        max_sentence_chars (int | None): Emit buffered text early, at the last word
+            boundary, once it grows past this many characters. Keeps memory bounded on
+            long unpunctuated text.
+    """
+
+    def __init__(self, max_sentence_chars: int | None = None):
+        self.max_sentence_chars = max_sentence_chars
+        self._parts = []
+        self._length = 0
+        # Whether the buffered text ends in punctuation (plus closing quotes/brackets)
+        # that becomes a boundary if the next piece starts with whitespace
+        self._tail_ends = False
+
+    def _emit(self, sentences: list) -> None:
+        sentence = ' '.join(''.join(self._parts).split())
+        self._parts = []
+        self._length = 0
+        if sentence:
+            sentences.append(sentence)
+
+    def _emit_overflow(self, sentences: list) -> None:
+        text = ''.join(self._parts)
+        if text[-1].isspace():
+            self._parts = [text]
+            self._emit(sentences)
+            return
+        # Keep the trailing partial word; the next piece may continue it
+        head_tail = text.rsplit(None, 1)
+        self._parts = [head_tail[0]]
+        self._emit(sentences)
+        if len(head_tail) == 2:
+            self._parts = [head_tail[1]]
+            self._length = len(head_tail[1])
+
+    def feed(self, piece: str) -> list[str]:
+        """
+        Add text and collect the sentences it completes.
+
+        Args:
+            piece (str): The next piece of text.
+
+        Returns:
+            list[str]: Sentences completed by this piece.
+        """
+        sentences = []
+        if not piece:
+            return sentences
+        pos = 0
+        if self._tail_ends:
+            match = LEADING_BOUNDARY_PATTERN.match(piece)
+            if match is not None:
+                self._parts.append(piece[:match.end()])
+                self._emit(sentences)
+                pos = match.end()
+        for match in BOUNDARY_PATTERN.finditer(piece, pos):
+            self._parts.append(piece[pos:match.end()])
+            self._emit(sentences)
+            pos = match.end()
+        if pos < len(piece):
+            self._parts.append(piece[pos:])
+            self._length += len(piece) - pos
+
+        stripped = piece.rstrip(CLOSING)
+        if stripped:
+            self._tail_ends = stripped[-1] in SENTENCE_END
+        if self.max_sentence_chars and self._length >= self.max_sentence_chars:
+            self._emit_overflow(sentences)
+        return sentences
+
+    def flush(self) -> str | None:
+        """
+        Return whatever text is left as the final sentence.
+
+        Returns:
+            str | None: The last sentence, or None if nothing is buffered.
+        """
+        sentences = []
+        self._emit(sentences)
+        self._tail_ends = False
+        return sentences[0] if sentences else None
+
+
+def _pieces(text: str | Iterable[str]) -> Iterable[str]:
+    return (text,) if isinstance(text, str) else text
+
+
+def iter_sentences(text: str | Iterable[str], max_sentence_chars: int | None = None) -> Iterator[str]:
+    """
+    Split text into sentences lazily, in linear time.
+
+    Args:
+        text (str | Iterable[str]): The text, whole or in pieces.
+        max_sentence_chars (int | None): Break sentences longer than this at a word boundary.
+
+    Yields:
+        str: The sentences, in order.
+    """
+    splitter = SentenceSplitter(max_sentence_chars)
+    for piece in _pieces(text):
+        yield from splitter.feed(piece)
+    sentence = splitter.flush()
+    if sentence is not None:
+        yield sentence
+
+
+def _split_long(sentence: str, max_chars: int) -> Iterator[str]:
+    # Split at the last space within each window; words longer than max_chars are cut
+    pos, length = 0, len(sentence)
+    while length - pos > max_chars:
+        cut = sentence.rfind(' ', pos, pos + max_chars + 1)
+        if cut <= pos:
+            yield sentence[pos:pos + max_chars]
+            pos += max_chars
+            if sentence[pos] == ' ':
+                pos += 1
+        else:
+            yield sentence[pos:cut]
+            pos = cut + 1
+    if pos < length:
+        yield sentence[pos:]
+
+
+def pack_sentences(sentences: Iterable[str], max_chars: int) -> Iterator[str]:
+    """
+    Pack sentences greedily into chunks of at most ``max_chars`` characters.
+
+    Args:
+        sentences (Iterable[str]): Sentences in order.
+        max_chars (int): Maximum characters per chunk, including separating spaces.
+
+    Yields:
+        str: The chunks, in order.
+    """
+    parts = []
+    length = 0
+    for sentence in sentences:
+        pieces = _split_long(sentence, max_chars) if len(sentence) > max_chars else (sentence,)
+        for piece in pieces:
+            added = len(piece) + (1 if parts else 0)
+            if parts and length + added > max_chars:
+                yield ' '.join(parts)
+                parts, length, added = [], 0, len(piece)
+            parts.append(piece)
+            length += added
+    if parts:
+        yield ' '.join(parts)
+
+
+def iter_chunks(text: str | Iterable[str], max_chars: int | None = None, provider: str | None = None) -> Iterator[str]:
+    """
+    Split text into TTS-sized chunks of whole sentences, lazily and in linear time.
+
+    Args:
+        text (str | Iterable[str]): The text, whole or in pieces.
+        max_chars (int | None): Maximum characters per chunk.
+        provider (str | None): Take ``max_chars`` from the provider's limit if not given.
+
+    Yields:
+        str: The chunks, in order.
+    """
+    if max_chars is None:
+        max_chars = chunk_limit(provider) if provider else DEFAULT_CHUNK_CHARS
+    return pack_sentences(iter_sentences(text, max_sentence_chars=max_chars), max_chars)
+
+
+def pack_sentences_eagerly(sentences: Iterable[str], max_chars: int,
+                           first_chars: int = STREAM_FIRST_CHUNK_CHARS) -> Iterator[str]:
+    """
+    Pack sentences into chunks that are released as soon as they are long enough.
+
+    ``pack_sentences`` holds a chunk until the sentence that would overflow it
+    arrives, which for streamed text means waiting for most of the text. Here a
+    chunk is yielded once it reaches a target size that starts at ``first_chars``
+    and doubles with every chunk up to ``max_chars``: the first chunk can be spoken
+    after a sentence or two, at the cost of a few more, shorter requests.
+
+    Args:
+        sentences (Iterable[str]): Sentences in order.
+        max_chars (int): Maximum characters per chunk, including separating spaces.
+        first_chars (int): Target size of the first chunk.
+
+    Yields:
+        str: The chunks, in order.
+    """
+    target = min(first_chars, max_chars)
+    parts = []
+    length = 0
+    for sentence in sentences:
+        pieces = _split_long(sentence, max_chars) if len(sentence) > max_chars else (sentence,)
+        for piece in pieces:
+            added = len(piece) + (1 if parts else 0)
+            if parts and length + added > max_chars:
+                yield ' '.join(parts)
+                parts, length, added = [], 0, len(piece)
+                target = min(target * 2, max_chars)
+            parts.append(piece)
+            length += added
+            if length >= target:
+                yield ' '.join(parts)
+                parts, length = [], 0
+                target = min(target * 2, max_chars)
+    if parts:
+        yield ' '.join(parts)
+
+
+def iter_stream_chunks(text: str | Iterable[str], max_chars: int | None = None, provider: str | None = None,
+                       first_chars: int = STREAM_FIRST_CHUNK_CHARS) -> Iterator[str]:
+    """
+    Split streamed text into TTS chunks, releasing each one as early as possible.
+
+    Args:
+        text (str | Iterable[str]): The text, whole or in pieces (e.g. LLM tokens as they arrive).
+        max_chars (int | None): Maximum characters per chunk.
+        provider (str | None): Take ``max_chars`` from the provider's limit if not given.
+        first_chars (int): Target size of the first chunk; later chunks double up to ``max_chars``.
+
+    Yields:
+        str: The chunks, in order.
+    """
+    if max_chars is None:
+        max_chars = chunk_limit(provider) if provider else DEFAULT_CHUNK_CHARS
+    return pack_sentences_eagerly(iter_sentences(text, max_sentence_chars=max_chars), max_chars, first_chars)
@@ -0,0 +1,207 @@
+"""
+Token-budgeted summarization.
+
+Article text is counted in tokens before it is sent to the model. Text within the
+budget is summarized in one call; text slightly over it is truncated; text well
+over it is map-reduced: chunks are summarized concurrently and the partial
+summaries are combined with the original prompt in one final call. At most
+``MAX_MAP_CHUNKS`` chunks are summarized, which caps the cost of one article; text
+past them is dropped and reported in the stats. The final call
+can be streamed, so the summary can be spoken while it is still being written.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a characters-per-token estimate
+    tiktoken = None
+
+# Tokens of article text sent to the model in a single call
+SUMMARY_INPUT_TOKENS = int(os.getenv('SUMMARY_INPUT_TOKENS', '4000'))
+# Articles up to this factor over budget are truncated instead of map-reduced
+TRUNCATE_SLACK = float(os.getenv('SUMMARY_TRUNCATE_SLACK', '1.25'))
+MAP_CONCURRENCY = int(os.getenv('SUMMARY_MAP_CONCURRENCY', '4'))
+MAX_MAP_CHUNKS = int(os.getenv('SUMMARY_MAX_MAP_CHUNKS', '8'))
+CHARS_PER_TOKEN = 4
+
+MAP_PROMPT = ("Summarize the following part of a longer article in less than 120 words. "
+              "Keep the concrete facts, names and numbers.")
+
+_encodings = {}
+
+
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding('o200k_base')
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens in a text for a model.
+
+    Args:
+        text (str): The text to count.
+        model (str): The model name.
+
+    Returns:
+        int: Number of tokens (estimated from the length if tiktoken is not installed).
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_tokens(text: str, chunk_tokens: int, model: str) -> list[str]:
+    """
+    Split a text into pieces of at most ``chunk_tokens`` tokens.
+
+    Args:
+        text (str): The text to split.
+        chunk_tokens (int): Maximum tokens per piece.
+        model (str): The model name.
+
+    Returns:
+        list[str]: The pieces, in order.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        step = chunk_tokens * CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + chunk_tokens]) for i in range(0, len(tokens), chunk_tokens)]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Truncate a text to at most ``max_tokens`` tokens.
+
+    Args:
+        text (str): The text to truncate.
+        max_tokens (int): Maximum number of tokens to keep.
+        model (str): The model name.
+
+    Returns:
+        str: The truncated text.
+    """
+    pieces = split_tokens(text, max_tokens, model)
+    return pieces[0] if pieces else text
+
+
+def _complete(client, model: str, system_prompt: str, user_content: str,
+              on_text: Callable[[str], None] | None = None):
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content}
+    ]
+    if on_text is None:
+        response = client.chat.completions.create(model=model, messages=messages)
+        return response.choices[0].message.content, response.usage
+    return stream_completion(client, model, messages, on_text)
+
+
+def stream_completion(client, model: str, messages: list[dict], on_text: Callable[[str], None]):
+    """
+    Run a chat completion with streaming, passing each piece of text on as it arrives.
+
+    Args:
+        client: The OpenAI client.
+        model (str): The model name.
+        messages (list[dict]): The chat messages.
+        on_text (callable): Called with each piece of the response text.
+
+    Returns:
+        tuple: The full response text and the usage reported at the end of the stream.
+    """
+    stream = client.chat.completions.create(model=model, messages=messages, stream=True,
+                                            stream_options={"include_usage": True})
+    parts = []
+    usage = None
+    for chunk in stream:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            on_text(chunk.choices[0].delta.content)
+    return ''.join(parts), usage
+
+
+def summarize_with_budget(client, model: str, prompt: str, header: str, content: str,
+                          budget: int = SUMMARY_INPUT_TOKENS,
+                          on_text: Callable[[str], None] | None = None) -> tuple[str, dict]:
+    """
+    Summarize article text within a token budget.
+
+    Args:
+        client: The OpenAI client.
+        model (str): The model name.
+        prompt (str): System prompt for the final summary.
+        header (str): Text placed before the content, e.g. title and URL lines.
+        content (str): The article text.
+        budget (int): Maximum tokens of article text per call.
+        on_text (callable | None): If given, the final summary call is streamed and this is
+            called with each piece of the summary as it arrives.
+
+    Returns:
+        tuple[str, dict]: The summary, and stats with the mode ('single', 'truncated' or
+        'map_reduce'), number of calls, content/prompt/completion/total tokens, article tokens
+        left out ('dropped_tokens', by truncation or past ``MAX_MAP_CHUNKS``) and latency.
+    """
+    start = time.perf_counter()
+    content_tokens = count_tokens(content, model)
+    stats = {'mode': 'single', 'calls': 0, 'content_tokens': content_tokens, 'dropped_tokens': 0,
+             'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+
+    def record(usage) -> None:
+        stats['calls'] += 1
+        stats['prompt_tokens'] += usage.prompt_tokens
+        stats['completion_tokens'] += usage.completion_tokens
+        stats['total_tokens'] += usage.total_tokens
+
+    if content_tokens > budget * TRUNCATE_SLACK:
+        stats['mode'] = 'map_reduce'
+        chunks = split_tokens(content, budget, model)
+        if len(chunks) > MAX_MAP_CHUNKS:
+            stats['dropped_tokens'] = sum(count_tokens(chunk, model) for chunk in chunks[MAX_MAP_CHUNKS:])
+            chunks = chunks[:MAX_MAP_CHUNKS]
+        with ThreadPoolExecutor(max_workers=MAP_CONCURRENCY) as executor:
+            results = list(executor.map(lambda chunk: _complete(client, model, MAP_PROMPT, f"{header}Content:{chunk}"),
+                                        chunks))
+        for _, usage in results:
+            record(usage)
+        content = '\n\n'.join(partial for partial, _ in results)
+    elif content_tokens > budget:
+        stats['mode'] = 'truncated'
+        content = truncate_to_tokens(content, budget, model)
+        stats['dropped_tokens'] = content_tokens - count_tokens(content, model)
+
+    summary, usage = _complete(client, model, prompt, f"{header}Content:{content}", on_text)
+    record(usage)
+    stats['latency'] = time.perf_counter() - start
+    return summary, stats
+
+
+def format_stats(title: str, stats: dict) -> str:
+    """
+    Format per-article summarization stats as one line.
+
+    Args:
+        title (str): The article title.
+        stats (dict): Stats returned by ``summarize_with_budget``.
+
+    Returns:
+        str: The formatted line.
+    """
+    dropped = f" ({stats['dropped_tokens']} dropped)" if stats.get('dropped_tokens') else ""
+    return (f"{title[:60]}: {stats['mode']}, {stats['content_tokens']} article tokens{dropped}, "
+            f"{stats['calls']} calls, {stats['prompt_tokens']} prompt + {stats['completion_tokens']} "
+            f"completion tokens, {stats['latency']:.1f}s")
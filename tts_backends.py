@@ -0,0 +1,704 @@
+"""
+Pluggable TTS backends and a concurrent, hedged synthesis driver.
+
+Each provider (OpenAI, UnrealSpeech, ElevenLabs, Coqui) is a ``TTSBackend`` that
+renders one chunk of text to one audio file; backends register themselves by name
+so scripts and the CLI can pick them with a string. ``synthesize_chunks`` renders
+chunks concurrently through the shared rate limiter, retry and TTS cache layers.
+Given a fallback backend, it hedges: when a chunk's request to the primary has
+not finished within the hedge threshold (or has failed), a duplicate request is
+sent to the fallback, and whichever finishes first is kept. The threshold is
+``TTS_HEDGE_AFTER`` seconds, or by default twice the median primary latency seen
+so far in the run, so only the slow tail is duplicated. Each finished chunk is
+marked in the output directory, so rendering into the same directory again (after
+a crash, say) only synthesizes the chunks that are missing.
+
+The ``fake`` and ``fake_flaky`` backends write silent MP3 audio after a simulated
+delay, for trying out concurrency, hedging and assembly without API keys.
+
+Run: python tts_backends.py transcript.txt [--provider openai] [--fallback unreal] [--output episode.mp3]
+"""
+import argparse
+import hashlib
+import importlib.util
+import os
+import queue
+import random
+import statistics
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+from rate_limiter import call_with_retry, get_rate_limiter
+from text_segmentation import chunk_limit, iter_chunks
+from tts_cache import get_tts_cache
+from tts_ledger import get_tts_ledger
+
+# Number of chunks synthesized concurrently
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', '4'))
+# Provider for duplicate requests when the primary is slow or failing (none by default)
+TTS_FALLBACK = os.getenv('TTS_FALLBACK') or None
+# Fixed hedge threshold in seconds; adaptive when unset
+TTS_HEDGE_AFTER = float(os.getenv('TTS_HEDGE_AFTER')) if os.getenv('TTS_HEDGE_AFTER') else None
+# Adaptive threshold: a multiple of the median primary latency, within bounds
+HEDGE_LATENCY_FACTOR = 2.0
+HEDGE_MIN_SECONDS = 1.0
+HEDGE_MIN_SAMPLES = 3
+# Threshold used until enough primary requests have finished to estimate the median
+HEDGE_INITIAL_SECONDS = 30.0
+
+_backends = {}
+
+
+def register_backend(cls):
+    """
+    Class decorator adding a backend to the registry under its ``name``.
+    """
+    _backends[cls.name] = cls
+    return cls
+
+
+def get_backend(name: str, **options) -> 'TTSBackend':
+    """
+    Create a registered backend.
+
+    Args:
+        name (str): Provider name, e.g. 'openai' or 'unreal'.
+        **options: Passed to the backend's constructor (e.g. voice).
+
+    Returns:
+        TTSBackend: The backend.
+    """
+    if name not in _backends:
+        raise ValueError(f"Unknown TTS provider {name!r}; choose from {', '.join(backend_names())}")
+    return _backends[name](**options)
+
+
+def backend_names() -> list[str]:
+    """
+    Names of the registered backends.
+
+    Returns:
+        list[str]: Provider names, sorted.
+    """
+    return sorted(_backends)
+
+
+class TTSBackend:
+    """
+    Base class for TTS providers.
+
+    Subclasses set ``name`` (which also selects the rate limiter and chunk limit)
+    and ``extension``, and implement ``synthesize``. ``voice``, ``model`` and
+    ``bitrate`` identify the rendition in the TTS cache.
+
+    Args:
+        voice (str): Provider voice.
+        model (str): Provider model.
+        bitrate (str): Requested bitrate, if the provider takes one.
+    """
+
+    name = ''
+    extension = 'mp3'
+
+    def __init__(self, voice: str = '', model: str = '', bitrate: str = ''):
+        self.voice = voice
+        self.model = model
+        self.bitrate = bitrate
+
+    @property
+    def chunk_chars(self) -> int:
+        return chunk_limit(self.name)
+
+    def cache_key(self) -> tuple[str, str, str, str]:
+        return self.name, self.voice, self.model, self.bitrate
+
+    @classmethod
+    def available(cls) -> bool:
+        """
+        Whether the provider can be used here (credentials set, model installed).
+        """
+        return True
+
+    def synthesize(self, text: str, output_path: Path) -> None:
+        """
+        Render one chunk of text to an audio file.
+
+        Args:
+            text (str): The chunk, within ``chunk_chars``.
+            output_path (Path): File to write.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}(voice={self.voice!r})"
+
+
+@register_backend
+class OpenAIBackend(TTSBackend):
+    """
+    OpenAI speech API; the default voice changes with the day of the week.
+    """
+
+    name = 'openai'
+    # 0 = Monday, 1 = Tuesday, ..., 6 = Sunday
+    VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer", "echo"]
+
+    def __init__(self, voice: str | None = None, model: str = 'tts-1'):
+        super().__init__(voice or self.VOICES[datetime.today().weekday()], model)
+
+    @classmethod
+    def available(cls):
+        return bool(os.getenv('OPENAI_API_KEY'))
+
+    def synthesize(self, text, output_path):
+        from clients import get_openai_client
+
+        with get_openai_client().audio.speech.with_streaming_response.create(
+                model=self.model, voice=self.voice, input=text) as response:
+            # Stream the response content to a file
+            with open(output_path, 'wb') as f:
+                for data in response.iter_bytes():
+                    f.write(data)
+
+
+@register_backend
+class UnrealBackend(TTSBackend):
+    """
+    UnrealSpeech streaming API; the SDK is imported and the client created on first use.
+    """
+
+    name = 'unreal'
+    _api = None
+    _api_lock = threading.Lock()
+
+    def __init__(self, voice: str = 'Liv', bitrate: str = '192k'):
+        super().__init__(voice, bitrate=bitrate)
+
+    @classmethod
+    def available(cls):
+        return bool(os.getenv('UNREAL_API_KEY')) and importlib.util.find_spec('unrealspeech') is not None
+
+    @classmethod
+    def speech_api(cls):
+        with cls._api_lock:
+            if cls._api is None:
+                from unrealspeech import UnrealSpeechAPI
+                cls._api = UnrealSpeechAPI(os.getenv('UNREAL_API_KEY'))
+            return cls._api
+
+    def synthesize(self, text, output_path):
+        from unrealspeech import save
+
+        save(self.speech_api().stream(text=text, voice_id=self.voice, bitrate=self.bitrate), str(output_path))
+
+
+@register_backend
+class ElevenLabsBackend(TTSBackend):
+    """
+    ElevenLabs text-to-speech API over the shared HTTP session.
+    """
+
+    name = 'elevenlabs'
+    URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice}"
+
+    def __init__(self, voice: str = 'onwK4e9ZLuTAKqWW03F9', stability: float = 0.5, similarity_boost: float = 0.75):
+        super().__init__(voice)
+        self.voice_settings = {"stability": stability, "similarity_boost": similarity_boost}
+
+    @classmethod
+    def available(cls):
+        return bool(os.getenv('ELEVENLABS_API_KEY'))
+
+    def synthesize(self, text, output_path):
+        from clients import get_session
+
+        headers = {'xi-api-key': os.getenv('ELEVENLABS_API_KEY'), 'Content-Type': 'application/json'}
+        response = get_session().post(self.URL.format(voice=self.voice), headers=headers, timeout=(10, 120),
+                                      json={"text": text, "voice_settings": self.voice_settings})
+        # HTTPError keeps the response, so 429s and Retry-After reach the rate limiter
+        response.raise_for_status()
+        output_path.write_bytes(response.content)
+
+
+@register_backend
+class CoquiBackend(TTSBackend):
+    """
+    Local Coqui XTTS, on the warm ``tts_worker`` daemon if one is running, else in-process.
+
+    Args:
+        voice (str): Reference recording for voice cloning.
+        language (str): Language code.
+    """
+
+    name = 'coqui'
+    extension = 'wav'
+    _engine = None
+    _engine_lock = threading.Lock()
+
+    def __init__(self, voice: str | None = None, language: str = 'en'):
+        import tts_worker
+
+        super().__init__(voice or os.getenv('TTS_SPEAKER_WAV', "samples_en_sample.wav"), tts_worker.TTS_WORKER_MODEL)
+        self.language = language
+        self._use_worker = None
+
+    @classmethod
+    def available(cls):
+        import tts_worker
+
+        return importlib.util.find_spec('TTS') is not None or tts_worker.ping() is not None
+
+    def synthesize(self, text, output_path):
+        import tts_worker
+
+        if self._use_worker is None:
+            status = tts_worker.ping()
+            self._use_worker = status is not None
+            if status is not None:
+                print(f"Using TTS worker ({status['model']} on {status['device']}, {status['threads']} threads)")
+        if self._use_worker:
+            tts_worker.synthesize_files([(text, output_path)], self.voice, self.language)
+            return
+        # The model is not thread-safe; concurrent chunks take turns on one engine
+        with self._engine_lock:
+            if CoquiBackend._engine is None:
+                CoquiBackend._engine = tts_worker.TTSEngine()
+                print(f"Loaded {self._engine.model_name} in {self._engine.load_seconds:.1f}s "
+                      f"(start tts_worker.py to keep it loaded between runs)")
+            self._engine.synthesize(text, str(output_path), self.voice, self.language)
+
+
+# MPEG-1 Layer III, no CRC, 128 kbps, 44.1 kHz, joint stereo; an all-zero body decodes as silence
+_SILENT_FRAME_HEADER = 0xFFFB9044
+_SILENT_FRAME_BYTES = 417
+_FRAMES_PER_SECOND = 44100 / 1152
+
+
+def silent_mp3(seconds: float) -> bytes:
+    """
+    Build a silent CBR MP3 of about the given length.
+
+    Args:
+        seconds (float): Duration.
+
+    Returns:
+        bytes: The MP3 frames.
+    """
+    frame = struct.pack('>I', _SILENT_FRAME_HEADER) + bytes(_SILENT_FRAME_BYTES - 4)
+    return frame * max(1, round(seconds * _FRAMES_PER_SECOND))
+
+
+class SimulatedHTTPError(RuntimeError):
+    """
+    Provider error raised by the fake backends, with the status code a real SDK would attach.
+    """
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@register_backend
+class FakeBackend(TTSBackend):
+    """
+    Local stand-in that writes silent audio after a simulated request delay.
+
+    Args:
+        voice (str): Distinguishes renditions in the TTS cache.
+        latency (float): Mean request time in seconds.
+        slow_rate (float): Fraction of requests that take ``slow_factor`` times longer.
+        slow_factor (float): Slowdown of the slow requests.
+        failure_rate (float): Fraction of requests that fail.
+    """
+
+    name = 'fake'
+    # Speaking rate used to size the audio
+    CHARS_PER_SECOND = 15
+
+    def __init__(self, voice: str = 'fake', latency: float = 0.2, slow_rate: float = 0.0, slow_factor: float = 20.0,
+                 failure_rate: float = 0.0):
+        super().__init__(voice)
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.failure_rate = failure_rate
+
+    def synthesize(self, text, output_path):
+        delay = self.latency * random.uniform(0.5, 1.5)
+        if random.random() < self.slow_rate:
+            delay *= self.slow_factor
+        time.sleep(delay)
+        if random.random() < self.failure_rate:
+            raise SimulatedHTTPError(f"Simulated 503 from {self.name}", 503)
+        output_path.write_bytes(silent_mp3(len(text) / self.CHARS_PER_SECOND))
+
+
+@register_backend
+class FlakyFakeBackend(FakeBackend):
+    """
+    Fake backend with a slow tail and occasional failures, for exercising hedging.
+    """
+
+    name = 'fake_flaky'
+
+    def __init__(self, voice: str = 'fake', latency: float = 0.2, slow_rate: float = 0.1, slow_factor: float = 20.0,
+                 failure_rate: float = 0.05):
+        super().__init__(voice, latency, slow_rate, slow_factor, failure_rate)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HedgedSynthesizer:
+    """
+    Render chunks concurrently on a primary backend, hedging slow or failed requests on a fallback.
+
+    Args:
+        backend (TTSBackend): Primary provider.
+        fallback (TTSBackend | None): Provider for hedged requests; no hedging if None.
+        workers (int): Chunks in flight at once.
+        hedge_after (float | None): Fixed hedge threshold in seconds; adaptive if None.
+    """
+
+    def __init__(self, backend: TTSBackend, fallback: TTSBackend | None = None, workers: int = TTS_WORKERS,
+                 hedge_after: float | None = TTS_HEDGE_AFTER):
+        self.backend = backend
+        self.fallback = fallback if fallback is not None and fallback.cache_key() != backend.cache_key() else None
+        self.workers = workers
+        self.hedge_after = hedge_after
+        self.ledger = get_tts_ledger()
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._stats = {}
+        self.chunks = 0
+        self.cache_hits = 0
+        self.resumed = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.busy_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def _count(self, backend: TTSBackend, key: str, amount: int = 1) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(backend.name, {'requests': 0, 'failures': 0, 'wins': 0, 'wasted': 0})
+            stats[key] += amount
+
+    def hedge_threshold(self) -> float:
+        """
+        Seconds to wait on the primary before sending a duplicate to the fallback.
+        """
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            latencies = list(self._latencies.get(self.backend.name, ()))
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_INITIAL_SECONDS
+        return max(HEDGE_MIN_SECONDS, HEDGE_LATENCY_FACTOR * statistics.median(latencies))
+
+    def _attempt(self, backend: TTSBackend, text: str, path: Path, description: str, failed: threading.Event,
+                 settled: threading.Event) -> tuple:
+        def request():
+            # Stop retrying once the other provider has delivered the chunk
+            if settled.is_set():
+                return None
+            start = time.perf_counter()
+            try:
+                backend.synthesize(text, path)
+            except Exception:
+                self._count(backend, 'failures')
+                path.unlink(missing_ok=True)
+                failed.set()
+                raise
+            finally:
+                self._count(backend, 'requests')
+            return time.perf_counter() - start
+
+        elapsed = call_with_retry(request, get_rate_limiter(backend.name), description=description)
+        if elapsed is None:
+            return backend, None, None
+        # Losing requests are recorded too: the provider charged for them
+        self.ledger.record(backend.name, len(text), elapsed)
+        with self._lock:
+            self._latencies.setdefault(backend.name, []).append(elapsed)
+        return backend, path, elapsed
+
+    def _submit(self, pool: ThreadPoolExecutor, backend: TTSBackend, index: int, text: str, out_dir: Path,
+                failed: threading.Event, settled: threading.Event):
+        # Attempts get their own names so a hedged pair never writes the same file
+        path = out_dir / f".attempt_{index:03d}_{backend.name}.{backend.extension}"
+        return pool.submit(self._attempt, backend, text, path, f"chunk {index} on {backend.name}", failed, settled)
+
+    def _discard(self, future) -> None:
+        # A request that lost the race: count it and delete its audio
+        if future.cancelled() or future.exception() is not None:
+            return
+        backend, path, _ = future.result()
+        if path is not None:
+            self._count(backend, 'wasted')
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _marker(out_dir: Path, index: int) -> Path:
+        return out_dir / f".chunk_{index:03d}.done"
+
+    @staticmethod
+    def _digest(text: str, backend: TTSBackend) -> str:
+        return hashlib.sha256('\0'.join((text, *backend.cache_key())).encode('utf-8')).hexdigest()
+
+    def _finished(self, out_dir: Path, index: int, text: str) -> Path | None:
+        # A chunk completed by an earlier, interrupted run into the same directory
+        try:
+            digest = self._marker(out_dir, index).read_text()
+        except FileNotFoundError:
+            return None
+        for backend in filter(None, (self.backend, self.fallback)):
+            path = out_dir / f"chunk_{index:03d}.{backend.extension}"
+            if digest == self._digest(text, backend) and path.exists():
+                return path
+        return None
+
+    def _mark_finished(self, out_dir: Path, index: int, text: str, backend: TTSBackend) -> None:
+        self._marker(out_dir, index).write_text(self._digest(text, backend))
+
+    def _synthesize_one(self, pool: ThreadPoolExecutor, index: int, text: str, out_dir: Path) -> Path:
+        path = self._finished(out_dir, index, text)
+        if path is not None:
+            with self._lock:
+                self.resumed += 1
+            return path
+
+        cache = get_tts_cache()
+        # Audio from either provider will do; a chunk counts as one cache lookup
+        cached = self.backend
+        if self.fallback is not None and not cache.path_for(text, *self.backend.cache_key()).exists() \
+                and cache.path_for(text, *self.fallback.cache_key()).exists():
+            cached = self.fallback
+        path = out_dir / f"chunk_{index:03d}.{cached.extension}"
+        if cache.fetch(text, *cached.cache_key(), destination=path) is not None:
+            with self._lock:
+                self.cache_hits += 1
+            self._mark_finished(out_dir, index, text, cached)
+            return path
+
+        # Set when the primary finishes or one of its requests fails
+        wake = threading.Event()
+        settled = threading.Event()
+        primary = self._submit(pool, self.backend, index, text, out_dir, wake, settled)
+        primary.add_done_callback(lambda _: wake.set())
+        pending = {primary}
+        hedged = self.fallback is None
+        if not hedged:
+            wake.wait(self.hedge_threshold())
+        done = {future for future in pending if future.done()}
+        winner, error = None, None
+        while True:
+            for future in done:
+                pending.discard(future)
+                if future.exception() is None:
+                    winner = winner or future
+                else:
+                    error = future.exception()
+            if winner is not None:
+                break
+            if not hedged:
+                # The primary is slower than the threshold or failing: race the fallback
+                hedged = True
+                with self._lock:
+                    self.hedges += 1
+                pending.add(self._submit(pool, self.fallback, index, text, out_dir, threading.Event(), settled))
+            if not pending:
+                raise error
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+        settled.set()
+        for future in pending:
+            future.add_done_callback(self._discard)
+        backend, attempt_path, elapsed = winner.result()
+        self._count(backend, 'wins')
+        with self._lock:
+            self.busy_seconds += elapsed
+            if backend is not self.backend:
+                self.hedge_wins += 1
+        path = out_dir / f"chunk_{index:03d}.{backend.extension}"
+        os.replace(attempt_path, path)
+        self._mark_finished(out_dir, index, text, backend)
+        cache.store(path, text, *backend.cache_key())
+        return path
+
+    def run(self, chunks: Iterable[str], out_dir, on_chunk: Callable[[int, Path], None] | None = None) -> list[Path]:
+        """
+        Render chunks to ``chunk_NNN.<ext>`` files in ``out_dir``.
+
+        Args:
+            chunks (Iterable[str]): Chunk texts in episode order; consumed lazily.
+            out_dir: Directory for the chunk files.
+            on_chunk (callable | None): Called with (index, path) as each chunk finishes, in completion order.
+
+        Returns:
+            list[Path]: Chunk files in episode order.
+        """
+        paths = self.run_indexed(enumerate(chunks), out_dir, on_chunk)
+        return [paths[i] for i in range(len(paths))]
+
+    def run_indexed(self, items: Iterable[tuple[int, str]], out_dir,
+                    on_chunk: Callable[[int, Path], None] | None = None) -> dict[int, Path]:
+        """
+        Render chunks whose episode positions are given, e.g. the share of an episode routed to this provider.
+
+        Args:
+            items (Iterable[tuple[int, str]]): Chunk index and text pairs; consumed lazily.
+            out_dir: Directory for the chunk files.
+            on_chunk (callable | None): Called with (index, path) as each chunk finishes, in completion order.
+
+        Returns:
+            dict[int, Path]: Chunk file per index.
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        # Room for a hedged duplicate next to every chunk in flight
+        attempts = ThreadPoolExecutor(max_workers=self.workers * (2 if self.fallback else 1))
+        futures = {}
+        finished = queue.Queue()
+        stop = threading.Event()
+        feed_error = []
+
+        # Items may arrive slowly (e.g. chunks of a streamed LLM response), so they are
+        # submitted from a feeder thread while finished chunks are reported here
+        def feed():
+            try:
+                for i, chunk in items:
+                    if stop.is_set():
+                        break
+                    future = executor.submit(self._synthesize_one, attempts, i, chunk, out_dir)
+                    futures[future] = i
+                    future.add_done_callback(finished.put)
+            except BaseException as e:
+                feed_error.append(e)
+            finally:
+                finished.put(None)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                feeder = threading.Thread(target=feed, name='tts-feeder', daemon=True)
+                feeder.start()
+                try:
+                    fed, reported = False, 0
+                    # Completion order, so a progressive writer gets each chunk as soon as it exists
+                    while not fed or reported < len(futures):
+                        future = finished.get()
+                        if future is None:
+                            fed = True
+                            continue
+                        reported += 1
+                        path = future.result()
+                        if on_chunk is not None:
+                            on_chunk(futures[future], path)
+                finally:
+                    stop.set()
+                    feeder.join()
+                if feed_error:
+                    raise feed_error[0]
+                paths = {i: future.result() for future, i in futures.items()}
+        finally:
+            # Losing requests still running finish in the background and delete their files
+            attempts.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self.chunks += len(paths)
+            self.wall_seconds += time.perf_counter() - start
+        return paths
+
+    def print_stats(self) -> None:
+        """
+        Print throughput, hedging and per-provider latency for the run.
+        """
+        with self._lock:
+            print(f"Synthesized {self.chunks} chunks with {self.workers} workers in {self.wall_seconds:.1f}s "
+                  f"(sequential: ~{self.busy_seconds:.1f}s, "
+                  f"{self.busy_seconds / max(self.wall_seconds, 1e-9):.1f}x speedup; {self.cache_hits} from cache, "
+                  f"{self.resumed} resumed)")
+            if self.fallback is not None:
+                print(f"Hedged {self.hedges} chunks on {self.fallback.name}; the fallback won {self.hedge_wins}")
+            for name, stats in self._stats.items():
+                latencies = self._latencies.get(name)
+                timing = (f", p50 {_percentile(latencies, 0.5):.1f}s, p95 {_percentile(latencies, 0.95):.1f}s"
+                          if latencies else "")
+                print(f"  {name}: {stats['requests']} requests, {stats['failures']} failed, {stats['wins']} won, "
+                      f"{stats['wasted']} discarded{timing}")
+
+
+def synthesize_chunks(chunks: Iterable[str], out_dir, backend: TTSBackend, fallback: TTSBackend | None = None,
+                      workers: int = TTS_WORKERS, hedge_after: float | None = TTS_HEDGE_AFTER,
+                      on_chunk: Callable[[int, Path], None] | None = None) -> list[Path]:
+    """
+    Render chunks concurrently, hedging on a fallback provider, and print the run's stats.
+
+    Args:
+        chunks (Iterable[str]): Chunk texts in episode order, within both providers' chunk limits.
+        out_dir: Directory for the ``chunk_NNN.<ext>`` files.
+        backend (TTSBackend): Primary provider.
+        fallback (TTSBackend | None): Provider for hedged requests.
+        workers (int): Chunks in flight at once.
+        hedge_after (float | None): Fixed hedge threshold in seconds; adaptive if None.
+        on_chunk (callable | None): Called with (index, path) as each chunk finishes.
+
+    Returns:
+        list[Path]: Chunk files in episode order.
+    """
+    synthesizer = HedgedSynthesizer(backend, fallback, workers, hedge_after)
+    paths = synthesizer.run(chunks, out_dir, on_chunk)
+    synthesizer.print_stats()
+    get_tts_cache().print_stats()
+    return paths
+
+
+def chunk_chars(*backends: TTSBackend | None) -> int:
+    """
+    Largest chunk every given backend accepts.
+
+    Args:
+        *backends (TTSBackend | None): The providers a chunk may be sent to; None entries are ignored.
+
+    Returns:
+        int: Characters per chunk.
+    """
+    return min(backend.chunk_chars for backend in backends if backend is not None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render a transcript to an episode with any TTS provider.")
+    parser.add_argument('input_file')
+    parser.add_argument('--provider', default='openai', choices=backend_names())
+    parser.add_argument('--fallback', default=TTS_FALLBACK, choices=backend_names(),
+                        help="Provider raced against slow or failed requests")
+    parser.add_argument('--voice', help="Voice of the primary provider")
+    parser.add_argument('--workers', type=int, default=TTS_WORKERS)
+    parser.add_argument('--hedge-after', type=float, default=TTS_HEDGE_AFTER, metavar='SECONDS')
+    parser.add_argument('--output', help="Episode file (default: the input with an .mp3 extension)")
+    args = parser.parse_args()
+
+    backend = get_backend(args.provider, **({'voice': args.voice} if args.voice else {}))
+    fallback = get_backend(args.fallback) if args.fallback else None
+    with open(args.input_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    output_file = args.output or str(Path(args.input_file).with_suffix('.mp3'))
+
+    with tempfile.TemporaryDirectory(prefix="tts_chunks_", ignore_cleanup_errors=True) as temp_dir:
+        chunk_files = synthesize_chunks(iter_chunks(text, chunk_chars(backend, fallback)), temp_dir, backend, fallback,
+                                        args.workers, args.hedge_after)
+        from audio_post import assemble_episode
+
+        mode = assemble_episode(chunk_files, output_file)
+    print(f"Podcast saved to {output_file} ({mode})")
+
+
+if __name__ == "__main__":
+    main()
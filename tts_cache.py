@@ -0,0 +1,180 @@
+"""
+Per-chunk TTS audio cache.
+
+Synthesized chunks are stored on disk keyed by (normalized chunk text, provider,
+voice, model, bitrate), so fixing one typo in a transcript only re-synthesizes the
+chunks that changed. When the cache grows past its size cap the least recently
+used files are evicted, when ``cache_budget`` says a scan is due.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+
+from cache_budget import SizeBudget
+
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', 'cache/tts')
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', str(2 * 1024 * 1024 * 1024)))
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize chunk text so whitespace-only edits do not invalidate the cache.
+
+    Args:
+        text (str): The chunk text.
+
+    Returns:
+        str: The text with runs of whitespace collapsed and ends stripped.
+    """
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+class TTSCache:
+    """
+    On-disk cache of synthesized audio chunks.
+
+    Args:
+        cache_dir (str): Directory holding the audio files.
+        max_bytes (int): Total size above which least recently used files are evicted.
+    """
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.budget = SizeBudget(max_bytes)
+        self.stats = {'hits': 0, 'misses': 0, 'chars_saved': 0}
+
+    def path_for(self, text: str, provider: str, voice: str, model: str = '', bitrate: str = '') -> Path:
+        """
+        Get the cache path for a chunk.
+
+        Args:
+            text (str): The chunk text.
+            provider (str): TTS provider name.
+            voice (str): Voice name or ID.
+            model (str): Model name.
+            bitrate (str): Output bitrate.
+
+        Returns:
+            Path: Where the chunk's audio is (or would be) stored.
+        """
+        key = '\0'.join([normalize_text(text), provider, voice, model, bitrate])
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.mp3"
+
+    def fetch(self, text: str, provider: str, voice: str, model: str = '', bitrate: str = '',
+              destination: Path | None = None) -> Path | None:
+        """
+        Look up a chunk, optionally copying it to ``destination``.
+
+        Args:
+            text (str): The chunk text.
+            provider (str): TTS provider name.
+            voice (str): Voice name or ID.
+            model (str): Model name.
+            bitrate (str): Output bitrate.
+            destination (Path | None): Where to copy the cached audio.
+
+        Returns:
+            Path | None: The cached (or copied) file, or None on a miss.
+        """
+        path = self.path_for(text, provider, voice, model, bitrate)
+        try:
+            # Touch the file so eviction sees it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+        with self._lock:
+            self.stats['hits'] += 1
+            self.stats['chars_saved'] += len(text)
+        if destination is None:
+            return path
+        shutil.copyfile(path, destination)
+        return Path(destination)
+
+    def store(self, source: Path, text: str, provider: str, voice: str, model: str = '', bitrate: str = '') -> Path:
+        """
+        Store a synthesized chunk and evict old files if the cache goes over its size cap.
+
+        Args:
+            source (Path): The synthesized audio file.
+            text (str): The chunk text.
+            provider (str): TTS provider name.
+            voice (str): Voice name or ID.
+            model (str): Model name.
+            bitrate (str): Output bitrate.
+
+        Returns:
+            Path: The cached file.
+        """
+        path = self.path_for(text, provider, voice, model, bitrate)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copyfile(source, tmp_path)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        added = tmp_path.stat().st_size - replaced
+        os.replace(tmp_path, path)
+        if self.budget.added(added):
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        """
+        Evict least recently used files until the cache is well under its size cap.
+        """
+        with self._lock:
+            files = []
+            for entry in self.cache_dir.glob('*/*.mp3'):
+                try:
+                    files.append((entry.stat(), entry))
+                except FileNotFoundError:  # Evicted by another process meanwhile
+                    pass
+            total = sum(stat.st_size for stat, _ in files)
+            if total > self.max_bytes:
+                files.sort(key=lambda item: item[0].st_mtime)
+                for stat, entry in files:
+                    if total <= self.budget.target:
+                        break
+                    entry.unlink(missing_ok=True)
+                    total -= stat.st_size
+            self.budget.scanned(total)
+
+    def print_stats(self) -> None:
+        """
+        Print the cache hit rate.
+        """
+        stats = self.stats
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / lookups * 100 if lookups else 0.0
+        print(f"TTS cache: {stats['hits']}/{lookups} chunks reused ({hit_rate:.0f}% hit rate), "
+              f"{stats['chars_saved']} characters not re-synthesized")
+
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """
+    Get the process-wide TTS cache configured from the environment.
+
+    Returns:
+        TTSCache: The shared cache.
+    """
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache()
+        return _tts_cache
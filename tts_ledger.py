@@ -0,0 +1,204 @@
+"""
+Persistent ledger of TTS usage, cost and latency per provider.
+
+Every request made through ``tts_backends`` is recorded in SQLite
+(``TTS_LEDGER_PATH``): characters and requests per provider and calendar month,
+and an exponentially weighted average of seconds per 1000 characters. The ledger
+is combined with each provider's price and monthly character quota from
+``PROVIDER_PROFILES`` (overridable with ``<PROVIDER>_USD_PER_MILLION_CHARS`` and
+``<PROVIDER>_MONTHLY_CHARS``) to tell how much quota is left and how fast a
+provider has been lately.
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+TTS_LEDGER_PATH = os.getenv('TTS_LEDGER_PATH', 'cache/tts_ledger.sqlite')
+
+# Price, monthly character quota (None: unlimited) and a latency prior used until
+# the ledger has measurements
+PROVIDER_PROFILES = {
+    'openai': {'usd_per_million_chars': 15.0, 'monthly_chars': None, 'seconds_per_kchar': 4.0},  # tts-1
+    'unreal': {'usd_per_million_chars': 0.0, 'monthly_chars': 250_000, 'seconds_per_kchar': 3.0},  # free tier
+    # Free tier: about 10 minutes of audio a month
+    'elevenlabs': {'usd_per_million_chars': 0.0, 'monthly_chars': 10_000, 'seconds_per_kchar': 5.0},
+    'coqui': {'usd_per_million_chars': 0.0, 'monthly_chars': None, 'seconds_per_kchar': 60.0},  # local, CPU
+    'fake': {'usd_per_million_chars': 0.0, 'monthly_chars': None, 'seconds_per_kchar': 0.2},
+    'fake_flaky': {'usd_per_million_chars': 0.0, 'monthly_chars': None, 'seconds_per_kchar': 0.5},
+}
+DEFAULT_PROFILE = {'usd_per_million_chars': 0.0, 'monthly_chars': None, 'seconds_per_kchar': 10.0}
+# Weight of the newest request in the latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+def provider_profile(provider: str) -> dict:
+    """
+    Get a provider's price, quota and latency prior, applying environment overrides.
+
+    Args:
+        provider (str): Provider name, e.g. 'openai' or 'elevenlabs'.
+
+    Returns:
+        dict: 'usd_per_million_chars', 'monthly_chars' (None if unlimited) and 'seconds_per_kchar'.
+    """
+    profile = dict(PROVIDER_PROFILES.get(provider, DEFAULT_PROFILE))
+    prefix = provider.upper()
+    if os.getenv(f'{prefix}_USD_PER_MILLION_CHARS'):
+        profile['usd_per_million_chars'] = float(os.getenv(f'{prefix}_USD_PER_MILLION_CHARS'))
+    if os.getenv(f'{prefix}_MONTHLY_CHARS'):
+        value = os.getenv(f'{prefix}_MONTHLY_CHARS')
+        profile['monthly_chars'] = None if value.lower() == 'none' else int(value)
+    return profile
+
+
+def estimate_cost(provider: str, characters: int) -> float:
+    """
+    Estimate the price of synthesizing text with a provider.
+
+    Args:
+        provider (str): Provider name.
+        characters (int): Number of characters.
+
+    Returns:
+        float: Cost in USD.
+    """
+    return characters * provider_profile(provider)['usd_per_million_chars'] / 1e6
+
+
+def current_period() -> str:
+    """
+    The quota period (calendar month) requests are counted against, e.g. '2024-09'.
+    """
+    return time.strftime('%Y-%m')
+
+
+class TTSLedger:
+    """
+    Per-provider usage and latency, persisted across runs.
+
+    Args:
+        path (str): SQLite database file.
+    """
+
+    def __init__(self, path: str = TTS_LEDGER_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                provider TEXT NOT NULL,
+                period TEXT NOT NULL,
+                characters INTEGER NOT NULL,
+                requests INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                PRIMARY KEY (provider, period)
+            )""")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS latency (
+                provider TEXT PRIMARY KEY,
+                seconds_per_kchar REAL NOT NULL,
+                samples INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    def record(self, provider: str, characters: int, seconds: float) -> None:
+        """
+        Record a successful request.
+
+        Args:
+            provider (str): Provider name.
+            characters (int): Characters synthesized (and charged against the quota).
+            seconds (float): Request latency.
+        """
+        sample = seconds * 1000 / max(characters, 1)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO usage VALUES (?, ?, ?, 1, ?) ON CONFLICT (provider, period) DO UPDATE SET "
+                "characters = characters + excluded.characters, requests = requests + 1, "
+                "seconds = seconds + excluded.seconds", (provider, current_period(), characters, seconds))
+            self._conn.execute(
+                "INSERT INTO latency VALUES (?, ?, 1, ?) ON CONFLICT (provider) DO UPDATE SET "
+                "seconds_per_kchar = seconds_per_kchar + ? * (excluded.seconds_per_kchar - seconds_per_kchar), "
+                "samples = samples + 1, updated_at = excluded.updated_at",
+                (provider, sample, time.time(), LATENCY_EWMA_ALPHA))
+            self._conn.commit()
+
+    def used(self, provider: str, period: str | None = None) -> int:
+        """
+        Characters synthesized with a provider in a quota period.
+
+        Args:
+            provider (str): Provider name.
+            period (str | None): Period such as '2024-09'; the current month if None.
+
+        Returns:
+            int: Characters used.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT characters FROM usage WHERE provider = ? AND period = ?",
+                                     (provider, period or current_period())).fetchone()
+        return row[0] if row else 0
+
+    def remaining(self, provider: str) -> int | None:
+        """
+        Characters left in a provider's monthly quota.
+
+        Args:
+            provider (str): Provider name.
+
+        Returns:
+            int | None: Remaining characters, or None if the provider has no quota.
+        """
+        quota = provider_profile(provider)['monthly_chars']
+        if quota is None:
+            return None
+        return max(quota - self.used(provider), 0)
+
+    def seconds_per_kchar(self, provider: str) -> float:
+        """
+        Recent latency of a provider per 1000 characters, or its prior if never measured.
+
+        Args:
+            provider (str): Provider name.
+
+        Returns:
+            float: Seconds per 1000 characters.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT seconds_per_kchar FROM latency WHERE provider = ?",
+                                     (provider,)).fetchone()
+        return row[0] if row else provider_profile(provider)['seconds_per_kchar']
+
+    def print_usage(self) -> None:
+        """
+        Print this month's usage, cost and remaining quota per provider.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT provider, characters, requests, seconds FROM usage WHERE period = ? "
+                                      "ORDER BY provider", (current_period(),)).fetchall()
+        for provider, characters, requests, seconds in rows:
+            remaining = self.remaining(provider)
+            quota = f", {remaining} characters of quota left" if remaining is not None else ""
+            print(f"TTS ledger {current_period()} {provider}: {characters} characters in {requests} requests "
+                  f"(${estimate_cost(provider, characters):.2f}, {seconds / max(requests, 1):.1f}s per request{quota})")
+
+
+_tts_ledger = None
+_tts_ledger_lock = threading.Lock()
+
+
+def get_tts_ledger() -> TTSLedger:
+    """
+    Get the process-wide TTS ledger configured from the environment.
+
+    Returns:
+        TTSLedger: The shared ledger.
+    """
+    global _tts_ledger
+    with _tts_ledger_lock:
+        if _tts_ledger is None:
+            _tts_ledger = TTSLedger()
+        return _tts_ledger
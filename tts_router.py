@@ -0,0 +1,272 @@
+"""
+Quota- and cost-aware routing of TTS chunks across providers.
+
+``plan_routes`` assigns each chunk to the cheapest provider that still has monthly
+quota for it (from ``tts_ledger``) while the estimated render time stays within a
+target; once the cheap providers would miss the target, chunks go to whichever
+provider keeps the estimate lowest. Chunks already in the TTS cache stay with the
+provider that rendered them, at no cost. A provider's share is estimated from its
+recent latency per character, the number of concurrent workers and its request
+rate limit; shares render concurrently, so the episode takes as long as the
+slowest one. The plan is printed before synthesis starts, and
+``synthesize_routed`` renders each share with the hedged driver from
+``tts_backends``, recording usage in the ledger as it goes.
+
+Run: python tts_router.py transcript.txt [--providers openai,unreal,elevenlabs] [--target-seconds 120] [--dry-run]
+"""
+import argparse
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from rate_limiter import provider_limits
+from text_segmentation import iter_chunks
+from tts_backends import TTS_FALLBACK, TTS_HEDGE_AFTER, TTS_WORKERS, HedgedSynthesizer, TTSBackend, backend_names, \
+    chunk_chars, get_backend
+from tts_cache import get_tts_cache
+from tts_ledger import TTSLedger, estimate_cost, get_tts_ledger, provider_profile
+
+# Providers considered for routing
+TTS_ROUTE_PROVIDERS = os.getenv('TTS_ROUTE_PROVIDERS', 'openai,unreal,elevenlabs')
+# Render time target for a whole episode in seconds; cheapest routing without a target
+TTS_TARGET_SECONDS = float(os.getenv('TTS_TARGET_SECONDS')) if os.getenv('TTS_TARGET_SECONDS') else None
+
+
+class ProviderShare:
+    """
+    The chunks routed to one provider, with running time and cost estimates.
+
+    Args:
+        backend (TTSBackend): The provider.
+        workers (int): Chunks the provider renders concurrently.
+        ledger (TTSLedger): Source of recent latency and remaining quota.
+    """
+
+    def __init__(self, backend: TTSBackend, workers: int, ledger: TTSLedger):
+        limits = provider_limits(backend.name)
+        profile = provider_profile(backend.name)
+        self.backend = backend
+        self.workers = workers
+        self.usd_per_million_chars = profile['usd_per_million_chars']
+        self.seconds_per_kchar = ledger.seconds_per_kchar(backend.name)
+        self.requests_per_second = limits['requests_per_second']
+        self.burst = limits['burst']
+        self.remaining = ledger.remaining(backend.name)
+        self.indices = []
+        self.characters = 0
+        self.requests = 0
+        self.cached = 0
+
+    @property
+    def name(self) -> str:
+        return self.backend.name
+
+    def fits(self, characters: int) -> bool:
+        return self.remaining is None or self.characters + characters <= self.remaining
+
+    def seconds(self, characters: int = 0, requests: int = 0) -> float:
+        """
+        Estimated time to render the share, optionally with one more chunk.
+
+        Args:
+            characters (int): Characters to add.
+            requests (int): Requests to add.
+
+        Returns:
+            float: Seconds: the busier of the worker-bound and rate-limit-bound estimates.
+        """
+        characters += self.characters
+        requests += self.requests
+        busy = characters / 1000 * self.seconds_per_kchar / self.workers
+        throttled = max(requests - self.burst, 0) / self.requests_per_second
+        return max(busy, throttled)
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.name, self.characters)
+
+
+class RoutePlan:
+    """
+    Provider assignment for every chunk of an episode.
+
+    Args:
+        chunks (list[str]): Chunk texts in episode order.
+        shares (list[ProviderShare]): Per-provider shares, cheapest first.
+        routes (list[ProviderShare]): The share each chunk was assigned to.
+        target_seconds (float | None): The render time target the plan was made for.
+    """
+
+    def __init__(self, chunks: list[str], shares: list[ProviderShare], routes: list[ProviderShare],
+                 target_seconds: float | None):
+        self.chunks = chunks
+        self.shares = shares
+        self.routes = routes
+        self.target_seconds = target_seconds
+
+    @property
+    def estimated_seconds(self) -> float:
+        return max((share.seconds() for share in self.shares), default=0.0)
+
+    @property
+    def cost(self) -> float:
+        return sum(share.cost for share in self.shares)
+
+    def print(self) -> None:
+        """
+        Print the assignment, estimates and remaining quota per provider.
+        """
+        target = f" (target {self.target_seconds:.0f}s)" if self.target_seconds is not None else ""
+        print(f"TTS plan: {len(self.chunks)} chunks, {sum(len(chunk) for chunk in self.chunks)} characters, "
+              f"est. {self.estimated_seconds:.0f}s{target}, ${self.cost:.2f}")
+        for share in self.shares:
+            if not share.indices:
+                continue
+            quota = "no quota" if share.remaining is None else \
+                f"{share.remaining - share.characters} of {share.remaining} quota characters left after this run"
+            print(f"  {share.name}: {len(share.indices)} chunks ({share.cached} cached), {share.characters} "
+                  f"characters, est. {share.seconds():.0f}s, ${share.cost:.2f}, {quota}")
+        switches = sum(1 for previous, route in zip(self.routes, self.routes[1:]) if route is not previous)
+        if switches:
+            print(f"  The voice changes {switches} times across the episode")
+        if self.target_seconds is not None and self.estimated_seconds > self.target_seconds:
+            print(f"  No assignment meets the {self.target_seconds:.0f}s target; this is the fastest found")
+
+
+def plan_routes(chunks: list[str], backends: list[TTSBackend], target_seconds: float | None = TTS_TARGET_SECONDS,
+                workers: int = TTS_WORKERS, ledger: TTSLedger | None = None) -> RoutePlan:
+    """
+    Assign each chunk to the cheapest provider with quota that keeps the render time within the target.
+
+    Args:
+        chunks (list[str]): Chunk texts in episode order, within every provider's chunk limit.
+        backends (list[TTSBackend]): Candidate providers.
+        target_seconds (float | None): Render time target; cheapest routing if None.
+        workers (int): Chunks each provider renders concurrently.
+        ledger (TTSLedger | None): Usage ledger; the process-wide one if None.
+
+    Returns:
+        RoutePlan: The assignment.
+    """
+    ledger = ledger or get_tts_ledger()
+    cache = get_tts_cache()
+    shares = sorted((ProviderShare(backend, workers, ledger) for backend in backends),
+                    key=lambda share: (share.usd_per_million_chars, share.seconds_per_kchar))
+    if not shares:
+        raise ValueError("No TTS providers to route to")
+    routes = []
+    for i, chunk in enumerate(chunks):
+        # Audio already rendered by one of the providers costs nothing
+        share = next((share for share in shares if cache.path_for(chunk, *share.backend.cache_key()).exists()), None)
+        if share is not None:
+            share.cached += 1
+        else:
+            candidates = [share for share in shares if share.fits(len(chunk))]
+            if not candidates:
+                raise ValueError(f"No provider has quota left for chunk {i} ({len(chunk)} characters)")
+
+            def plan_seconds(candidate):
+                others = max((other.seconds() for other in shares if other is not candidate), default=0.0)
+                return max(others, candidate.seconds(len(chunk), 1))
+
+            share = next((candidate for candidate in candidates
+                          if target_seconds is None or plan_seconds(candidate) <= target_seconds), None)
+            if share is None:
+                share = min(candidates, key=plan_seconds)
+            share.characters += len(chunk)
+            share.requests += 1
+        share.indices.append(i)
+        routes.append(share)
+    return RoutePlan(chunks, shares, routes, target_seconds)
+
+
+def synthesize_routed(plan: RoutePlan, out_dir, fallback: TTSBackend | None = None,
+                      hedge_after: float | None = TTS_HEDGE_AFTER,
+                      on_chunk: Callable[[int, Path], None] | None = None) -> list[Path]:
+    """
+    Render every provider's share of a plan concurrently.
+
+    Args:
+        plan (RoutePlan): The assignment from ``plan_routes``.
+        out_dir: Directory for the ``chunk_NNN.<ext>`` files.
+        fallback (TTSBackend | None): Provider for hedged requests.
+        hedge_after (float | None): Fixed hedge threshold in seconds; adaptive if None.
+        on_chunk (callable | None): Called with (index, path) as each chunk finishes, from the shares' threads.
+
+    Returns:
+        list[Path]: Chunk files in episode order.
+    """
+    shares = [share for share in plan.shares if share.indices]
+    synthesizers = [HedgedSynthesizer(share.backend, fallback, share.workers, hedge_after) for share in shares]
+    paths = {}
+    with ThreadPoolExecutor(max_workers=max(len(shares), 1)) as executor:
+        futures = [executor.submit(synthesizer.run_indexed, [(i, plan.chunks[i]) for i in share.indices], out_dir,
+                                   on_chunk)
+                   for share, synthesizer in zip(shares, synthesizers)]
+        for future in futures:
+            paths.update(future.result())
+    for synthesizer in synthesizers:
+        synthesizer.print_stats()
+    get_tts_cache().print_stats()
+    get_tts_ledger().print_usage()
+    return [paths[i] for i in range(len(plan.chunks))]
+
+
+def route_backends(names: list[str]) -> list[TTSBackend]:
+    """
+    Create the named providers that are usable here, skipping the rest with a note.
+
+    Args:
+        names (list[str]): Provider names.
+
+    Returns:
+        list[TTSBackend]: The usable providers.
+    """
+    backends = []
+    for name in names:
+        backend = get_backend(name)
+        if type(backend).available():
+            backends.append(backend)
+        else:
+            print(f"Skipping TTS provider {name}: not configured")
+    return backends
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render a transcript with chunks routed across TTS providers.")
+    parser.add_argument('input_file')
+    parser.add_argument('--providers', default=TTS_ROUTE_PROVIDERS,
+                        help=f"Comma-separated candidates from: {', '.join(backend_names())}")
+    parser.add_argument('--target-seconds', type=float, default=TTS_TARGET_SECONDS)
+    parser.add_argument('--workers', type=int, default=TTS_WORKERS)
+    parser.add_argument('--fallback', default=TTS_FALLBACK, choices=backend_names())
+    parser.add_argument('--dry-run', action='store_true', help="Print the plan without synthesizing")
+    parser.add_argument('--output', help="Episode file (default: the input with an .mp3 extension)")
+    args = parser.parse_args()
+
+    backends = route_backends([name.strip() for name in args.providers.split(',') if name.strip()])
+    if not backends:
+        parser.error("none of the providers are configured")
+    fallback = get_backend(args.fallback) if args.fallback else None
+    with open(args.input_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    chunks = list(iter_chunks(text, chunk_chars(*backends, fallback)))
+    plan = plan_routes(chunks, backends, args.target_seconds, args.workers)
+    plan.print()
+    if args.dry_run:
+        return
+
+    output_file = args.output or str(Path(args.input_file).with_suffix('.mp3'))
+    with tempfile.TemporaryDirectory(prefix="tts_chunks_", ignore_cleanup_errors=True) as temp_dir:
+        chunk_files = synthesize_routed(plan, temp_dir, fallback)
+        from audio_post import assemble_episode
+
+        mode = assemble_episode(chunk_files, output_file)
+    print(f"Podcast saved to {output_file} ({mode})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Long-lived local TTS worker for the Coqui XTTS path.
+
+Loading ``xtts_v2`` takes many seconds, and ``tts_to_file(speaker_wav=...)``
+recomputes the speaker's conditioning latents for every chunk. The worker loads
+the model once, caches the latents per speaker file, and serves synthesis jobs
+over a local TCP socket using a JSON-lines protocol:
+
+    -> {"op": "ping"}
+    <- {"ok": true, "model": "...", "device": "cpu", "threads": 8, "jobs_done": 12}
+    -> {"op": "synthesize", "speaker_wav": "...", "language": "en",
+        "jobs": [{"text": "...", "output": "3f2a....wav"}, ...]}
+    <- {"ok": true, "outputs": ["/tmp/tts_worker/3f2a....wav", ...], "seconds": 41.2, "audio_seconds": 95.0}
+
+Outputs are plain ``.wav`` file names, written under the worker's
+``TTS_WORKER_OUTPUT_DIR``; absolute paths and ``..`` are rejected, so a local
+client cannot make the worker write anywhere else. The client moves the files to
+their destinations.
+
+Jobs from all connections go through one queue; the inference thread drains
+whatever is queued (up to ``TTS_WORKER_BATCH`` jobs), groups them by speaker and
+language, and runs each group back to back under ``torch.inference_mode`` with
+the intra-op thread pool sized to the machine. XTTS decodes autoregressively and
+Coqui has no padded batch inference for it, so a batch shares latents and thread
+pools rather than a single forward pass.
+
+Run: python tts_worker.py [--port 8766] [--threads N] [--output-dir DIR] [--preload-speaker samples_en_sample.wav]
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+TTS_WORKER_HOST = os.getenv('TTS_WORKER_HOST', '127.0.0.1')
+TTS_WORKER_PORT = int(os.getenv('TTS_WORKER_PORT', '8766'))
+TTS_WORKER_MODEL = os.getenv('TTS_WORKER_MODEL', 'tts_models/multilingual/multi-dataset/xtts_v2')
+TTS_WORKER_THREADS = int(os.getenv('TTS_WORKER_THREADS', str(os.cpu_count() or 1)))
+TTS_WORKER_BATCH = int(os.getenv('TTS_WORKER_BATCH', '16'))
+# The only directory the worker writes chunk files to
+TTS_WORKER_OUTPUT_DIR = os.getenv('TTS_WORKER_OUTPUT_DIR', os.path.join(tempfile.gettempdir(), 'tts_worker'))
+# Rendering a whole episode on CPU can take a long time
+TTS_WORKER_TIMEOUT = float(os.getenv('TTS_WORKER_TIMEOUT', '7200'))
+
+
+class TTSEngine:
+    """
+    Coqui TTS model with tuned torch threads and cached speaker latents.
+
+    Used by the worker daemon, and in-process by ``tts_backends.CoquiBackend`` when no
+    worker is running.
+
+    Args:
+        model_name (str): Coqui model name.
+        threads (int): Intra-op threads for CPU inference.
+    """
+
+    def __init__(self, model_name: str = TTS_WORKER_MODEL, threads: int = TTS_WORKER_THREADS):
+        import torch
+        from TTS.api import TTS
+
+        self.model_name = model_name
+        self.threads = threads
+        torch.set_num_threads(threads)
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        start = time.perf_counter()
+        self.tts = TTS(model_name).to(self.device)
+        self.load_seconds = time.perf_counter() - start
+        self._torch = torch
+        self._latents = {}
+
+    @property
+    def sample_rate(self) -> int:
+        return self.tts.synthesizer.output_sample_rate
+
+    def speaker_latents(self, speaker_wav: str):
+        """
+        Get (and cache) the XTTS conditioning latents for a speaker recording.
+
+        Args:
+            speaker_wav (str): Reference recording.
+
+        Returns:
+            tuple: GPT conditioning latent and speaker embedding.
+        """
+        key = str(Path(speaker_wav).resolve())
+        if key not in self._latents:
+            self._latents[key] = self.tts.synthesizer.tts_model.get_conditioning_latents(audio_path=[key])
+        return self._latents[key]
+
+    def synthesize(self, text: str, output: str, speaker_wav: str | None = None, language: str | None = None) -> float:
+        """
+        Synthesize one chunk to a WAV file.
+
+        Args:
+            text (str): The chunk text.
+            output (str): Destination WAV file.
+            speaker_wav (str | None): Reference recording for voice cloning.
+            language (str | None): Language code for multilingual models.
+
+        Returns:
+            float: Duration of the synthesized audio in seconds.
+        """
+        model = self.tts.synthesizer.tts_model
+        with self._torch.inference_mode():
+            if speaker_wav and hasattr(model, 'get_conditioning_latents'):
+                gpt_cond_latent, speaker_embedding = self.speaker_latents(speaker_wav)
+                wav = model.inference(text, language or 'en', gpt_cond_latent, speaker_embedding)['wav']
+            else:
+                wav = self.tts.tts(text=text, speaker_wav=speaker_wav, language=language)
+        self.tts.synthesizer.save_wav(wav, output)
+        return len(wav) / self.sample_rate
+
+
+class _Job:
+    __slots__ = ('text', 'output', 'speaker_wav', 'language', 'request', 'audio_seconds')
+
+    def __init__(self, text, output, speaker_wav, language, request):
+        self.text = text
+        self.output = output
+        self.speaker_wav = speaker_wav
+        self.language = language
+        self.request = request
+        self.audio_seconds = 0.0
+
+
+class _Request:
+    # One client request: completes when all of its jobs have been synthesized
+    def __init__(self, num_jobs: int):
+        self.remaining = num_jobs
+        self.error = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        if num_jobs == 0:
+            self.done.set()
+
+    def finish_job(self, error: Exception | None = None) -> None:
+        with self._lock:
+            if error is not None and self.error is None:
+                self.error = error
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.done.set()
+
+
+def resolve_output(name: str, output_dir) -> Path:
+    """
+    Map a client's output file name to a path inside the worker's output directory.
+
+    Args:
+        name (str): File name sent by the client, e.g. '3f2a....wav'.
+        output_dir: The worker's output directory.
+
+    Returns:
+        Path: The file to write.
+
+    Raises:
+        ValueError: If the name is absolute, contains '..' or directories, or is not a .wav file.
+    """
+    if not isinstance(name, str):
+        raise ValueError(f"Output must be a .wav file name, not {name!r}")
+    path = Path(name)
+    if path.is_absolute() or len(path.parts) != 1 or path.name in ('.', '..') \
+            or path.suffix.lower() != '.wav':
+        raise ValueError(f"Output must be a .wav file name without directories, not {name!r}")
+    return Path(output_dir).resolve() / path.name
+
+
+class TTSWorkerServer(socketserver.ThreadingTCPServer):
+    """
+    Socket server feeding a single inference thread.
+
+    Args:
+        address (tuple): Host and port to bind.
+        engine (TTSEngine): The loaded model.
+        batch_size (int): Maximum jobs taken from the queue per batch.
+        output_dir: Directory all chunk files are written to.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple, engine: TTSEngine, batch_size: int = TTS_WORKER_BATCH,
+                 output_dir=TTS_WORKER_OUTPUT_DIR):
+        super().__init__(address, _Handler)
+        self.engine = engine
+        self.batch_size = batch_size
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs = queue.Queue()
+        self.jobs_done = 0
+        threading.Thread(target=self._inference_loop, daemon=True).start()
+
+    def submit(self, request: dict) -> tuple[_Request, list[_Job]]:
+        """
+        Queue a synthesize request's jobs.
+
+        Args:
+            request (dict): The decoded 'synthesize' request.
+
+        Returns:
+            tuple[_Request, list[_Job]]: Completion tracker and the queued jobs in order.
+
+        Raises:
+            ValueError: If a job's output is not a plain .wav file name (nothing is queued).
+        """
+        outputs = [str(resolve_output(job['output'], self.output_dir)) for job in request.get('jobs', [])]
+        pending = _Request(len(outputs))
+        jobs = [_Job(job['text'], output, request.get('speaker_wav'), request.get('language'), pending)
+                for job, output in zip(request.get('jobs', []), outputs)]
+        for job in jobs:
+            self.jobs.put(job)
+        return pending, jobs
+
+    def _next_batch(self) -> list[_Job]:
+        batch = [self.jobs.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.jobs.get_nowait())
+            except queue.Empty:
+                break
+        # Group by voice so each speaker's latents are used back to back
+        batch.sort(key=lambda job: (job.speaker_wav or '', job.language or ''))
+        return batch
+
+    def _inference_loop(self) -> None:
+        while True:
+            for job in self._next_batch():
+                try:
+                    job.audio_seconds = self.engine.synthesize(job.text, job.output, job.speaker_wav, job.language)
+                except Exception as e:
+                    job.request.finish_job(e)
+                else:
+                    self.jobs_done += 1
+                    job.request.finish_job()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: TTSWorkerServer
+
+    def _reply(self, payload: dict) -> None:
+        self.wfile.write((json.dumps(payload) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                self._reply({'ok': False, 'error': f"Invalid JSON: {e}"})
+                continue
+            engine = self.server.engine
+            if request.get('op') == 'ping':
+                self._reply({'ok': True, 'model': engine.model_name, 'device': engine.device,
+                             'threads': engine.threads, 'jobs_done': self.server.jobs_done,
+                             'queued': self.server.jobs.qsize()})
+            elif request.get('op') == 'synthesize':
+                self._reply(self._synthesize(request))
+            else:
+                self._reply({'ok': False, 'error': f"Unknown op {request.get('op')!r}"})
+
+    def _synthesize(self, request: dict) -> dict:
+        start = time.perf_counter()
+        try:
+            pending, jobs = self.server.submit(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'ok': False, 'error': f"Invalid jobs: {e}"}
+        pending.done.wait()
+        if pending.error is not None:
+            return {'ok': False, 'error': str(pending.error)}
+        return {'ok': True, 'outputs': [job.output for job in jobs], 'seconds': time.perf_counter() - start,
+                'audio_seconds': sum(job.audio_seconds for job in jobs)}
+
+
+def ping(host: str = TTS_WORKER_HOST, port: int = TTS_WORKER_PORT, timeout: float = 0.5) -> dict | None:
+    """
+    Check whether a worker is running.
+
+    Args:
+        host (str): Worker host.
+        port (int): Worker port.
+        timeout (float): Connection timeout in seconds.
+
+    Returns:
+        dict | None: The worker's status, or None if no worker answered.
+    """
+    try:
+        return _call({'op': 'ping'}, host, port, timeout)
+    except OSError:
+        return None
+
+
+def synthesize(texts: list[str], output_dir: Path, speaker_wav: str | None = None, language: str | None = None,
+               host: str = TTS_WORKER_HOST, port: int = TTS_WORKER_PORT) -> dict:
+    """
+    Have the worker synthesize chunks into numbered WAV files.
+
+    Args:
+        texts (list[str]): Chunk texts in order.
+        output_dir (Path): Directory for the chunk files.
+        speaker_wav (str | None): Reference recording for voice cloning.
+        language (str | None): Language code.
+        host (str): Worker host.
+        port (int): Worker port.
+
+    Returns:
+        dict: The worker's reply, with 'outputs' in chunk order.
+    """
+    output_dir = Path(output_dir)
+    return synthesize_files([(text, output_dir / f"chunk_{i:03d}.wav") for i, text in enumerate(texts)],
+                            speaker_wav, language, host, port)
+
+
+def synthesize_files(jobs: list[tuple[str, Path]], speaker_wav: str | None = None, language: str | None = None,
+                     host: str = TTS_WORKER_HOST, port: int = TTS_WORKER_PORT) -> dict:
+    """
+    Have the worker synthesize texts into the given WAV files.
+
+    The worker writes into its own output directory; the files are then moved to
+    their destinations.
+
+    Args:
+        jobs (list[tuple[str, Path]]): Text and output file pairs.
+        speaker_wav (str | None): Reference recording for voice cloning.
+        language (str | None): Language code.
+        host (str): Worker host.
+        port (int): Worker port.
+
+    Returns:
+        dict: The worker's reply, with 'outputs' (the destination files) in job order.
+    """
+    request = {'op': 'synthesize', 'language': language,
+               'jobs': [{'text': text, 'output': f"{uuid.uuid4().hex}.wav"} for text, _ in jobs],
+               'speaker_wav': str(Path(speaker_wav).resolve()) if speaker_wav else None}
+    reply = _call(request, host, port, TTS_WORKER_TIMEOUT)
+    if not reply.get('ok'):
+        raise RuntimeError(f"TTS worker failed: {reply.get('error')}")
+    destinations = [Path(output) for _, output in jobs]
+    for written, destination in zip(reply['outputs'], destinations):
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(written, destination)
+    reply['outputs'] = [str(destination) for destination in destinations]
+    return reply
+
+
+def _call(request: dict, host: str, port: int, timeout: float) -> dict:
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("TTS worker closed the connection")
+    return json.loads(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Coqui TTS synthesis from a warm model.")
+    parser.add_argument('--host', default=TTS_WORKER_HOST)
+    parser.add_argument('--port', type=int, default=TTS_WORKER_PORT)
+    parser.add_argument('--model', default=TTS_WORKER_MODEL)
+    parser.add_argument('--threads', type=int, default=TTS_WORKER_THREADS)
+    parser.add_argument('--batch', type=int, default=TTS_WORKER_BATCH)
+    parser.add_argument('--output-dir', default=TTS_WORKER_OUTPUT_DIR, help="Directory chunk files are written to")
+    parser.add_argument('--preload-speaker', help="Compute this speaker's latents before accepting jobs")
+    args = parser.parse_args()
+
+    engine = TTSEngine(args.model, args.threads)
+    print(f"Loaded {args.model} on {engine.device} in {engine.load_seconds:.1f}s ({args.threads} threads)")
+    if args.preload_speaker:
+        engine.speaker_latents(args.preload_speaker)
+    server = TTSWorkerServer((args.host, args.port), engine, args.batch, args.output_dir)
+    print(f"TTS worker listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
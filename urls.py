@@ -0,0 +1,89 @@
+"""
+URL helpers shared by the fetchers and caches.
+"""
+from urllib.parse import parse_qsl, unquote_plus, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Query parameters that only track where a click came from and never change the page
+# (generic names such as 'ref' or 'source' are left alone: some sites route on them)
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'yclid', '_hsenc', '_hsmi',
+                   'ref_src', 'ref_url', 'cmpid', 'ocid', 'sr_share'}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hmb_')
+
+
+def is_tracking_param(name: str) -> bool:
+    """
+    Whether a query parameter only tracks the click, e.g. utm_source or fbclid.
+
+    Args:
+        name (str): The parameter name.
+
+    Returns:
+        bool: True if the parameter can be dropped without changing the page.
+    """
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def is_web_url(url) -> bool:
+    """
+    Whether a value is an absolute http(s) URL, as opposed to an empty, relative or missing link.
+
+    Args:
+        url: The candidate URL.
+
+    Returns:
+        bool: True if the URL can be fetched as is.
+    """
+    if not isinstance(url, str):
+        return False
+    parts = urlsplit(url.strip())
+    return parts.scheme.lower() in DEFAULT_PORTS and bool(parts.hostname)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that equivalent spellings map to the same key.
+
+    Lowercases the scheme and host, drops default ports, the fragment and tracking
+    parameters. Everything else, including a trailing slash and the order and
+    spelling of the remaining query, is kept, so the result still fetches the same page.
+
+    Args:
+        url (str): The URL to canonicalize.
+
+    Returns:
+        str: The canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+    # Filter the raw query so kept parameters are not re-encoded (e.g. '?q' is not turned into '?q=')
+    query = '&'.join(piece for piece in parts.query.split('&')
+                     if piece and not is_tracking_param(unquote_plus(piece.split('=', 1)[0])))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def dedup_key(url: str) -> str:
+    """
+    Key under which links to the same article from different sources collide.
+
+    On top of ``canonicalize_url``, treats http and https, a leading ``www.`` and a
+    trailing slash as the same, and sorts the query parameters. Only for comparing
+    URLs; fetch the canonical URL instead.
+
+    Args:
+        url (str): An absolute http(s) URL (see ``is_web_url``).
+
+    Returns:
+        str: The dedup key.
+    """
+    parts = urlsplit(canonicalize_url(url))
+    host = parts.netloc.removeprefix('www.')
+    scheme = 'https' if parts.scheme in DEFAULT_PORTS else parts.scheme
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))